@@ -1,7 +1,10 @@
+import asyncio
 import logging
 import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from .prompts.system_persona import SYSTEM_INSTRUCTIONS
@@ -9,20 +12,54 @@ from .prompts.goal_library import GOAL_DEFINITIONS
 from .tools import ResearchTools
 from .validator import ClarityValidator
 from .output_manager import OutputManager
+from .llm_cache import CachedChatModel
+from .llm_pool import get_chat_model
+from .intent_router import IntentRouter
+from .precompute import SpeculativePrecomputer
+from .session_memory import SessionMemory
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("AgentBrain")
 
+# Blocking data-engine runs from every session share this pool, so one event loop can
+# serve many sessions without a thread per user
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="brain-tools")
+
+# Bare requests the precomputed summary draft answers as-is ("Run Analysis", "summarize it", ...).
+# The whole question must be the request: "summary of churn by region" carries its own content
+# and goes through the normal tool + synthesis path.
+_SUMMARY_REQUEST = re.compile(
+    r"(?:please |can you |could you )*"
+    r"(?:run (?:the |an? )?analysis"
+    r"|summari[sz]e(?: (?:it|this|the data(?:set)?|the file|my data))?"
+    r"|(?:give me |show me )?(?:an? |the )?(?:summary|overview))"
+    r"(?: please)?[\s.!?]*",
+    re.IGNORECASE
+)
+
 class AgentBrain:
-    def __init__(self, model_name="gpt-4-turbo"):
-        self.llm = ChatOpenAI(model=model_name, temperature=0)
+    def __init__(self, model_name="gpt-4-turbo", parallel_goals=False):
+        self.llm = CachedChatModel(get_chat_model(model_name, temperature=0))
         self.goal_queue: List[str] = []
         self.active_goal: Optional[str] = None
         self.context_memory: Dict = {}
+        # Keeps this session's state apart in components shared across sessions
+        self.session_id = uuid.uuid4().hex
+        # Last few turns verbatim, older ones folded into a capped summary
+        self.memory = SessionMemory()
         
         self.validator = ClarityValidator()
         self.output_manager = OutputManager()
         self.tools = ResearchTools() 
+        # Local goal detection; the LLM mapper only runs when the router is unsure
+        self.intent_router = IntentRouter()
+        self.intent_stats = {"local": 0, "llm": 0}
+        # Reports and drafts computed in the background right after an upload
+        self.precomputer = SpeculativePrecomputer(self.tools, self.output_manager)
+        # Time-to-first-token and total latency of the last streamed turn
+        self.last_turn_timing: Dict = {}
+        # Multi-goal questions: run every queued goal's tools + draft at once, answer in queue order
+        self.parallel_goals = parallel_goals
 
     def process_turn(self, user_input: str) -> str:
         """
@@ -31,7 +68,211 @@ class AgentBrain:
         2. Run Tools (if needed)
         3. SYNTHESIZE Answer (Using OpenAI)
         """
-        
+        ready = self._precomputed_answer(user_input)
+        if ready:
+            return self._remember(user_input, ready)
+
+        # Goals are detected once per turn and reused by the queue and the fallback
+        goals = self._queue_goals(user_input)
+        queued = self._goal_queue_answer(user_input, goals)
+        if queued is not None:
+            return self._remember(user_input, queued)
+
+        file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+        tool_output = self._run_tools(user_input, file_name, active_goal_hint)
+
+        if tool_output:
+            # The clarity check of the findings runs while the answer is synthesized
+            clarity = TOOL_EXECUTOR.submit(self.validator.check_clarity, active_goal_hint, tool_output, clean_user_query, self.session_id)
+            # Call OpenAI
+            response = self.llm.invoke(self._synthesis_messages(tool_output, clean_user_query))
+            self.context_memory["last_clarity"] = clarity.result()
+            return self._remember(user_input, response.content)
+
+        # --- 4. FALLBACK (No File / General Chat) ---
+        # (Existing logic for intent detection...)
+        return self._remember(user_input, self._handle_standard_chat(clean_user_query, goals))
+
+    def stream_turn(self, user_input: str):
+        """
+        Streaming variant of process_turn: yields the answer in chunks as the LLM produces them.
+        Time-to-first-token and total latency are recorded in self.last_turn_timing.
+        """
+        start = time.perf_counter()
+        timing = {"ttft_ms": None, "total_ms": None}
+        self.last_turn_timing = timing
+
+        ready = self._precomputed_answer(user_input)
+        goals = None if ready else self._queue_goals(user_input)
+        sections = None if ready else self._goal_queue_sections(user_input, goals)
+        clarity = None
+        if ready:
+            chunks = [ready]
+        elif sections is not None:
+            chunks = sections
+        else:
+            file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+            tool_output = self._run_tools(user_input, file_name, active_goal_hint)
+            if tool_output:
+                clarity = TOOL_EXECUTOR.submit(self.validator.check_clarity, active_goal_hint, tool_output, clean_user_query, self.session_id)
+                chunks = (chunk.content for chunk in self.llm.stream(self._synthesis_messages(tool_output, clean_user_query)))
+            else:
+                chunks = self._stream_standard_chat(clean_user_query, goals)
+
+        parts = []
+        for text in chunks:
+            if not text:
+                continue
+            if timing["ttft_ms"] is None:
+                timing["ttft_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            parts.append(text)
+            yield text
+
+        if clarity is not None:
+            self.context_memory["last_clarity"] = clarity.result()
+        self._remember(user_input, "".join(parts))
+        timing["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"⏱️ Turn streamed: first token {timing['ttft_ms']} ms, total {timing['total_ms']} ms")
+
+    async def aprocess_turn(self, user_input: str) -> str:
+        """
+        Async form of process_turn, ending in the same state. Independent stages overlap:
+        the data engine runs while the question's goals are detected, and the clarity check
+        runs while the answer is synthesized. Blocking work goes to worker threads and the
+        LLM calls use ainvoke, so one event loop can serve many sessions.
+        """
+        ready = self._precomputed_answer(user_input)
+        if ready:
+            return self._remember(user_input, ready)
+
+        loop = asyncio.get_running_loop()
+        file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+        # Goals are needed by the goal queue, and by the fallback when no tool will run
+        runs_tools = self._runs_tools(user_input, file_name)
+        needs_goals = (self.parallel_goals and file_name) or (not runs_tools and not self.active_goal)
+        tool_output, goals = await asyncio.gather(
+            loop.run_in_executor(TOOL_EXECUTOR, self._run_tools, user_input, file_name, active_goal_hint) if runs_tools else _resolved(""),
+            self._adetect_goals(clean_user_query) if needs_goals else _resolved(None),
+        )
+
+        # Default pool, not TOOL_EXECUTOR: a parallel queue run submits its goals to TOOL_EXECUTOR
+        # and waits on them, which must not happen from inside that same pool
+        queue_goals = goals if self.parallel_goals and file_name else None
+        queued = await loop.run_in_executor(None, self._goal_queue_answer, user_input, queue_goals)
+        if queued is not None:
+            return self._remember(user_input, queued)
+
+        if tool_output:
+            response, clarity = await asyncio.gather(
+                self.llm.ainvoke(self._synthesis_messages(tool_output, clean_user_query)),
+                self.validator.acheck_clarity(active_goal_hint, tool_output, clean_user_query, session_id=self.session_id),
+            )
+            self.context_memory["last_clarity"] = clarity
+            return self._remember(user_input, response.content)
+
+        # --- 4. FALLBACK (No File / General Chat) ---
+        return self._remember(user_input, await self._ahandle_standard_chat(clean_user_query, goals))
+
+    def start_precompute(self, file_name: str, active_goal: str):
+        """
+        Called on upload: computes all goal reports, the dataset profile and the selected
+        goal's handover / summary drafts in the background. A different file cancels the old run.
+        """
+        self.precomputer.start(file_name, active_goal)
+
+    def _precomputed_answer(self, user_input: str) -> Optional[str]:
+        """The precomputed summary draft, when the question just asks for the analysis / summary."""
+        file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+        if not file_name or not _SUMMARY_REQUEST.fullmatch(clean_user_query.strip()):
+            return None
+        draft = self.precomputer.draft(file_name, active_goal_hint, "summary")
+        if draft:
+            logger.info(f"🔮 Served precomputed summary for {file_name} ({active_goal_hint})")
+        return draft
+
+    def run_goal_queue(self, file_name: str, clean_user_query: str, parallel: Optional[bool] = None, goals: Optional[List[str]] = None):
+        """
+        Answers the given goals (default: the active goal and every queued goal), yielding
+        (goal, answer) in queue order and taking each goal off the queue as its answer is
+        handed over. Other queued goals are left for later turns.
+
+        In parallel mode each goal's data-engine run and synthesis draft go to TOOL_EXECUTOR
+        at once, so the whole run takes about as long as its slowest goal; otherwise the
+        goals run one after another. A goal that fails yields an error answer instead of
+        ending the run.
+        """
+        parallel = self.parallel_goals if parallel is None else parallel
+        queue = ([self.active_goal] if self.active_goal else []) + list(self.goal_queue)
+        goals = queue if goals is None else [goal for goal in queue if goal in goals]
+        # Rendered once up front: workers must not read the memory while turns are being recorded
+        conversation = self.memory.render(question=clean_user_query) or "(first question of the session)"
+
+        if parallel:
+            futures = [TOOL_EXECUTOR.submit(self._answer_goal, file_name, goal, clean_user_query, conversation) for goal in goals]
+            answers = (self._goal_result(goal, future.result) for goal, future in zip(goals, futures))
+        else:
+            answers = (
+                self._goal_result(goal, lambda goal=goal: self._answer_goal(file_name, goal, clean_user_query, conversation))
+                for goal in goals
+            )
+
+        for goal, answer in zip(goals, answers):
+            yield goal, answer
+            self._finish_goal(goal)
+
+    def _goal_result(self, goal, get_answer):
+        """One goal's answer, or an error line when its run failed (the other goals still answer)."""
+        try:
+            return get_answer()
+        except Exception as e:
+            logger.error(f"❌ Goal {goal} failed: {e}")
+            return f"❌ Error: Could not answer this part ({e})."
+
+    def _queue_goals(self, user_input: str) -> Optional[List[str]]:
+        """The question's goals when the goal queue may answer it (parallel_goals and a file), else None."""
+        file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+        if not self.parallel_goals or not file_name:
+            return None
+        return self._detect_goals(clean_user_query)
+
+    def _goal_queue_sections(self, user_input: str, goals: Optional[List[str]]):
+        """
+        In parallel_goals mode, a question with a file that maps to several goals is answered
+        goal by goal (queue order), as markdown sections. None for single-goal questions.
+        goals is the turn's detection result (see _queue_goals); only those goals are answered.
+        """
+        if not goals or len(goals) < 2:
+            return None
+        file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+
+        self._update_queue(goals)
+        logger.info(f"🧵 Answering {len(goals)} goals in parallel")
+        return (
+            f"### {GOAL_DEFINITIONS.get(goal, {}).get('name', goal)}\n\n{answer}\n\n"
+            for goal, answer in self.run_goal_queue(file_name, clean_user_query, goals=goals)
+        )
+
+    def _goal_queue_answer(self, user_input: str, goals: Optional[List[str]]) -> Optional[str]:
+        """The goal-queue sections joined into one answer, or None for single-goal questions."""
+        sections = self._goal_queue_sections(user_input, goals)
+        return None if sections is None else "".join(sections)
+
+    def _answer_goal(self, file_name, goal, clean_user_query, conversation):
+        """Data-engine run + synthesis for one queued goal (safe to run in a worker thread)."""
+        tool_output = self.tools.analyze_dataset(file_name, goal)
+        if not tool_output or tool_output.startswith(("❌", "⚠️")):
+            return tool_output
+        focus = GOAL_DEFINITIONS.get(goal, {}).get("name", goal)
+        response = self.llm.invoke(self._synthesis_messages(tool_output, f"{clean_user_query} (this part: {focus})", conversation))
+        return response.content
+
+    def _remember(self, user_input: str, answer: str) -> str:
+        """Records the exchange in session memory and passes the answer through."""
+        file_name, active_goal_hint, clean_user_query = self._parse_metadata(user_input)
+        self.memory.add_turn(clean_user_query, answer, goal=active_goal_hint if file_name else self.active_goal, file_name=file_name)
+        return answer
+
+    def _parse_metadata(self, user_input: str):
         # --- 1. PARSE FRONTEND METADATA ---
         # We need to separate the "User's Question" from the "System Data"
         file_name = None
@@ -54,24 +295,38 @@ class AgentBrain:
             if "USER_QUERY:" in user_input:
                 clean_user_query = user_input.split("USER_QUERY:")[-1].strip()
 
+        return file_name, active_goal_hint, clean_user_query
+
+    def _run_tools(self, user_input: str, file_name, active_goal_hint):
         # --- 2. DATA INTELLIGENCE LAYER (Person 2) ---
         tool_output = ""
         
-        # Only run the heavy tool if we haven't seen this file/goal combo yet, 
-        # OR if it's the first run. For now, we run it every time a file is present 
-        # to ensure we have fresh data, but we feed it to the LLM.
-        if file_name or "hairfall" in user_input.lower():
+        # Only run the heavy tool if we haven't seen this file/goal combo yet.
+        # ResearchTools memoizes reports by dataset fingerprint + goal, so follow-up
+        # questions reuse the report and an edited file is analyzed again.
+        if self._runs_tools(user_input, file_name):
             target_file = file_name if file_name else "hairfall_market_survey_demo.csv"
             logger.info(f"📂 Brain: Running Quant Engine on {target_file}")
             tool_output = self.tools.analyze_dataset(target_file, active_goal_hint)
 
-        # --- 3. COGNITIVE LAYER (Person 1 - OpenAI) ---
-        # THIS IS THE MISSING PIECE. We don't return the tool output. 
-        # We send it to OpenAI to "read" and explain.
-        
-        if tool_output:
-            # We construct a "Reasoning Prompt"
-            synthesis_prompt = f"""
+        return tool_output
+
+    def _runs_tools(self, user_input: str, file_name) -> bool:
+        """Whether the turn runs the data engine (an uploaded file, or the hairfall demo)."""
+        return bool(file_name) or "hairfall" in user_input.lower()
+
+    def _synthesis_messages(self, tool_output, clean_user_query, conversation=None):
+        """
+        --- 3. COGNITIVE LAYER (Person 1 - OpenAI) ---
+        THIS IS THE MISSING PIECE. We don't return the tool output.
+        We send it to OpenAI to "read" and explain.
+        """
+        # Earlier turns, compacted to a fixed budget so long sessions keep a constant-size prompt
+        if conversation is None:
+            conversation = self.memory.render(question=clean_user_query) or "(first question of the session)"
+
+        # We construct a "Reasoning Prompt"
+        synthesis_prompt = f"""
             SYSTEM CONTEXT:
             You are an expert AI Research Analyst.
             You have just run a quantitative analysis using your Data Engine.
@@ -79,6 +334,9 @@ class AgentBrain:
             THE DATA ENGINE OUTPUT:
             {tool_output}
             
+            CONVERSATION SO FAR (for follow-up questions; the Data Engine Output is the source of facts):
+            {conversation}
+            
             USER'S QUESTION:
             "{clean_user_query}"
             
@@ -88,32 +346,64 @@ class AgentBrain:
                "My current analysis report covers [Market, Pricing, Competition], but does not yet contain specific data on [User Topic]. Would you like me to update the analysis code to include that?"
             3. Do not just dump the raw report unless asked. Synthesize the answer.
             """
-            
-            # Call OpenAI
-            response = self.llm.invoke([
-                SystemMessage(content="You are a helpful Research Intelligence Assistant."),
-                HumanMessage(content=synthesis_prompt)
-            ])
-            return response.content
-
-        # --- 4. FALLBACK (No File / General Chat) ---
-        # (Existing logic for intent detection...)
-        return self._handle_standard_chat(clean_user_query)
+        return [
+            SystemMessage(content="You are a helpful Research Intelligence Assistant."),
+            HumanMessage(content=synthesis_prompt)
+        ]
 
-    def _handle_standard_chat(self, user_input):
-        # Existing logic for intent detection/escalation
+    def _handle_standard_chat(self, user_input, goals=None):
+        # Existing logic for intent detection/escalation (goals: this turn's detection, if already run)
         if not self.active_goal:
-             new_goals = self._detect_goals(user_input)
+             new_goals = goals if goals is not None else self._detect_goals(user_input)
              self._update_queue(new_goals)
         
         # Simple response for now if no file is present
         return self.output_manager.generate_response(self.active_goal, {}, "summary")
 
+    async def _ahandle_standard_chat(self, user_input, goals=None):
+        """Async form of _handle_standard_chat."""
+        if not self.active_goal:
+             new_goals = goals if goals is not None else await self._adetect_goals(user_input)
+             self._update_queue(new_goals)
+
+        return await self.output_manager.agenerate_response(self.active_goal, {}, "summary")
+
+    def _stream_standard_chat(self, user_input, goals=None):
+        """Streaming form of _handle_standard_chat."""
+        if not self.active_goal:
+             new_goals = goals if goals is not None else self._detect_goals(user_input)
+             self._update_queue(new_goals)
+
+        yield from self.output_manager.stream_response(self.active_goal, {}, "summary")
+
     def _detect_goals(self, user_input: str) -> List[str]:
+        routed = self._route_locally(user_input)
+        if routed is not None:
+            return routed
+
         prompt = f"Map input to goals: {list(GOAL_DEFINITIONS.keys())}. Return comma-separated list. Input: {user_input}"
         response = self.llm.invoke([SystemMessage(content=SYSTEM_INSTRUCTIONS), HumanMessage(content=prompt)])
         return [g.strip() for g in response.content.split(',') if g.strip() in GOAL_DEFINITIONS]
 
+    async def _adetect_goals(self, user_input: str) -> List[str]:
+        routed = self._route_locally(user_input)
+        if routed is not None:
+            return routed
+
+        prompt = f"Map input to goals: {list(GOAL_DEFINITIONS.keys())}. Return comma-separated list. Input: {user_input}"
+        response = await self.llm.ainvoke([SystemMessage(content=SYSTEM_INSTRUCTIONS), HumanMessage(content=prompt)])
+        return [g.strip() for g in response.content.split(',') if g.strip() in GOAL_DEFINITIONS]
+
+    def _route_locally(self, user_input: str) -> Optional[List[str]]:
+        """Goals from the local intent router, or None when the LLM mapper should decide."""
+        routed = self.intent_router.route(user_input)
+        if self.intent_router.is_confident(routed):
+            self.intent_stats["local"] += 1
+            logger.info(f"🧭 Routed locally ({routed['method']}, {routed['confidence']}): {routed['goals']}")
+            return routed["goals"]
+        self.intent_stats["llm"] += 1
+        return None
+
     def _update_queue(self, new_goals: List[str]):
         for goal in new_goals:
             if goal not in self.goal_queue and goal != self.active_goal:
@@ -124,10 +414,22 @@ class AgentBrain:
     def _has_required_context(self, goal, user_input) -> bool:
         return True 
 
+    def _finish_goal(self, goal):
+        """Takes an answered goal off the queue (advancing it when the goal was the active one)."""
+        if goal == self.active_goal:
+            self._complete_current_goal()
+        elif goal in self.goal_queue:
+            self.goal_queue.remove(goal)
+
     def _complete_current_goal(self):
         self.active_goal = None
         if self.goal_queue:
             self.active_goal = self.goal_queue.pop(0)
 
     def _handle_escalation(self, escalation_type):
-        return "Thinking..."
\ No newline at end of file
+        return "Thinking..."
+
+
+async def _resolved(value):
+    """Awaitable of value, for a stage the turn skips inside an asyncio.gather."""
+    return value
@@ -0,0 +1,104 @@
+import re
+import logging
+import numpy as np
+
+from .prompts.goal_library import GOAL_DEFINITIONS
+
+logger = logging.getLogger("IntentRouter")
+
+
+class IntentRouter:
+    """
+    Local goal detection, in front of the LLM goal mapper.
+
+    1. A keyword automaton: every GOAL_DEFINITIONS keyword compiled into one regex
+       (placeholders like 'why is X down' match any word).
+    2. Embedding similarity between the input and each goal's name + description,
+       using the shared embedding model.
+
+    route() returns the goals and a confidence in [0, 1]. Callers use the LLM only
+    when the confidence is below min_confidence.
+    """
+    def __init__(self, goal_definitions=GOAL_DEFINITIONS, embedding_service=None, min_confidence=0.5, min_similarity=0.35):
+        self.goal_keys = list(goal_definitions)
+        self.min_confidence = min_confidence
+        self.min_similarity = min_similarity
+
+        self._keyword_goal = {}
+        patterns = []
+        for goal_key, definition in goal_definitions.items():
+            for keyword in definition["keywords"]:
+                name = f"k{len(patterns)}"
+                self._keyword_goal[name] = goal_key
+                phrase = r"\s+".join(r"\w+" if word == "X" else re.escape(word.lower()) for word in keyword.split())
+                patterns.append(f"(?P<{name}>\\b{phrase}\\b)")
+        self._automaton = re.compile("|".join(patterns), re.IGNORECASE)
+
+        self._goal_texts = [
+            f"{definition['name']}. {definition['description']} {', '.join(definition['keywords'])}"
+            for definition in goal_definitions.values()
+        ]
+        self._embedding_service = embedding_service
+        self._goal_vectors = None
+
+    def keyword_hits(self, text):
+        """Distinct keyword matches per goal."""
+        hits = {}
+        for match in self._automaton.finditer(text):
+            goal_key = self._keyword_goal[match.lastgroup]
+            hits.setdefault(goal_key, set()).add(match.group(0).lower())
+        return {goal_key: len(words) for goal_key, words in hits.items()}
+
+    def similarities(self, text):
+        """Cosine similarity of the input to each goal description (None if no embedding model)."""
+        service = self._service()
+        if service is None:
+            return None
+        if self._goal_vectors is None:
+            self._goal_vectors = _unit(service.encode(self._goal_texts))
+        return self._goal_vectors @ _unit(service.encode([text]))[0]
+
+    def route(self, text):
+        """{'goals': [...], 'confidence': float, 'method': str}, goals ordered by score."""
+        hits = self.keyword_hits(text)
+        sims = self.similarities(text)
+
+        if hits:
+            goals = sorted(hits, key=lambda g: (-hits[g], -(sims[self.goal_keys.index(g)] if sims is not None else 0)))
+            if sims is None:
+                # A tie between goals is ambiguous: keep it below min_confidence so the LLM decides
+                confidence = 0.7 if len(goals) == 1 or hits[goals[0]] > hits[goals[1]] else 0.4
+                return {"goals": goals, "confidence": confidence, "method": "keyword"}
+            # Keywords and embeddings agreeing on the top goal is the strongest signal
+            agrees = self.goal_keys[int(np.argmax(sims))] == goals[0]
+            return {"goals": goals, "confidence": 0.9 if agrees else 0.6, "method": "keyword+embedding"}
+
+        if sims is None:
+            return {"goals": [], "confidence": 0.0, "method": "none"}
+
+        order = np.argsort(-sims)
+        top, margin = float(sims[order[0]]), float(sims[order[0]] - sims[order[1]])
+        if top < self.min_similarity:
+            return {"goals": [], "confidence": 0.0, "method": "embedding"}
+        # No keyword support: trust the embedding only when it clearly separates the top goal
+        confidence = min(0.8, 0.3 + 4 * margin)
+        return {"goals": [self.goal_keys[order[0]]], "confidence": round(confidence, 3), "method": "embedding"}
+
+    def is_confident(self, routed):
+        return bool(routed["goals"]) and routed["confidence"] >= self.min_confidence
+
+    def _service(self):
+        if self._embedding_service is None:
+            try:
+                from data_intelligence.embedding_service import get_embedding_service
+                self._embedding_service = get_embedding_service()
+                self._embedding_service.dimension
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding model unavailable, routing on keywords only: {e}")
+                self._embedding_service = False
+        return self._embedding_service or None
+
+
+def _unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+logger = logging.getLogger("LLMCache")
+
+# Next to this module (not the working directory), so every entry point shares one cache file
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache", "responses.sqlite")
+
+
+class LLMResponseCache:
+    """
+    File-backed cache of deterministic (temperature-0) chat completions.
+
+    Entries are keyed by (model, temperature, hash of the message list) and live in a
+    SQLite file, so identical prompts are answered locally across turns and restarts.
+    Past max_entries the least recently hit responses are evicted. Set enabled=False
+    or LLM_CACHE_DISABLED=1 to bypass it entirely.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5000, enabled=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled if enabled is not None else os.getenv("LLM_CACHE_DISABLED", "0") != "1"
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                temperature REAL,
+                content TEXT,
+                metadata TEXT,
+                created REAL,
+                last_hit REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_hit ON responses (last_hit);
+        """)
+
+    @staticmethod
+    def make_key(model, temperature, messages):
+        messages = [messages] if isinstance(messages, str) else messages
+        payload = json.dumps(
+            [model, float(temperature), [(getattr(m, "type", "human"), getattr(m, "content", m)) for m in messages]],
+            ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT content, metadata FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_hit = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+        return AIMessage(content=row[0], response_metadata={**json.loads(row[1]), "cache_hit": True})
+
+    def put(self, key, model, temperature, message):
+        now = time.time()
+        metadata = json.dumps(getattr(message, "response_metadata", {}) or {}, default=str)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, temperature, content, metadata, created, last_hit) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, float(temperature), message.content, metadata, now, now)
+            )
+            overflow = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_hit LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+            self._db.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            hits, misses, bypassed, evictions = self.hits, self.misses, self.bypassed, self.evictions
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "bypassed": bypassed,
+            "evictions": evictions
+        }
+
+
+class CachedChatModel:
+    """
+    Wraps a chat model so invoke(), ainvoke() and stream() go through the response cache.
+    Only temperature-0 calls are cached; sampled calls (and bypass_cache=True) always hit the API.
+    Every other attribute is forwarded to the wrapped model.
+    """
+    def __init__(self, llm, cache=None):
+        self.llm = llm
+        self.cache = cache or get_llm_cache()
+
+    def invoke(self, messages, bypass_cache=False, **kwargs):
+        key = self._cache_key(messages, bypass_cache, kwargs)
+        if key is None:
+            return self.llm.invoke(messages, **kwargs)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self.llm.invoke(messages)
+        self.cache.put(key, self._model, self.llm.temperature, response)
+        return response
+
+    async def ainvoke(self, messages, bypass_cache=False, **kwargs):
+        key = self._cache_key(messages, bypass_cache, kwargs)
+        if key is None:
+            return await self.llm.ainvoke(messages, **kwargs)
+
+        # SQLite lookups and writes block, so they run in a worker thread, off the event loop
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        response = await self.llm.ainvoke(messages)
+        await asyncio.to_thread(self.cache.put, key, self._model, self.llm.temperature, response)
+        return response
+
+    def stream(self, messages, bypass_cache=False, **kwargs):
+        """Streams chunks; a cache hit arrives as a single chunk, a miss is stored once fully streamed."""
+        key = self._cache_key(messages, bypass_cache, kwargs)
+        if key is None:
+            yield from self.llm.stream(messages, **kwargs)
+            return
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield AIMessageChunk(content=cached.content, response_metadata=cached.response_metadata)
+            return
+
+        parts = []
+        for chunk in self.llm.stream(messages):
+            parts.append(chunk.content)
+            yield chunk
+        self.cache.put(key, self._model, self.llm.temperature, AIMessage(content="".join(parts)))
+
+    @property
+    def _model(self):
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "unknown")
+
+    def _cache_key(self, messages, bypass_cache, kwargs):
+        """None when the call must go to the API (sampled, bypassed, disabled, or extra call options)."""
+        temperature = getattr(self.llm, "temperature", None)
+        if bypass_cache or not self.cache.enabled or temperature != 0 or kwargs:
+            self.cache.record_bypass()
+            return None
+        return LLMResponseCache.make_key(self._model, temperature, messages)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """The process-wide LLMResponseCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
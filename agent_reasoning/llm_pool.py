@@ -0,0 +1,197 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import logging
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger("LLMPool")
+
+# Provider errors worth retrying (rate limits, timeouts, dropped connections, 5xx)
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+class TokenBucket:
+    """
+    Process-wide request limiter: refills `rate` tokens per second up to `capacity`
+    (the allowed burst), and caps in-flight requests at `max_concurrency`.
+    """
+    def __init__(self, rate=5.0, capacity=10, max_concurrency=8):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_concurrency = max_concurrency
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_concurrency)
+        self.waited_seconds = 0.0
+
+    def _take(self):
+        """Takes a token if one is available; otherwise returns the seconds to wait for one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        start = time.monotonic()
+        while (wait := self._take()) > 0:
+            time.sleep(wait)
+        self._in_flight.acquire()
+        self.waited_seconds += time.monotonic() - start
+
+    async def aacquire(self):
+        start = time.monotonic()
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+        # Never block the event loop on the semaphore
+        while not self._in_flight.acquire(blocking=False):
+            await asyncio.sleep(0.005)
+        self.waited_seconds += time.monotonic() - start
+
+    def release(self):
+        self._in_flight.release()
+
+
+class PooledChatModel:
+    """
+    A shared ChatOpenAI behind the process-wide limiter, with retries and jittered
+    exponential backoff ('full jitter': sleep uniform(0, min(max_backoff, base * 2^attempt))).
+    Other attributes are forwarded to the wrapped model.
+    """
+    def __init__(self, llm, limiter, max_retries=4, base_backoff=0.5, max_backoff=20.0):
+        self.llm = llm
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats = {"calls": 0, "retries": 0, "failures": 0}
+
+    def invoke(self, messages, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                self.stats["calls"] += 1
+                return self.llm.invoke(messages, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                self._before_retry(attempt, e)
+            finally:
+                self.limiter.release()
+            # Back off outside the concurrency slot
+            time.sleep(self._backoff(attempt))
+
+    async def ainvoke(self, messages, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.aacquire()
+            try:
+                self.stats["calls"] += 1
+                return await self.llm.ainvoke(messages, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                self._before_retry(attempt, e)
+            finally:
+                self.limiter.release()
+            # Back off outside the concurrency slot
+            await asyncio.sleep(self._backoff(attempt))
+
+    def stream(self, messages, **kwargs):
+        """Retries only until the first chunk arrives; a stream that breaks midway is not replayed."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = False
+            try:
+                self.stats["calls"] += 1
+                for chunk in self.llm.stream(messages, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except RETRYABLE_ERRORS as e:
+                if started:
+                    raise
+                self._before_retry(attempt, e)
+            finally:
+                self.limiter.release()
+            # Back off outside the concurrency slot
+            time.sleep(self._backoff(attempt))
+
+    def _before_retry(self, attempt, error):
+        if attempt >= self.max_retries:
+            self.stats["failures"] += 1
+            raise error
+        self.stats["retries"] += 1
+        logger.warning(f"🔁 LLM call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries}")
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+class LLMClientPool:
+    """
+    Process-wide registry of chat models.
+
+    Every AgentBrain / OutputManager / ClarityValidator (and every Streamlit session)
+    gets the same model object per (model, temperature), all sharing one HTTP
+    connection pool and one TokenBucket. LLM_BASE_URL points the pool at another
+    OpenAI-compatible endpoint, e.g. a local stand-in for offline load tests.
+    """
+    def __init__(self, base_url=None, rate=None, capacity=None, max_concurrency=None, max_connections=32, timeout=60.0):
+        self.base_url = base_url or os.getenv("LLM_BASE_URL") or None
+        self.limiter = TokenBucket(
+            rate=rate or float(os.getenv("LLM_RATE_PER_SEC", "5")),
+            capacity=capacity or int(os.getenv("LLM_BURST", "10")),
+            max_concurrency=max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        )
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        # Async calls use langchain_openai's shared default async client: an AsyncClient is
+        # bound to the event loop it first ran on, so one pinned here would break other loops
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name, temperature=0):
+        key = (model_name, temperature)
+        with self._lock:
+            if key not in self._models:
+                llm = ChatOpenAI(
+                    model=model_name,
+                    temperature=temperature,
+                    base_url=self.base_url,
+                    max_retries=0,  # retries are handled by PooledChatModel, with jitter
+                    http_client=self.http_client
+                )
+                self._models[key] = PooledChatModel(llm, self.limiter)
+            return self._models[key]
+
+    def stats(self):
+        return {
+            "models": len(self._models),
+            "limiter_wait_seconds": round(self.limiter.waited_seconds, 3),
+            **{f"{model}@{temperature}": pooled.stats for (model, temperature), pooled in self._models.items()}
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool():
+    """The process-wide LLMClientPool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LLMClientPool()
+        return _pool
+
+
+def get_chat_model(model_name="gpt-4-turbo", temperature=0):
+    """Shared, rate-limited chat model for (model, temperature)."""
+    return get_llm_pool().get(model_name, temperature)
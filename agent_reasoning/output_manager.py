@@ -1,15 +1,26 @@
 import logging
+import re
 from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from .prompts.safety_guardrails import SAFETY_CHECK_PROMPT
+from .llm_cache import CachedChatModel
+from .llm_pool import get_chat_model
+from .safety_filter import SafetyPreFilter
+from .prompt_compactor import PromptCompactor, LAYER_TOKEN_BUDGETS
 
 logger = logging.getLogger("OutputManager")
 
+# End of the last complete sentence in a streamed buffer
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
 class OutputManager:
     def __init__(self, model_name="gpt-4-turbo"):
-        self.llm = ChatOpenAI(model=model_name, temperature=0.3)
+        # Sampled (temperature 0.3), so the cache wrapper passes these calls straight through
+        self.llm = CachedChatModel(get_chat_model(model_name, temperature=0.3))
+        self.safety_filter = SafetyPreFilter()
+        self.compactor = PromptCompactor(model_name)
+        self.safety_stats = {"drafts": 0, "llm_rewrites": 0, "skipped": 0}
 
     def generate_response(self, goal: str, data: dict, layer: str = "summary", tool_trace: List[str] = None) -> str:
         """
@@ -33,13 +44,55 @@ class OutputManager:
         elif layer == "evidence":
             draft = self._generate_layer_2(goal, data, tool_trace)
         elif layer == "deep_research":
-            draft = self._generate_layer_3(data)
+            # Raw data dump: nothing prescriptive to scrub, and a rewrite could alter the data
+            return self._generate_layer_3(data)
         else:
             draft = self._generate_layer_1(goal, data) # Default fallback
             
-        return self._apply_safety_check(draft)
+        return self._apply_safety_check(draft, source_data=data)
+
+    async def agenerate_response(self, goal: str, data: dict, layer: str = "summary", tool_trace: List[str] = None) -> str:
+        """Async form of generate_response (drafts and the safety rewrite use ainvoke)."""
+        if tool_trace is None:
+            tool_trace = []
+
+        logger.info(f"📝 Generating Output. Layer: {layer}")
+
+        if layer == "handover":
+            draft = await self._generate_handover(goal, data, tool_trace, mode="async")
+        elif layer == "evidence":
+            draft = await self._generate_layer_2(goal, data, tool_trace, mode="async")
+        elif layer == "deep_research":
+            return self._generate_layer_3(data)
+        else:
+            draft = await self._generate_layer_1(goal, data, mode="async")
+
+        return await self._aapply_safety_check(draft, source_data=data)
 
-    def _generate_handover(self, goal: str, data: dict, tool_trace: List[str]):
+    def stream_response(self, goal: str, data: dict, layer: str = "summary", tool_trace: List[str] = None):
+        """
+        Streaming variant of generate_response: yields text chunks as the draft is generated.
+        Complete sentences are released once they pass the safety pre-filter. From the first
+        flagged sentence on, the rest of the draft is held back and replaced by the LLM rewrite.
+        """
+        if tool_trace is None:
+            tool_trace = []
+
+        logger.info(f"📝 Streaming Output. Layer: {layer}")
+
+        if layer == "handover":
+            chunks = self._generate_handover(goal, data, tool_trace, mode="stream")
+        elif layer == "evidence":
+            chunks = self._generate_layer_2(goal, data, tool_trace, mode="stream")
+        elif layer == "deep_research":
+            yield self._generate_layer_3(data)
+            return
+        else:
+            chunks = self._generate_layer_1(goal, data, mode="stream")
+
+        yield from self._stream_safety_check(chunks, source_data=data)
+
+    def _generate_handover(self, goal: str, data: dict, tool_trace: List[str], mode="invoke"):
         """
         NEW: The 'Ready State' message.
         Does NOT give the full solution. Just summarizes the *effort* and invites questions.
@@ -61,12 +114,12 @@ class OutputManager:
         """
         
         # We only show a snippet of data to the LLM for the handover to save tokens
-        data_preview = str(data)[:500] 
+        data_preview = self.compactor.compact(data, LAYER_TOKEN_BUDGETS["handover"], goal)
         
         content = template.format(goal=goal, tool_trace=tool_trace, data_preview=data_preview)
-        return self.llm.invoke([HumanMessage(content=content)]).content
+        return self._complete(content, mode)
 
-    def _generate_layer_1(self, goal, data):
+    def _generate_layer_1(self, goal, data, mode="invoke"):
         """Layer 1: The Executive Summary (BLUF)."""
         template = """
         Draft a "Clarity Summary" (Executive Brief).
@@ -79,10 +132,10 @@ class OutputManager:
         2. Highlight the #1 Risk clearly.
         3. Use neutral language ("The data suggests...", not "You should...").
         """
-        content = template.format(goal=goal, data=str(data)[:1500])
-        return self.llm.invoke([HumanMessage(content=content)]).content
+        content = template.format(goal=goal, data=self.compactor.compact(data, LAYER_TOKEN_BUDGETS["summary"], goal))
+        return self._complete(content, mode)
 
-    def _generate_layer_2(self, goal, data, tool_trace):
+    def _generate_layer_2(self, goal, data, tool_trace, mode="invoke"):
         """
         Layer 2: Evidence & Logic Traceability.
         This answers the user's need for "How did you figure this out?".
@@ -102,14 +155,88 @@ class OutputManager:
         3. **Cite Inputs:** Refer to specific user inputs or file columns where possible.
         """
         
-        content = template.format(goal=goal, data=str(data)[:3000], tool_trace=tool_trace)
-        return self.llm.invoke([HumanMessage(content=content)]).content
+        content = template.format(goal=goal, data=self.compactor.compact(data, LAYER_TOKEN_BUDGETS["evidence"], goal), tool_trace=tool_trace)
+        return self._complete(content, mode)
+
+    def _complete(self, content, mode="invoke"):
+        """
+        Full completion text ('invoke'), an iterator of text chunks ('stream'),
+        or an awaitable of the text ('async').
+        """
+        messages = [HumanMessage(content=content)]
+        if mode == "stream":
+            return (chunk.content for chunk in self.llm.stream(messages))
+        if mode == "async":
+            return self._acomplete(messages)
+        return self.llm.invoke(messages).content
+
+    async def _acomplete(self, messages):
+        return (await self.llm.ainvoke(messages)).content
 
     def _generate_layer_3(self, data):
         """Layer 3: Deep Data (Raw)."""
         return f"### 📊 DEEP DATA VIEW\n\n```json\n{data}\n```"
 
-    def _apply_safety_check(self, draft):
-        """Runs the safety prompt to scrub prescriptive language."""
-        content = SAFETY_CHECK_PROMPT.format(draft=draft)
-        return self.llm.invoke([HumanMessage(content=content)]).content
\ No newline at end of file
+    def _apply_safety_check(self, draft, source_data=None):
+        """
+        Runs the safety prompt to scrub prescriptive language.
+        The local pre-filter screens the draft first; the LLM rewrite only runs when it flags something.
+        """
+        messages = self._safety_rewrite_messages(draft, source_data)
+        return draft if messages is None else self.llm.invoke(messages).content
+
+    async def _aapply_safety_check(self, draft, source_data=None):
+        """Async form of _apply_safety_check."""
+        messages = self._safety_rewrite_messages(draft, source_data)
+        return draft if messages is None else await self._acomplete(messages)
+
+    def _stream_safety_check(self, chunks, source_data=None):
+        """Streaming form of _apply_safety_check (same pre-filter, same stats)."""
+        buffer, findings = "", []
+        for text in chunks:
+            buffer += text
+            if findings:
+                continue
+            ends = [m.end() for m in _SENTENCE_END.finditer(buffer)]
+            if not ends:
+                continue
+            ready, rest = buffer[:ends[-1]], buffer[ends[-1]:]
+            findings = self.safety_filter.scan(ready, source_data)
+            if not findings:
+                buffer = rest
+                yield ready
+
+        # The held-back part: from the first flagged sentence on, or the unfinished tail
+        messages = self._safety_rewrite_messages(buffer.strip(), source_data, findings or None)
+        if messages is None:
+            if buffer:
+                yield buffer
+            return
+
+        # Keep the separator between the released sentences and the rewrite
+        if buffer[:1].isspace():
+            yield buffer[:len(buffer) - len(buffer.lstrip())]
+        for chunk in self.llm.stream(messages):
+            yield chunk.content
+
+    def _safety_rewrite_messages(self, draft, source_data=None, findings=None):
+        """
+        Screens a draft with the local pre-filter (unless findings are already known) and
+        records the outcome in safety_stats. None when the draft is clean, otherwise the
+        messages for the LLM safety rewrite.
+        """
+        self.safety_stats["drafts"] += 1
+        if findings is None:
+            findings = self.safety_filter.scan(draft, source_data)
+        if not findings:
+            self.safety_stats["skipped"] += 1
+            return None
+
+        logger.info(f"🛡️ Safety pre-filter flagged {len(findings)} issue(s): {findings[:3]}")
+        self.safety_stats["llm_rewrites"] += 1
+        return [HumanMessage(content=SAFETY_CHECK_PROMPT.format(draft=draft))]
+
+    def safety_skip_rate(self):
+        """Share of drafts that passed the local pre-filter and skipped the LLM safety rewrite."""
+        drafts = self.safety_stats["drafts"]
+        return {**self.safety_stats, "skip_rate": round(self.safety_stats["skipped"] / drafts, 3) if drafts else 0.0}
\ No newline at end of file
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from .tools import GOAL_ROUTES
+
+logger = logging.getLogger("Precompute")
+
+# Speculative work from every session shares this pool; it sits next to the brain's
+# TOOL_EXECUTOR so background runs never starve a live turn of tool workers
+PRECOMPUTE_EXECUTOR = ThreadPoolExecutor(max_workers=3, thread_name_prefix="precompute")
+
+# Layers drafted ahead of time for the selected goal
+DRAFT_LAYERS = ("handover", "summary")
+
+
+class SpeculativePrecomputer:
+    """
+    Uses the idle time between an upload and the first question.
+
+    start(file, goal) queues, in PRECOMPUTE_EXECUTOR:
+      1. the selected goal's report, then its handover and summary drafts,
+      2. the dataset profile,
+      3. the reports for the other six goals.
+    Reports land in ResearchTools' memo, so the brain's normal tool call becomes a hit.
+    Drafts and the profile are kept here and read with draft() / profile().
+
+    Uploading another file (or the same path with edited contents) cancels the queued
+    work; tasks already running finish, but their results are dropped because they
+    belong to an older generation.
+    """
+    def __init__(self, tools, output_manager, executor=None):
+        self.tools = tools
+        self.output_manager = output_manager
+        self.executor = executor or PRECOMPUTE_EXECUTOR
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._file = None
+        self._file_key = None
+        self._goals = set()
+        self._futures = []
+        self._drafts = {}
+        self._draft_futures = {}
+        self._profile = None
+        self.stats = {"runs": 0, "cancelled_tasks": 0, "completed_tasks": 0, "served": 0}
+
+    def start(self, file_path, goal):
+        """Starts (or extends) speculative work for file_path; a new or edited file cancels the old run."""
+        file_key = _file_key(file_path)
+        with self._lock:
+            if file_key != self._file_key:
+                self._cancel_locked()
+                self._generation += 1
+                self._file = file_path
+                self._file_key = file_key
+                self.stats["runs"] += 1
+                generation = self._generation
+                logger.info(f"🔮 Precomputing reports for {file_path} (selected goal: {goal})")
+                self._submit(generation, self._draft_goal, generation, file_path, goal)
+                self._submit(generation, self._build_profile, generation, file_path)
+                for keywords, _ in GOAL_ROUTES:
+                    if self.tools._route_goal(goal.lower()) != self.tools._route_goal(keywords[0]):
+                        self._submit(generation, self.tools.analyze_dataset, file_path, keywords[0])
+                self._goals = {goal}
+            elif goal not in self._goals:
+                # Same file, new goal: reports are (being) computed already, only the drafts are new
+                self._goals.add(goal)
+                self._submit(self._generation, self._draft_goal, self._generation, file_path, goal)
+
+    def cancel(self):
+        with self._lock:
+            self._cancel_locked()
+            self._generation += 1
+            self._file = None
+            self._file_key = None
+
+    def draft(self, file_path, goal, layer, timeout=0):
+        """
+        The precomputed draft for (file, goal, layer), or None if it is not ready.
+        With a timeout, waits up to that many seconds for a draft that is in progress.
+        """
+        file_key = _file_key(file_path)
+        with self._lock:
+            if file_key != self._file_key:
+                return None
+            future = self._draft_futures.get(goal)
+        if timeout and future is not None:
+            try:
+                future.result(timeout=timeout)
+            except (Exception, CancelledError):
+                pass
+        text = self._drafts.get((file_path, goal, layer))
+        if text is not None:
+            self.stats["served"] += 1
+        return text
+
+    def profile(self, file_path):
+        file_key = _file_key(file_path)
+        with self._lock:
+            return self._profile if file_key == self._file_key else None
+
+    def pending(self):
+        with self._lock:
+            return sum(not future.done() for future in self._futures)
+
+    def _submit(self, generation, fn, *args):
+        future = self.executor.submit(self._guarded, generation, fn, *args)
+        self._futures.append(future)
+        if fn == self._draft_goal:
+            self._draft_futures[args[-1]] = future
+        return future
+
+    def _guarded(self, generation, fn, *args):
+        if generation != self._generation:
+            return None
+        try:
+            result = fn(*args)
+            self.stats["completed_tasks"] += 1
+            return result
+        except Exception as e:
+            logger.warning(f"⚠️ Precompute task {getattr(fn, '__name__', fn)} failed: {e}")
+            return None
+
+    def _draft_goal(self, generation, file_path, goal):
+        report = self.tools.analyze_dataset(file_path, goal)
+        if not report or report.startswith(("❌", "⚠️")):
+            return
+        trace = [f"analyze_dataset({file_path}, {goal})"]
+        for layer in DRAFT_LAYERS:
+            if generation != self._generation:
+                return
+            text = self.output_manager.generate_response(goal, report, layer, trace)
+            with self._lock:
+                if generation == self._generation:
+                    self._drafts[(file_path, goal, layer)] = text
+
+    def _build_profile(self, generation, file_path):
+        profile = self.tools.profile_dataset(file_path)
+        with self._lock:
+            if generation == self._generation:
+                self._profile = profile
+
+    def _cancel_locked(self):
+        cancelled = sum(future.cancel() for future in self._futures)
+        self.stats["cancelled_tasks"] += cancelled
+        if cancelled:
+            logger.info(f"🛑 Cancelled {cancelled} queued precompute task(s) for {self._file}")
+        self._futures = []
+        self._draft_futures = {}
+        self._drafts = {}
+        self._profile = None
+        self._goals = set()
+
+
+def _file_key(file_path):
+    """Path plus size and mtime, so an edited file re-uploaded under the same name is a new run."""
+    if isinstance(file_path, str) and os.path.exists(file_path):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+    return file_path
@@ -0,0 +1,125 @@
+import math
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger("PromptCompactor")
+
+# Token budgets for the findings block of each prompt (roughly the old character cut-offs / 4)
+LAYER_TOKEN_BUDGETS = {
+    "handover": 125,
+    "summary": 375,
+    "evidence": 750,
+    "clarity": 500,
+    "memory": 300,  # conversation memory in the synthesis prompt
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_DIGIT = re.compile(r"\d")
+# Report decoration that carries no facts
+_NOISE = re.compile(r"\[cite_start\]|\[cite:[^\]]*\]|\*\*|^#+\s*|^[-*]\s+")
+_STOPWORDS = {"the", "a", "an", "of", "and", "or", "to", "in", "on", "for", "is", "are", "what", "how", "my", "me", "i", "it", "this", "that", "do", "does", "new"}
+
+
+class PromptCompactor:
+    """
+    Fits findings into a token budget instead of slicing their repr.
+
+    Findings (dicts, lists or markdown reports) are flattened into one 'key: value'
+    line per fact. Lines are ranked by word overlap with the goal and question, with
+    a bonus for lines that carry numbers, and the best ones are kept until the budget
+    is spent. Kept lines are emitted in their original order.
+    """
+    def __init__(self, model_name="gpt-4-turbo"):
+        self.encoding = _load_encoding(model_name)
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return math.ceil(len(text) / 4)
+
+    def compact(self, data, budget, goal="", question=""):
+        """Compact text rendering of data in at most `budget` tokens."""
+        lines = [line for line in flatten_findings(data) if line]
+        if not lines:
+            return ""
+        full = "\n".join(lines)
+        if self.count(full) <= budget:
+            return full
+
+        focus = {w for w in _WORD.findall(f"{goal} {question}".lower()) if w not in _STOPWORDS}
+        ranked = sorted(
+            range(len(lines)),
+            key=lambda i: (-(2 * len(focus & set(_WORD.findall(lines[i].lower()))) + bool(_DIGIT.search(lines[i]))), i)
+        )
+
+        kept, remaining = {}, budget
+        for i in ranked:
+            cost = self.count(lines[i]) + 1
+            if cost <= remaining:
+                kept[i] = lines[i]
+                remaining -= cost
+            elif remaining > 8 and not kept:
+                # Nothing fits yet: keep the head of the most relevant line
+                kept[i] = self._truncate(lines[i], remaining - 1)
+                remaining = 0
+            if remaining <= 1:
+                break
+        return "\n".join(kept[i] for i in sorted(kept))
+
+    def _truncate(self, text, tokens):
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text)[:tokens])
+        return text[:tokens * 4]
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model_name):
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model_name)
+    except Exception as e:
+        # e.g. offline without a cached encoding file; fall back to ~4 characters per token
+        logger.warning(f"⚠️ tiktoken encoding unavailable, estimating token counts: {type(e).__name__}")
+        return None
+
+
+def flatten_findings(data, prefix=""):
+    """One compact 'path: value' line per fact (dicts, lists and markdown reports alike)."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from flatten_findings(value, f"{prefix}{key}.")
+    elif isinstance(data, (list, tuple)):
+        if _is_scalar_list(data):
+            yield f"{prefix.rstrip('.')}: {', '.join(_scalar(v) for v in data)}"
+        else:
+            for position, value in enumerate(data):
+                yield from flatten_findings(value, f"{prefix.rstrip('.')}[{position}].")
+    elif isinstance(data, str) and not prefix:
+        # Markdown report: one fact per non-empty line
+        for line in data.splitlines():
+            line = _NOISE.sub("", line.strip()).strip()
+            if line:
+                yield line
+    else:
+        yield f"{prefix.rstrip('.')}: {_scalar(data)}" if prefix else _scalar(data)
+
+
+def _is_scalar_list(value):
+    return isinstance(value, (list, tuple)) and all(not isinstance(v, (dict, list, tuple)) for v in value)
+
+
+def _scalar(value):
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return str(value)
+        if value.is_integer():
+            return str(int(value))
+        if abs(value) >= 0.01:
+            # Fixed decimals: no exponent, no rounding of the integer part
+            return f"{value:.2f}".rstrip("0").rstrip(".")
+        # Small values (rates, p-values) keep two significant digits instead of becoming 0
+        return f"{value:.{1 - math.floor(math.log10(abs(value)))}f}"
+    return str(value)
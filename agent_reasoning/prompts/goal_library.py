@@ -12,7 +12,12 @@ GOAL_DEFINITIONS = {
             "identify_early_adopters", "map_competitive_landscape", 
             "define_mvp_scope", "estimate_willingness_to_pay",    
             "recommend_launch_channels", "stress_test_assumptions" 
-        ]
+        ],
+        "core_questions": {
+            "market_size": ["sample size", "market size", "tam", "respondents"],
+            "competition": ["competitor", "brands", "density"],
+            "pricing": ["wtp", "willingness", "price", "viable band"]
+        }
     },
     "GOAL_2_PERFORMANCE": {
         "name": "Product Performance Diagnosis",
@@ -22,7 +27,12 @@ GOAL_DEFINITIONS = {
         "tools_required": [
             "validate_north_star", "scan_kpi_health", "benchmark_against_industry",
             "map_funnel_dropoffs", "rank_bottlenecks"
-        ]
+        ],
+        "core_questions": {
+            "kpi_health": ["cac", "acquisition cost", "kpi", "time to value"],
+            "funnel_bottleneck": ["bottleneck", "funnel", "drop-off", "dropoff"],
+            "churn_drivers": ["churn", "top reasons"]
+        }
     },
     "GOAL_3_UX_JOURNEY": {
         "name": "UX & User Journey Research",
@@ -33,7 +43,12 @@ GOAL_DEFINITIONS = {
             "decompose_user_journey", "score_effort_and_friction", 
             "analyze_time_to_value", "audit_heuristic_violations", 
             "map_emotional_curve"
-        ]
+        ],
+        "core_questions": {
+            "effort": ["effort"],
+            "friction": ["friction"],
+            "time_to_value": ["time to value", "ttv"]
+        }
     },
     "GOAL_4_RETENTION": {
         "name": "Retention & Loyalty Analysis",
@@ -44,7 +59,12 @@ GOAL_DEFINITIONS = {
             "analyze_retention_decay", "identify_churn_triggers", 
             "score_habit_strength", "calculate_switching_costs",
             "evaluate_loyalty_program"
-        ]
+        ],
+        "core_questions": {
+            "retention_baseline": ["retention", "d30", "cohort"],
+            "habit_strength": ["habit", "frequency"],
+            "loyalty_levers": ["loyalty", "switching", "repeat"]
+        }
     },
     "GOAL_5_HYPOTHESIS": {
         "name": "Hypothesis Testing & Validation",
@@ -55,7 +75,11 @@ GOAL_DEFINITIONS = {
             "validate_hypothesis_structure", "score_assumption_fragility",
             "select_evidence_strategy", "design_test_blueprint",
             "interpret_test_results"
-        ]
+        ],
+        "core_questions": {
+            "hypothesis_structure": ["hypothes"],
+            "evidence_strength": ["evidence", "signal strength", "p_value", "significan"]
+        }
     },
     "GOAL_6_PRIORITIZATION": {
         "name": "Roadmap & Prioritization",
@@ -66,7 +90,11 @@ GOAL_DEFINITIONS = {
             "check_strategy_alignment", "estimate_impact_vs_effort",
             "rank_rice_score", "detect_strategy_drift",
             "simulate_roadmap_scenarios"
-        ]
+        ],
+        "core_questions": {
+            "top_priority": ["priority", "rank"],
+            "scoring": ["rice", "score", "impact"]
+        }
     },
     "GOAL_7_SYNTHESIS": {
         "name": "Executive Synthesis & Decision Briefing",
@@ -76,6 +104,11 @@ GOAL_DEFINITIONS = {
         "tools_required": [
             "distill_key_signals", "generate_executive_recommendation",
             "anticipate_objections", "format_decision_brief"
-        ]
+        ],
+        "core_questions": {
+            "bottom_line": ["dataset", "bottom line", "data points"],
+            "decision": ["recommendation", "decision"],
+            "confidence": ["confidence"]
+        }
     }
 }
\ No newline at end of file
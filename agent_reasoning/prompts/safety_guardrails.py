@@ -12,4 +12,29 @@ CHECKLIST:
 3. Is the tone hype-y? -> MAKE NEUTRAL.
 
 Return the REFINED response only.
-"""
\ No newline at end of file
+"""
+
+# Local pre-check for the prompt above: a draft matching none of these skips the LLM rewrite.
+# Checklist item 1: prescriptive language.
+PRESCRIPTIVE_PATTERNS = [
+    r"\byou (?:should|must|need to|have to|ought to)\b",
+    r"\b(?:i|we) (?:strongly )?(?:recommend|suggest|advise|urge)\b",
+    r"\b(?:i|we)'d (?:recommend|suggest|advise)\b",
+    r"\bmy (?:recommendation|advice)\b",
+    r"\bmake sure (?:to|you)\b",
+    r"\b(?:do not|don't) (?:miss|wait|hesitate)\b",
+]
+
+# Checklist item 3: hype-y tone.
+HYPE_PATTERNS = [
+    r"\bgame[- ]?chang(?:er|ing)\b",
+    r"\brevolutionar(?:y|ize)\b",
+    r"\bguarantee[ds]?\b",
+    r"\bskyrocket\w*\b",
+    r"\bmassive(?:ly)?\b",
+    r"\bhuge (?:opportunity|win|potential)\b",
+    r"\bmust[- ]have\b",
+    r"\bno[- ]brainer\b",
+    r"\bunprecedented\b",
+    r"!{2,}",
+]
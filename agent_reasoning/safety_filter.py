@@ -0,0 +1,54 @@
+import re
+import numpy as np
+
+from .prompts.safety_guardrails import PRESCRIPTIVE_PATTERNS, HYPE_PATTERNS
+
+_NUMBER = re.compile(r"(?<![\w.])\d[\d,]*(?:\.\d+)?")
+# A draft number matches a source number within 1%, or within the rounding of two decimals
+NUMBER_REL_TOLERANCE = 0.01
+NUMBER_ABS_TOLERANCE = 0.005
+
+
+class SafetyPreFilter:
+    """
+    Local, regex-only version of the SAFETY_CHECK_PROMPT checklist.
+    Flags prescriptive phrasing, hype, and numbers that do not appear in the source data
+    (a cheap proxy for invented figures). Drafts with no findings can skip the LLM rewrite.
+    """
+    def __init__(self, prescriptive_patterns=PRESCRIPTIVE_PATTERNS, hype_patterns=HYPE_PATTERNS):
+        self.prescriptive = re.compile("|".join(prescriptive_patterns), re.IGNORECASE)
+        self.hype = re.compile("|".join(hype_patterns), re.IGNORECASE)
+
+    def scan(self, draft, source_data=None):
+        """Returns a list of (check, matched text) findings; empty means the draft is clean."""
+        findings = [("prescriptive", m.group(0)) for m in self.prescriptive.finditer(draft)]
+        findings += [("hype", m.group(0)) for m in self.hype.finditer(draft)]
+
+        if source_data is not None:
+            known = _known_values(source_data)
+            for number in _NUMBER.findall(draft):
+                value = float(_plain_number(number))
+                # Small integers are list numbering and counts, not data points
+                if value > 10 and not _is_supported(value, known):
+                    findings.append(("unsupported_number", number))
+        return findings
+
+
+def _plain_number(text):
+    return text.replace(",", "").rstrip(".")
+
+
+def _known_values(source_data):
+    values = np.array([float(_plain_number(n)) for n in _NUMBER.findall(str(source_data))], dtype=float)
+    # Shares also appear as percentages in the drafts (0.4567 -> 45.67%)
+    return np.concatenate([values, values * 100])
+
+
+def _is_supported(value, known):
+    """
+    True when value is a source number as a draft may render it: the prompts show
+    findings compacted (499.0 -> 499, floats to 2 decimals) and the LLM rounds further.
+    """
+    if not len(known):
+        return False
+    return bool(np.any(np.abs(known - value) <= np.maximum(NUMBER_REL_TOLERANCE * np.abs(known), NUMBER_ABS_TOLERANCE)))
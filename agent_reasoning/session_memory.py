@@ -0,0 +1,74 @@
+import re
+from collections import deque
+
+from .prompt_compactor import PromptCompactor, LAYER_TOKEN_BUDGETS, flatten_findings
+
+_DIGIT = re.compile(r"\d")
+
+
+class SessionMemory:
+    """
+    Bounded conversation memory for one session.
+
+    The last `max_turns` exchanges are kept verbatim (each message capped at
+    `max_message_chars`). Older exchanges are folded into a rolling structured
+    summary: goals, files, the questions asked and the facts (answer lines with
+    numbers) seen so far, each list capped at `max_summary_items` with the newest
+    kept. Memory per session and the prompt built from it therefore stay flat
+    however long the conversation runs.
+    """
+    def __init__(self, max_turns=4, max_summary_items=8, max_message_chars=2000, model_name="gpt-4-turbo"):
+        self.max_turns = max_turns
+        self.max_summary_items = max_summary_items
+        self.max_message_chars = max_message_chars
+        self.turns = deque()
+        self.summary = {"turns_folded": 0, "goals": [], "files": [], "questions": [], "facts": []}
+        self.compactor = PromptCompactor(model_name)
+
+    def add_turn(self, user, assistant, goal=None, file_name=None):
+        self.turns.append({
+            "user": str(user)[:self.max_message_chars],
+            "assistant": str(assistant)[:self.max_message_chars],
+            "goal": goal,
+            "file": file_name
+        })
+        while len(self.turns) > self.max_turns:
+            self._fold(self.turns.popleft())
+
+    def render(self, question="", goal="", budget=None):
+        """The memory as prompt text, compacted to `budget` tokens around the current question."""
+        if not self.turns and not self.summary["turns_folded"]:
+            return ""
+        data = {"recent": [{"user": turn["user"], "assistant": turn["assistant"]} for turn in self.turns]}
+        if self.summary["turns_folded"]:
+            data = {"earlier": {k: v for k, v in self.summary.items() if v}, **data}
+        return self.compactor.compact(data, budget or LAYER_TOKEN_BUDGETS["memory"], goal, question)
+
+    def clear(self):
+        self.turns.clear()
+        self.summary = {"turns_folded": 0, "goals": [], "files": [], "questions": [], "facts": []}
+
+    def stats(self):
+        return {
+            "verbatim_turns": len(self.turns),
+            "turns_folded": self.summary["turns_folded"],
+            "chars": sum(len(t["user"]) + len(t["assistant"]) for t in self.turns) + len(str(self.summary))
+        }
+
+    def _fold(self, turn):
+        self.summary["turns_folded"] += 1
+        if turn["goal"]:
+            self._remember("goals", turn["goal"])
+        if turn["file"]:
+            self._remember("files", turn["file"])
+        self._remember("questions", turn["user"][:200])
+        for line in flatten_findings(turn["assistant"]):
+            if _DIGIT.search(line):
+                self._remember("facts", line[:200])
+
+    def _remember(self, field, value):
+        items = self.summary[field]
+        if value in items:
+            items.remove(value)
+        items.append(value)
+        del items[:-self.max_summary_items]
@@ -1,17 +1,50 @@
+import os
+import threading
+from collections import OrderedDict
+
 from data_intelligence.quant_engine import QuantInsightEngine
+from data_intelligence.fingerprints import dataset_fingerprint
+from data_intelligence.canonical_system import CanonicalDataSystem
+
+# Process-wide memo of analysis reports, shared by every session:
+# (dataset fingerprint, goal route) -> report
+_REPORT_MEMO = OrderedDict()
+_REPORT_MEMO_LOCK = threading.Lock()
+REPORT_MEMO_SIZE = 128
+
+# Goal routes in matching order: (keywords, QuantInsightEngine method)
+GOAL_ROUTES = [
+    (("launch", "1"), "run_goal_1_analysis"),
+    (("diagnose", "performance", "2"), "run_goal_2_analysis"),
+    (("ux", "journey", "3"), "run_goal_3_analysis"),
+    (("retention", "loyalty", "4"), "run_goal_4_analysis"),
+    (("hypothesis", "test", "5"), "run_goal_5_analysis"),
+    (("roadmap", "priorit", "6"), "run_goal_6_analysis"),
+    (("executive", "summary", "7"), "run_goal_7_analysis"),
+]
 
 class ResearchTools:
     """
     The Toolkit Manager that bridges the Agent Brain (Person 1) 
     with the Intelligence Engines (Person 2).
     """
-    def __init__(self):
+    def __init__(self, report_store=None):
         # Initialize the Quantitative Engine (Person 2)
         self.quant_engine = QuantInsightEngine()
+        # Optional mapping shared beyond this process (e.g. a multiprocessing Manager dict
+        # in batch runs), consulted after the process memo
+        self.report_store = report_store
+        # Per-session memo of reports, and file stat -> fingerprint so unchanged files are not re-read
+        self._reports = {}
+        self._fingerprints = {}
+        self._profiles = {}
+        self.memo_stats = {"session_hits": 0, "process_hits": 0, "store_hits": 0, "misses": 0}
 
     def analyze_dataset(self, file_path, goal_type="launch"):
         """
         Directly triggers Person 2 to analyze a file based on the goal.
+        Reports are memoized per dataset fingerprint and goal, so follow-up questions on
+        the same file and goal reuse the report. Editing the file changes its fingerprint.
         
         Args:
             file_path (str): Path to the CSV/Excel file.
@@ -20,46 +53,112 @@ class ResearchTools:
         Returns:
             str: A formatted markdown report from Person 2.
         """
-        # 1. Load Data
-        df = self.quant_engine.load_data(file_path)
-        
-        if df is None:
+        # We normalize the string to handle "1. Launch..." or "Launch"
+        goal_key = str(goal_type).lower()
+        route = self._route_goal(goal_key)
+        if route is None:
+            return f"⚠️ Tool not configured for goal: '{goal_type}' yet."
+
+        df, fingerprint = self._load_with_fingerprint(file_path)
+        if fingerprint is None:
             return "❌ Error: Could not load data. Please ensure the file exists and is a CSV."
 
+        key = (fingerprint, route)
+        if key in self._reports:
+            self.memo_stats["session_hits"] += 1
+            return self._reports[key]
+        with _REPORT_MEMO_LOCK:
+            if key in _REPORT_MEMO:
+                _REPORT_MEMO.move_to_end(key)
+                self.memo_stats["process_hits"] += 1
+                self._reports[key] = _REPORT_MEMO[key]
+                return self._reports[key]
+        if self.report_store is not None and key in self.report_store:
+            self.memo_stats["store_hits"] += 1
+            report = self.report_store[key]
+            self._remember_report(key, report)
+            return report
+
+        # 1. Load Data (skipped above when the file's fingerprint was already known)
+        if df is None:
+            df = self.quant_engine.load_data(file_path)
+            if df is None:
+                return "❌ Error: Could not load data. Please ensure the file exists and is a CSV."
+
         # 2. Route to correct Goal Function
-        # We normalize the string to handle "1. Launch..." or "Launch"
-        goal_key = str(goal_type).lower()
         print(f"📊 Tools: Routing Goal '{goal_key}' on {len(df)} rows...")
-        
-        # --- GOAL 1: LAUNCH ---
-        if "launch" in goal_key or "1" in goal_key:
-            return self.quant_engine.run_goal_1_analysis(df)
-        
-        # --- GOAL 2: PERFORMANCE ---
-        elif "diagnose" in goal_key or "performance" in goal_key or "2" in goal_key:
-            return self.quant_engine.run_goal_2_analysis(df)
+        self.memo_stats["misses"] += 1
+        report = getattr(self.quant_engine, route)(df)
+
+        self._remember_report(key, report)
+        if self.report_store is not None:
+            self.report_store[key] = report
+        return report
 
-        # --- GOAL 3: UX & JOURNEY ---
-        elif "ux" in goal_key or "journey" in goal_key or "3" in goal_key:
-            return self.quant_engine.run_goal_3_analysis(df)
+    def _remember_report(self, key, report):
+        self._reports[key] = report
+        with _REPORT_MEMO_LOCK:
+            _REPORT_MEMO[key] = report
+            while len(_REPORT_MEMO) > REPORT_MEMO_SIZE:
+                _REPORT_MEMO.popitem(last=False)
 
-        # --- GOAL 4: RETENTION ---
-        elif "retention" in goal_key or "loyalty" in goal_key or "4" in goal_key:
-            return self.quant_engine.run_goal_4_analysis(df)
+    def profile_dataset(self, file_path):
+        """
+        Shape, column roles, missing values and numeric ranges of a dataset,
+        memoized per fingerprint. None if the file cannot be loaded.
+        """
+        df, fingerprint = self._load_with_fingerprint(file_path)
+        if fingerprint is None:
+            return None
+        if fingerprint in self._profiles:
+            return self._profiles[fingerprint]
+        if df is None:
+            df = self.quant_engine.load_data(file_path)
+            if df is None:
+                return None
 
-        # --- GOAL 5: HYPOTHESIS ---
-        elif "hypothesis" in goal_key or "test" in goal_key or "5" in goal_key:
-            return self.quant_engine.run_goal_5_analysis(df)
+        numeric = df.select_dtypes(include="number")
+        missing = df.isna().mean()
+        profile = {
+            "rows": len(df),
+            "columns": len(df.columns),
+            "numeric_columns": {
+                column: {"min": round(float(numeric[column].min()), 3), "mean": round(float(numeric[column].mean()), 3), "max": round(float(numeric[column].max()), 3)}
+                for column in numeric.columns
+            },
+            "text_columns": CanonicalDataSystem.detect_text_columns(df),
+            "segment_columns": [c for c in CanonicalDataSystem.detect_metadata_columns(df) if c not in numeric.columns],
+            "missing_share": {column: round(float(share), 3) for column, share in missing.items() if share > 0},
+        }
+        self._profiles[fingerprint] = profile
+        return profile
 
-        # --- GOAL 6: ROADMAP ---
-        elif "roadmap" in goal_key or "priorit" in goal_key or "6" in goal_key:
-            return self.quant_engine.run_goal_6_analysis(df)
+    @staticmethod
+    def _route_goal(goal_key):
+        for keywords, method in GOAL_ROUTES:
+            if any(keyword in goal_key for keyword in keywords):
+                return method
+        return None
 
-        # --- GOAL 7: EXECUTIVE SUMMARY ---
-        elif "executive" in goal_key or "summary" in goal_key or "7" in goal_key:
-            return self.quant_engine.run_goal_7_analysis(df)
+    def _load_with_fingerprint(self, file_path):
+        """
+        (df or None, fingerprint). Paths whose size and mtime are unchanged reuse the known
+        fingerprint without reading the file (df is then None).
+        """
+        stat_key = None
+        if isinstance(file_path, str) and os.path.exists(file_path):
+            stat = os.stat(file_path)
+            stat_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+            if stat_key in self._fingerprints:
+                return None, self._fingerprints[stat_key]
 
-        return f"⚠️ Tool not configured for goal: '{goal_type}' yet."
+        df = self.quant_engine.load_data(file_path)
+        if df is None:
+            return None, None
+        fingerprint = dataset_fingerprint(df)
+        if stat_key is not None:
+            self._fingerprints[stat_key] = fingerprint
+        return df, fingerprint
 
 # Legacy support if you still have code calling get_tools_for_goal
 def get_tools_for_goal(goal_name: str):
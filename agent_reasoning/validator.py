@@ -1,13 +1,32 @@
 import logging
-from langchain_openai import ChatOpenAI
+import re
+from collections import OrderedDict
 # UPDATED IMPORTS for modern LangChain compatibility
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
+from .llm_cache import CachedChatModel
+from .llm_pool import get_chat_model
+from .prompt_compactor import PromptCompactor, LAYER_TOKEN_BUDGETS, flatten_findings
+from .prompts.goal_library import GOAL_DEFINITIONS
+
 # Setup Logger
 logger = logging.getLogger("ClarityValidator")
 
+# Findings lines that surface a risk or trade-off
+RISK_TERMS = ("risk", "churn", "bottleneck", "friction", "threat", "trade-off", "tradeoff", "fragil", "warning", "constraint", "objection", "caveat")
+# Values that mean "not answered"
+PLACEHOLDERS = ("n/a", "unknown", "none detected", "insufficient", "not available", "tbd")
+# Findings that changed less than this between iterations count as diminishing returns
+DIMINISHING_CHANGE = 0.2
+# (session, goal) findings remembered for the diminishing-returns signal
+PREVIOUS_FINDINGS_SIZE = 256
+
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:[.,]\d+)*")
+_ENUMERATION = re.compile(r"^\d+[.)]\s+")
+_SECTION = re.compile(r"^\s*(#+\s|\*\*\s*\d+\.|\d+\.\s)", re.MULTILINE)
+
 class ClarityAssessment(BaseModel):
     question_coverage: bool = Field(description="Are the core questions of the goal answered?")
     risk_visibility: bool = Field(description="Are key risks and trade-offs explicitly surfaced?")
@@ -16,17 +35,197 @@ class ClarityAssessment(BaseModel):
     missing_info_type: str = Field(description="One of: 'None', 'Type A' (Priority), 'Type B' (Summary), 'Type C' (Data Gap)")
     reasoning: str = Field(description="Brief explanation of the assessment.")
 
+class ClarityPreScorer:
+    """
+    Deterministic version of the 4-Signal Clarity Check, computed from the findings:
+
+    - question_coverage: share of the goal's core questions with a numeric answer
+    - risk_visibility: 1.0 if a risk / trade-off field is filled in
+    - structural_understanding: 1.0 once the findings have two or more sections
+    - diminishing_returns: how little the findings changed since the previous check
+      of the same goal in the same session (first check: 1.0 only if every core
+      question is answered)
+
+    verdict() is "clear" or "not_clear" when the signals are decisive, and
+    "borderline" when the LLM judge should decide.
+    """
+    def __init__(self, goal_definitions=GOAL_DEFINITIONS):
+        self.goal_definitions = goal_definitions
+        self._previous = OrderedDict()
+
+    def score(self, goal, findings, session_id=None):
+        goal_key = self.resolve_goal(goal)
+        lines = [_ENUMERATION.sub("", line) for line in flatten_findings(findings) if line]
+        questions = self.goal_definitions.get(goal_key, {}).get("core_questions", {})
+
+        answered = [q for q, aliases in questions.items() if any(self._numeric_answer(line, aliases) for line in lines)]
+        coverage = len(answered) / len(questions) if questions else 0.0
+        risk = 1.0 if any(self._filled(line) for line in lines if any(term in line.lower() for term in RISK_TERMS)) else 0.0
+        structure = min(1.0, self._sections(findings) / 2)
+
+        current = set(lines)
+        key = (session_id, goal_key)
+        previous = self._previous.pop(key, None)
+        if previous is None:
+            diminishing = 1.0 if coverage == 1.0 else 0.0
+        else:
+            change = 1 - len(previous & current) / max(len(previous | current), 1)
+            diminishing = round(1 - change, 3)
+        self._previous[key] = current
+        while len(self._previous) > PREVIOUS_FINDINGS_SIZE:
+            self._previous.popitem(last=False)
+
+        return {
+            "question_coverage": round(coverage, 3),
+            "risk_visibility": risk,
+            "structural_understanding": structure,
+            "diminishing_returns": diminishing,
+            "unanswered": [q for q in questions if q not in answered]
+        }
+
+    @staticmethod
+    def verdict(signals):
+        if (signals["question_coverage"] == 1.0 and signals["risk_visibility"] == 1.0
+                and signals["structural_understanding"] == 1.0 and signals["diminishing_returns"] >= 1 - DIMINISHING_CHANGE):
+            return "clear"
+        if signals["question_coverage"] < 0.5 or (signals["risk_visibility"] == 0.0 and signals["question_coverage"] < 1.0):
+            return "not_clear"
+        return "borderline"
+
+    def resolve_goal(self, goal):
+        """GOAL_DEFINITIONS key for a key or a UI label such as '1. Launch New Product'."""
+        goal = str(goal or "")
+        if goal in self.goal_definitions:
+            return goal
+        number = re.match(r"\s*(\d+)", goal)
+        for key in self.goal_definitions:
+            if number and key.startswith(f"GOAL_{number.group(1)}_"):
+                return key
+        for key, definition in self.goal_definitions.items():
+            if any(keyword in goal.lower() for keyword in definition["keywords"]):
+                return key
+        return None
+
+    @staticmethod
+    def _numeric_answer(line, aliases):
+        lowered = line.lower()
+        if ":" not in lowered or not any(alias in lowered for alias in aliases):
+            return False
+        value = lowered.split(":", 1)[1]
+        if any(placeholder in value for placeholder in PLACEHOLDERS):
+            return False
+        # A parsed 0 is an answer (e.g. 'Churn rate: 0%'); only unparseable strings are not
+        return any(number is not None for number in map(_parse_number, _NUMBER.findall(value)))
+
+    @staticmethod
+    def _filled(line):
+        if ":" not in line:
+            return False
+        value = line.split(":", 1)[1].strip().lower()
+        return bool(value) and not any(placeholder in value for placeholder in PLACEHOLDERS)
+
+    @staticmethod
+    def _sections(findings):
+        if isinstance(findings, dict):
+            return sum(1 for value in findings.values() if value not in (None, "", [], {}))
+        if isinstance(findings, str):
+            return len(_SECTION.findall(findings))
+        return 0
+
+
+def _parse_number(text):
+    """Float value of a matched number, or None for things like versions, IPs and dates ('1.2.3')."""
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
 class ClarityValidator:
     def __init__(self, model_name="gpt-4-turbo"):
-        self.llm = ChatOpenAI(model=model_name, temperature=0)
+        self.llm = CachedChatModel(get_chat_model(model_name, temperature=0))
         self.parser = PydanticOutputParser(pydantic_object=ClarityAssessment)
+        self.compactor = PromptCompactor(model_name)
+        # Decisive pre-scores skip the LLM judge
+        self.pre_scorer = ClarityPreScorer()
+        self.judge_stats = {"local": 0, "llm": 0}
 
-    def check_clarity(self, goal: str, findings: dict, user_input: str) -> dict:
+    def check_clarity(self, goal: str, findings: dict, user_input: str, session_id=None) -> dict:
         """
         Runs the 4-Signal Clarity Check.
+        The local pre-scorer decides clear-cut cases; the LLM judge only sees borderline ones.
+        session_id keeps each session's findings history apart for the diminishing-returns signal.
         """
         logger.info(f"🔍 Validating Clarity for {goal}...")
+        verdict, signals = self._pre_score(goal, findings, session_id)
+        if verdict != "borderline":
+            return self._local_result(verdict, signals)
 
+        self.judge_stats["llm"] += 1
+        try:
+            # Invoke properly with messages
+            output = self.llm.invoke(self._clarity_messages(goal, findings, user_input))
+            return self._assess(output.content)
+        except Exception as e:
+            logger.error(f"Validation failed: {e}")
+            # Fall back to the local signals rather than a blanket "Validation Error"
+            return self._local_result(verdict, signals)
+
+    async def acheck_clarity(self, goal: str, findings: dict, user_input: str, session_id=None) -> dict:
+        """Async form of check_clarity, so it can run while the answer is being drafted."""
+        logger.info(f"🔍 Validating Clarity for {goal}...")
+        verdict, signals = self._pre_score(goal, findings, session_id)
+        if verdict != "borderline":
+            return self._local_result(verdict, signals)
+
+        self.judge_stats["llm"] += 1
+        try:
+            output = await self.llm.ainvoke(self._clarity_messages(goal, findings, user_input))
+            return self._assess(output.content)
+        except Exception as e:
+            logger.error(f"Validation failed: {e}")
+            return self._local_result(verdict, signals)
+
+    def _pre_score(self, goal, findings, session_id):
+        """(verdict, signals); unusual findings the scorer cannot read go to the LLM judge."""
+        try:
+            signals = self.pre_scorer.score(goal, findings, session_id)
+            return self.pre_scorer.verdict(signals), signals
+        except Exception as e:
+            logger.warning(f"⚠️ Clarity pre-score failed, deferring to the LLM judge: {e}")
+            return "borderline", None
+
+    def _local_result(self, verdict, signals):
+        """Result dict from the pre-scorer's signals (same shape as _assess)."""
+        if signals is None:
+            # Neither the pre-scorer nor the LLM judge produced an assessment
+            return {"is_clear": False, "escalation_needed": False, "reason": "Validation Error"}
+        if verdict != "borderline":
+            self.judge_stats["local"] += 1
+        is_clear = verdict == "clear"
+        escalation_type = None
+        if not is_clear and signals["question_coverage"] >= 0.5 and signals["structural_understanding"] < 1.0:
+            # The answers are there but not organized: a summary pass helps (Type B)
+            escalation_type = "summary"
+        # Otherwise it is a data gap (Type C), which does not escalate
+
+        if is_clear:
+            reason = "All core questions answered with numbers, risks surfaced, findings stable."
+        else:
+            gaps = [name.replace("_", " ") for name, value in signals.items() if name != "unanswered" and value < 1.0]
+            reason = f"Local pre-score: weak on {', '.join(gaps) or 'no signal'}"
+            if signals["unanswered"]:
+                reason += f"; unanswered: {', '.join(signals['unanswered'])}"
+        logger.info(f"🔍 Clarity pre-score ({verdict}): {signals}")
+        return {
+            "is_clear": is_clear,
+            "escalation_needed": escalation_type is not None,
+            "escalation_type": escalation_type,
+            "reason": reason,
+            "signals": signals
+        }
+
+    def _clarity_messages(self, goal, findings, user_input):
         template = """
         You are the Quality Assurance Judge. Determine if the user has "Sufficient Clarity".
         
@@ -45,46 +244,40 @@ class ClarityValidator:
         """
 
         prompt = ChatPromptTemplate.from_template(template)
-        
-        try:
-            _input = prompt.format_prompt(
-                goal=goal,
-                user_input=user_input,
-                findings=str(findings)[:2000],
-                format_instructions=self.parser.get_format_instructions()
-            )
-            # Invoke properly with messages
-            output = self.llm.invoke(_input.to_messages())
-            assessment = self.parser.parse(output.content)
-
-            # STRICT CLARITY LOGIC
-            is_clear = all([
-                assessment.question_coverage,
-                assessment.risk_visibility,
-                assessment.structural_understanding,
-                assessment.diminishing_returns
-            ])
-
-            escalation_needed = False
-            escalation_type = None
-
-            if not is_clear:
-                if assessment.missing_info_type == "Type A":
-                    escalation_needed = True
-                    escalation_type = "prioritization"
-                elif assessment.missing_info_type == "Type B":
-                    escalation_needed = True
-                    escalation_type = "summary"
-                # Type C (Data Gap) does not escalate; it stops naturally.
-
-            return {
-                "is_clear": is_clear,
-                "escalation_needed": escalation_needed,
-                "escalation_type": escalation_type,
-                "reason": assessment.reasoning
-            }
+        _input = prompt.format_prompt(
+            goal=goal,
+            user_input=user_input,
+            findings=self.compactor.compact(findings, LAYER_TOKEN_BUDGETS["clarity"], goal, user_input),
+            format_instructions=self.parser.get_format_instructions()
+        )
+        return _input.to_messages()
 
-        except Exception as e:
-            logger.error(f"Validation failed: {e}")
-            # Fallback to "Not Clear" but safe if LLM fails
-            return {"is_clear": False, "escalation_needed": False, "reason": "Validation Error"}
\ No newline at end of file
+    def _assess(self, content):
+        assessment = self.parser.parse(content)
+
+        # STRICT CLARITY LOGIC
+        is_clear = all([
+            assessment.question_coverage,
+            assessment.risk_visibility,
+            assessment.structural_understanding,
+            assessment.diminishing_returns
+        ])
+
+        escalation_needed = False
+        escalation_type = None
+
+        if not is_clear:
+            if assessment.missing_info_type == "Type A":
+                escalation_needed = True
+                escalation_type = "prioritization"
+            elif assessment.missing_info_type == "Type B":
+                escalation_needed = True
+                escalation_type = "summary"
+            # Type C (Data Gap) does not escalate; it stops naturally.
+
+        return {
+            "is_clear": is_clear,
+            "escalation_needed": escalation_needed,
+            "escalation_type": escalation_type,
+            "reason": assessment.reasoning
+        }
@@ -0,0 +1,197 @@
+# batch_analyze.py
+# Headless batch runs of the quant engine: every dataset x every goal, across a process pool.
+# Usage: python batch_analyze.py data/surveys/ "exports/*.csv" --goals 1,4,7 --workers 8 --output reports.jsonl
+# One JSON line per file: status, per-goal reports and timings, and the error if the file failed.
+import sys
+import os
+import glob
+import json
+import time
+import argparse
+import traceback
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agent_reasoning.tools import ResearchTools, GOAL_ROUTES
+
+# --goals accepts numbers (1-7) or route keywords (launch, retention, ...)
+GOAL_NAMES = {str(i): keywords[0] for i, (keywords, _) in enumerate(GOAL_ROUTES, start=1)}
+
+_tools = None
+
+
+def _init_worker(report_store):
+    """One ResearchTools per worker process: its memo and fingerprint cache live for the whole run."""
+    global _tools
+    _tools = ResearchTools(report_store=report_store)
+
+
+def analyze_file(path, goals):
+    """All goals for one file. Never raises: failures are recorded in the returned record."""
+    record = {"file": path, "status": "ok", "reports": {}, "goal_seconds": {}, "errors": {}}
+    start = time.perf_counter()
+    problem = dataset_problem(path)
+    if problem:
+        record["errors"]["*"] = problem
+        goals = []
+    for goal in goals:
+        goal_start = time.perf_counter()
+        try:
+            report = _tools.analyze_dataset(path, goal)
+            if report.startswith(("❌", "⚠️")):
+                record["errors"][goal] = report
+            else:
+                record["reports"][goal] = report
+        except Exception as e:
+            record["errors"][goal] = f"{type(e).__name__}: {e}"
+            record["traceback"] = traceback.format_exc(limit=5)
+        record["goal_seconds"][goal] = round(time.perf_counter() - goal_start, 4)
+    if record["errors"]:
+        record["status"] = "partial" if record["reports"] else "error"
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    record["worker_pid"] = os.getpid()
+    record["worker_memo_stats"] = dict(_tools.memo_stats)  # cumulative for this worker process
+    return record
+
+
+def dataset_problem(path):
+    """Why a readable file cannot give meaningful reports (no data rows, no header row), or None."""
+    try:
+        profile = _tools.profile_dataset(path)
+        if profile is None:
+            # Unreadable files are reported by analyze_dataset, per goal
+            return None
+        if profile["rows"] == 0:
+            return "⚠️ Dataset has no data rows."
+        header = pd.read_csv(path, nrows=0).columns
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    if all(_is_value_like(column) for column in header):
+        return "⚠️ Dataset has no header row (its first row holds values, not column names)."
+    return None
+
+
+def _is_value_like(column):
+    # Numbers or pandas' placeholders for blank header cells
+    name = str(column)
+    if name.startswith("Unnamed: "):
+        return True
+    try:
+        float(name)
+        return True
+    except ValueError:
+        return False
+
+
+def collect_files(inputs, pattern="*.csv"):
+    """Directories (searched recursively for `pattern`), globs and plain paths, de-duplicated in order."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(glob.glob(os.path.join(item, "**", pattern), recursive=True))
+        else:
+            matches = sorted(glob.glob(item)) or [item]
+        for path in matches:
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def parse_goals(value):
+    goals = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        goal = GOAL_NAMES.get(part, part)
+        if ResearchTools._route_goal(goal) is None:
+            raise argparse.ArgumentTypeError(f"unknown goal '{part}'")
+        goals.append(goal)
+    return goals
+
+
+def run_pool(paths, goals, workers, report_store, emit):
+    """
+    Analyzes paths on a fresh process pool, passing each record to emit.
+    Returns the paths left unfinished because the pool broke (a worker process died).
+    """
+    lost = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(report_store,)) as executor:
+        futures = {}
+        for position, path in enumerate(paths):
+            try:
+                futures[executor.submit(analyze_file, path, goals)] = path
+            except BrokenProcessPool:
+                lost.extend(paths[position:])
+                break
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except BrokenProcessPool:
+                lost.append(futures[future])
+                continue
+            except Exception as e:
+                record = {"file": futures[future], "status": "error", "errors": {"*": f"{type(e).__name__}: {e}"}}
+            emit(record)
+    return lost
+
+
+def run(args):
+    files = collect_files(args.inputs, args.pattern)
+    if not files:
+        print("❌ No datasets found.")
+        return 1
+
+    print(f"📂 {len(files)} dataset(s) x {len(args.goals)} goal(s) on {args.workers} worker(s) -> {args.output}")
+    start = time.perf_counter()
+    counts = {"ok": 0, "partial": 0, "error": 0}
+    seconds = []
+
+    with multiprocessing.Manager() as manager, open(args.output, "w", encoding="utf-8") as out:
+        # Reports shared across workers: identical files (same fingerprint) are analyzed once
+        report_store = manager.dict()
+
+        def emit(record):
+            counts[record["status"]] += 1
+            seconds.append(record.get("seconds", 0.0))
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            if args.verbose or record["status"] != "ok":
+                print(f"{'✅' if record['status'] == 'ok' else '⚠️'} {record['file']} ({record['status']}, {record.get('seconds', '-')} s)")
+
+        # A dying worker (e.g. out of memory) breaks the whole pool: every unfinished file is
+        # re-run on a fresh pool. The last retry runs each file in a pool of its own, so only
+        # the file that kills its worker is reported as failed.
+        pending, attempt = files, 0
+        while pending:
+            if attempt and attempt == args.retries:
+                lost = [path for single in pending for path in run_pool([single], args.goals, 1, report_store, emit)]
+            else:
+                lost = run_pool(pending, args.goals, args.workers, report_store, emit)
+            if lost and attempt >= args.retries:
+                for path in lost:
+                    emit({"file": path, "status": "error", "errors": {"*": "BrokenProcessPool: the worker process died while analyzing this file"}})
+                break
+            if lost:
+                print(f"♻️ A worker died; re-running {len(lost)} unfinished file(s) on a fresh pool")
+            pending, attempt = lost, attempt + 1
+
+    elapsed = time.perf_counter() - start
+    print(f"\n🏁 Done in {elapsed:.2f} s: {counts['ok']} ok, {counts['partial']} partial, {counts['error']} failed")
+    print(f"⏱️ Per file p50 {np.median(seconds):.3f} s, p95 {np.percentile(seconds, 95):.3f} s, {len(files) / elapsed:.1f} files/s")
+    return 0 if counts["error"] == 0 else 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the quant engine over many datasets and goals.")
+    parser.add_argument("inputs", nargs="+", help="Dataset files, directories or glob patterns")
+    parser.add_argument("--goals", type=parse_goals, default=list(GOAL_NAMES.values()), help="Comma-separated goals, e.g. 1,4,7 or launch,retention (default: all 7)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--output", default="batch_reports.jsonl")
+    parser.add_argument("--pattern", default="*.csv", help="File pattern when an input is a directory")
+    parser.add_argument("--retries", type=int, default=2, help="Re-runs of unfinished files after a worker process dies (the last one isolates each file)")
+    parser.add_argument("--verbose", action="store_true", help="Also print files that succeeded")
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,86 @@
+# benchmark_intent_router.py
+# Accuracy and latency of the local intent router vs. the LLM goal mapper on a labelled sample.
+# Usage: python benchmark_intent_router.py [--llm]   (--llm also runs the GPT path; needs OPENAI_API_KEY)
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agent_reasoning.intent_router import IntentRouter
+
+LABELLED_SAMPLE = [
+    ("Should we launch an anti-hairfall serum in tier 2 cities?", "GOAL_1_LAUNCH"),
+    ("Is there real demand for a herbal shampoo priced at 499?", "GOAL_1_LAUNCH"),
+    ("We have an idea for a new product for men with thinning hair", "GOAL_1_LAUNCH"),
+    ("How big is the market for scalp care and who are the competitors?", "GOAL_1_LAUNCH"),
+    ("Why is our conversion rate down this month?", "GOAL_2_PERFORMANCE"),
+    ("Sales dropped 20% after the price change, what happened?", "GOAL_2_PERFORMANCE"),
+    ("Give me a health check of our KPIs against industry benchmarks", "GOAL_2_PERFORMANCE"),
+    ("CAC went up and ROAS fell, diagnose it", "GOAL_2_PERFORMANCE"),
+    ("Users say the onboarding is confusing", "GOAL_3_UX_JOURNEY"),
+    ("Where do people get stuck in the checkout flow?", "GOAL_3_UX_JOURNEY"),
+    ("Map the friction points in the first-time user experience", "GOAL_3_UX_JOURNEY"),
+    ("How long until a new user sees value in the app?", "GOAL_3_UX_JOURNEY"),
+    ("Why are customers leaving after the first month?", "GOAL_4_RETENTION"),
+    ("Analyze churn by cohort", "GOAL_4_RETENTION"),
+    ("What drives repeat purchases of our shampoo?", "GOAL_4_RETENTION"),
+    ("Is the loyalty program worth what it costs?", "GOAL_4_RETENTION"),
+    ("I think free samples will increase trial. Can we test that?", "GOAL_5_HYPOTHESIS"),
+    ("Validate the assumption that women 25-34 care most about ingredients", "GOAL_5_HYPOTHESIS"),
+    ("Design an experiment for the new pricing page", "GOAL_5_HYPOTHESIS"),
+    ("If we cut the price to 399, will volume double?", "GOAL_5_HYPOTHESIS"),
+    ("Help me prioritize the Q3 roadmap", "GOAL_6_PRIORITIZATION"),
+    ("Rank these five initiatives by impact and effort", "GOAL_6_PRIORITIZATION"),
+    ("What should the team build first from this backlog?", "GOAL_6_PRIORITIZATION"),
+    ("Compare the trade-off between the subscription feature and the referral program", "GOAL_6_PRIORITIZATION"),
+    ("Prepare an executive summary for the board", "GOAL_7_SYNTHESIS"),
+    ("Turn these findings into a one-page brief for the CEO", "GOAL_7_SYNTHESIS"),
+    ("Make a deck with the key signals from the survey", "GOAL_7_SYNTHESIS"),
+    ("Summarize everything we learned into a decision report", "GOAL_7_SYNTHESIS"),
+]
+
+
+def evaluate(name, detect):
+    """detect(text) -> list of goal keys. Top-1 accuracy and per-call latency."""
+    correct, latencies, answered = 0, [], 0
+    for text, label in LABELLED_SAMPLE:
+        start = time.perf_counter()
+        goals = detect(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        answered += bool(goals)
+        correct += bool(goals) and goals[0] == label
+    n = len(LABELLED_SAMPLE)
+    print(f"{name:<22}{correct / n:>10.3f}{answered / n:>10.3f}{np.median(latencies):>12.3f}{np.percentile(latencies, 95):>12.3f}")
+
+
+def run(with_llm):
+    router = IntentRouter()
+    router.route("warm up")
+
+    print(f"{'path':<22}{'accuracy':>10}{'answered':>10}{'p50 ms':>12}{'p95 ms':>12}")
+    print("-" * 66)
+    evaluate("router (all)", lambda text: router.route(text)["goals"])
+    evaluate("router (confident)", lambda text: router.route(text)["goals"] if router.is_confident(router.route(text)) else [])
+
+    confident = sum(router.is_confident(router.route(text)) for text, _ in LABELLED_SAMPLE)
+    print(f"\nLLM calls avoided: {confident}/{len(LABELLED_SAMPLE)}")
+
+    if with_llm:
+        from agent_reasoning.brain import AgentBrain
+        brain = AgentBrain()
+        brain.llm.cache.enabled = False
+        llm_only = IntentRouter(min_confidence=2.0)  # never confident -> always the LLM mapper
+        brain.intent_router = llm_only
+        evaluate("llm", brain._detect_goals)
+        brain.intent_router = router
+        evaluate("router + llm fallback", brain._detect_goals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--llm", action="store_true")
+    args = parser.parse_args()
+    run(args.llm)
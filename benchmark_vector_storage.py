@@ -0,0 +1,73 @@
+# benchmark_vector_storage.py
+# Recall, memory and latency of compact vector storage vs. exact float32 search.
+# Usage: python benchmark_vector_storage.py [num_vectors] [dim]
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_intelligence.quantized_index import QuantizedVectorIndex
+
+NUM_QUERIES = 200
+TOP_K = 10
+
+
+def make_corpus(num_vectors, dim, seed=42):
+    """Clustered synthetic embeddings, roughly shaped like sentence-embedding output."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), num_vectors)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(num_vectors, dim)).astype(np.float32)
+    queries = centers[rng.integers(0, len(centers), NUM_QUERIES)] + 0.6 * rng.normal(size=(NUM_QUERIES, dim)).astype(np.float32)
+    return vectors, queries
+
+
+def exact_top_k(vectors, queries):
+    v = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = q @ v.T
+    return np.argsort(-scores, axis=1)[:, :TOP_K]
+
+
+def run_benchmark(num_vectors=100_000, dim=384):
+    print(f"📦 Corpus: {num_vectors:,} vectors x {dim} dims, {NUM_QUERIES} queries, recall@{TOP_K}")
+    vectors, queries = make_corpus(num_vectors, dim)
+    truth = exact_top_k(vectors, queries)
+    ids = [str(i) for i in range(num_vectors)]
+
+    configs = [
+        ("float32", False, False),
+        ("float16", False, False),
+        ("float16", True, True),
+        ("int8", False, False),
+        ("int8", True, False),
+        ("int8", True, True),
+    ]
+
+    print(f"\n{'storage':<10}{'rerank':<16}{'resident MB':>12}{'recall':>10}{'ms/query':>10}")
+    print("-" * 58)
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype, rerank, on_disk in configs:
+            full_path = os.path.join(tmp, f"{dtype}_full.f32") if rerank and on_disk else None
+            index = QuantizedVectorIndex(dim, dtype=dtype, rerank=rerank, full_precision_path=full_path)
+            index.add(ids, vectors)
+
+            start = time.perf_counter()
+            results = index.search(queries, n_results=TOP_K)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / NUM_QUERIES
+
+            recall = np.mean([
+                len({int(vid) for vid, _ in hits} & set(truth[i].tolist())) / TOP_K
+                for i, hits in enumerate(results)
+            ])
+            rerank_label = ("disk" if on_disk else "memory") if rerank else "none"
+            print(f"{dtype:<10}{rerank_label:<16}{index.memory_bytes() / 1e6:>12.1f}{recall:>10.3f}{elapsed_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    num_vectors = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    run_benchmark(num_vectors, dim)
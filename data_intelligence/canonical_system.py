@@ -1,22 +1,42 @@
+import json
+import uuid
 import pandas as pd
 
+from .near_duplicates import NearDuplicateIndex
+from .fingerprints import content_id, dataset_fingerprint
+
+# A column is free text when its values average at least this many words...
+FREE_TEXT_MIN_WORDS = 3
+# ...and a categorical row attribute (age_group, city_tier, current_brand) when it has few distinct values
+METADATA_MAX_UNIQUE = 50
+
 class CanonicalDataSystem:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, dedup_threshold=0.7, namespaces=None, session_id=None):
         """
         Initializes the system that normalizes all input formats [cite: 2471-2473].
         Acts as the central relay for metrics, text feedback, and goal-specific signals.
+
+        namespaces: an EvidenceNamespaces registry. When given, each CSV's evidence goes to
+        its dataset's namespace (leased for session_id) instead of db_manager's collection.
         """
         self.db_manager = db_manager
+        self.namespaces = namespaces
+        self.session_id = session_id or uuid.uuid4().hex
+        self._namespace_fingerprint = None
         self.internal_object = {
             "metrics_present": [],      # Identified quantitative columns [cite: 2475]
             "text_feedback": [],        # Normalized qualitative verbatims [cite: 2476]
             "segments_present": False,  # Flag for demographic/behavioral buckets [cite: 2476]
             "time_series": False,       # Flag for longitudinal data [cite: 2475]
             "survey_themes": [],        # Extracted thematic buckets [cite: 2477]
-            "context": {}               # Mandatory pre-context inputs [cite: 209-211]
+            "context": {},              # Mandatory pre-context inputs [cite: 209-211]
+            "dataset_fingerprint": None,# Keys the dataset's evidence namespace
+            "text_columns": []          # Free-text CSV columns indexed into the Vector DB
         }
+        # Near-duplicate verbatims are folded into weighted representatives before indexing
+        self.dedup_index = NearDuplicateIndex(threshold=dedup_threshold)
 
-    def process_input(self, raw_data, data_type):
+    def process_input(self, raw_data, data_type, index_text=True):
         """
         Normalizes any format (CSV, Text, Voice) into the Canonical Internal Object [cite: 2463-2470].
         Format and source no longer matter once data is processed [cite: 2479-2480].
@@ -27,14 +47,136 @@ class CanonicalDataSystem:
             self.internal_object["metrics_present"] = df.columns.tolist()
             self.internal_object["segments_present"] = True if "segment" in df.columns else False
             self.internal_object["time_series"] = True if "date" in df.columns or "timestamp" in df.columns else False
+            self.internal_object["dataset_fingerprint"] = dataset_fingerprint(df)
+            if self.namespaces is not None:
+                self._use_namespace(self.internal_object["dataset_fingerprint"])
+            if index_text:
+                self.index_text_columns(df)
             return df
             
         elif data_type == "text":
             # Store in internal object and index in Vector DB for RAG [cite: 2476-2477]
-            self.internal_object["text_feedback"].append(raw_data)
-            self.db_manager.add_evidence([raw_data], [{"source": "manual_input"}], [str(hash(raw_data))])
+            verbatims = [raw_data] if isinstance(raw_data, str) else list(raw_data)
+            self._index_verbatims(verbatims, source="manual_input")
             return raw_data
 
+    def evidence_db(self):
+        """The current dataset's evidence store. Every access renews this session's namespace lease."""
+        if self._namespace_fingerprint is not None:
+            self.namespaces.touch(self._namespace_fingerprint, self.session_id)
+        return self.db_manager
+
+    def _use_namespace(self, fingerprint):
+        """Points evidence at the dataset's namespace, moving this session's lease off the previous dataset."""
+        if fingerprint == self._namespace_fingerprint:
+            self.namespaces.touch(fingerprint, self.session_id)
+            return
+        if self._namespace_fingerprint is not None:
+            self.namespaces.release(self._namespace_fingerprint, self.session_id)
+        self.db_manager = self.namespaces.acquire(fingerprint, self.session_id)
+        self._namespace_fingerprint = fingerprint
+        # Near-duplicate representatives refer to records in the namespace they were written to
+        self.dedup_index = NearDuplicateIndex(threshold=self.dedup_index.threshold)
+        self.namespaces.collect_garbage()
+
+    def _index_verbatims(self, verbatims, source):
+        """
+        Collapses near-duplicate verbatims before they reach the Vector DB.
+        New texts are embedded once; repeats only bump the 'duplicate_count' of their representative.
+        """
+        new_positions, repeat_positions = [], set()
+        for text in verbatims:
+            position, is_new = self.dedup_index.add(text, key=content_id(text))
+            if is_new:
+                new_positions.append(position)
+                self.internal_object["text_feedback"].append(text)
+            else:
+                repeat_positions.add(position)
+
+        representatives = self.dedup_index.representatives
+        db_manager = self.evidence_db()
+        if new_positions:
+            db_manager.add_evidence_bulk(
+                [representatives[p]["text"] for p in new_positions],
+                [{"source": source, "duplicate_count": representatives[p]["weight"]} for p in new_positions],
+                [representatives[p]["key"] for p in new_positions]
+            )
+
+        # Representatives that were already stored only need their weight refreshed
+        repeat_positions -= set(new_positions)
+        if repeat_positions:
+            db_manager.update_evidence_metadata(
+                [representatives[p]["key"] for p in repeat_positions],
+                [{"source": source, "duplicate_count": representatives[p]["weight"]} for p in repeat_positions]
+            )
+
+    def index_text_columns(self, df, text_columns=None, batch_size=512):
+        """
+        Streams free-text CSV columns (e.g. 'feedback_text') into the Vector DB, tagged with
+        the row's categorical attributes for filtered retrieval. Near-duplicate answers are
+        folded into one weighted record ('duplicate_count') per column and segment, so a
+        filter on 'segment' still sees every segment's answers. Record IDs hash the content,
+        so re-uploading a file only embeds records not seen before.
+        """
+        text_columns = text_columns if text_columns is not None else self.detect_text_columns(df)
+        metadata_columns = [c for c in self.detect_metadata_columns(df) if c not in text_columns]
+        self.internal_object["text_columns"] = list(text_columns)
+
+        stats = {"received": 0, "written": 0, "updated": 0, "skipped_existing": 0, "collapsed_duplicates": 0}
+        for column in text_columns:
+            # One dedup index per segment value: representatives never merge rows a segment filter tells apart
+            scopes = {}
+            for start in range(0, len(df), batch_size):
+                chunk = df.iloc[start:start + batch_size]
+                chunk = chunk[chunk[column].notna()]
+                texts = chunk[column].astype(str).str.strip()
+                chunk, texts = chunk[texts != ""], texts[texts != ""]
+
+                for text, row in zip(texts, chunk[metadata_columns].to_dict("records")):
+                    metadata = {"source": "csv", "column": column, **{k: _metadata_value(v) for k, v in row.items() if pd.notna(v)}}
+                    scope_key = json.dumps(metadata.get("segment"))
+                    dedup_index, metadatas = scopes.setdefault(scope_key, (NearDuplicateIndex(threshold=self.dedup_index.threshold), []))
+                    _, is_new = dedup_index.add(text, key=content_id(text, namespace=f"{column}\x1f{scope_key}"))
+                    if is_new:
+                        metadatas.append(metadata)
+                    else:
+                        stats["collapsed_duplicates"] += 1
+
+            records = [
+                (rep["text"], {**metadata, "duplicate_count": rep["weight"]}, rep["key"])
+                for dedup_index, metadatas in scopes.values()
+                for rep, metadata in zip(dedup_index.representatives, metadatas)
+            ]
+            for start in range(0, len(records), batch_size):
+                batch = records[start:start + batch_size]
+                batch_stats = self.evidence_db().add_evidence_bulk(
+                    [text for text, _, _ in batch], [metadata for _, metadata, _ in batch], [key for _, _, key in batch], batch_size=batch_size
+                )
+                for key in batch_stats:
+                    stats[key] += batch_stats[key]
+        return stats
+
+    @staticmethod
+    def detect_text_columns(df):
+        """Text columns whose values read like sentences rather than category labels."""
+        columns = []
+        for column in df.select_dtypes(include=["object", "string"]).columns:
+            values = df[column].dropna().astype(str)
+            if values.empty:
+                continue
+            # Survey answers repeat a lot, so distinctness is not required; word count is the signal
+            if values.str.split().str.len().mean() >= FREE_TEXT_MIN_WORDS:
+                columns.append(column)
+        return columns
+
+    @staticmethod
+    def detect_metadata_columns(df):
+        """Low-cardinality columns (age_group, city_tier, current_brand, ...) worth filtering on."""
+        return [
+            column for column in df.columns
+            if 1 < df[column].nunique(dropna=True) <= METADATA_MAX_UNIQUE
+        ]
+
     def extract_goal_aware_signals(self, goal):
         """
         Extracts specific behavioral and numerical signals based on the selected goal[cite: 2482].
@@ -104,4 +246,11 @@ class CanonicalDataSystem:
         Enforces the 'Gatekeeper' rule: mandatory variables must be defined [cite: 209-211, 408-409].
         Ensures engines refuse to run if context like 'product_age' is missing [cite: 586-587, 1183].
         """
-        self.internal_object["context"] = context_dict
\ No newline at end of file
+        self.internal_object["context"] = context_dict
+
+
+def _metadata_value(value):
+    """Vector stores only accept str / int / float / bool metadata."""
+    if hasattr(value, "item"):
+        value = value.item()
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
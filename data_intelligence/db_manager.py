@@ -1,33 +1,210 @@
-import chromadb
-from chromadb.utils import embedding_functions
+import os
+import json
+import time
+import atexit
+import shutil
+import threading
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .quantized_index import QuantizedVectorIndex
+from .keyword_index import BM25Index
+from .retrieval_cache import RetrievalCache
+from .vector_backends import VectorBackend, ChromaBackend, FaissBackend
+from .partitions import SegmentPartitions
+from .embedding_service import get_embedding_service
+from .fingerprints import content_id
+
+logger = logging.getLogger("VectorDBManager")
+
+# Fields of a Chroma QueryResult that hold one entry per query
+PER_QUERY_FIELDS = ("ids", "embeddings", "documents", "uris", "data", "metadatas", "distances")
+
+
+def _empty_results(num_queries):
+    return {field: [[] for _ in range(num_queries)] for field in ("ids", "documents", "metadatas", "distances")}
+
 
 class VectorDBManager:
-    def __init__(self, db_path="data_intelligence/vector_db"):
+    def __init__(self, db_path="data_intelligence/vector_db", vector_storage="float32", rerank=True, cache_size=1024, backend="chroma", partition_key=None, namespace=None, persist_interval=30.0):
         """
         Initializes the Vector DB in the designated folder [cite: 2471-2473].
         This folder acts as the 'Hard Drive' for indexed consumer intelligence.
+
+        vector_storage: 'float32' searches the backend index directly. 'float16' or 'int8' serves
+        candidate search from a compact quantized index (optionally re-ranked at full
+        precision); the backend then only serves documents and metadata by id.
+
+        backend: 'chroma' (default), 'faiss-flat', 'faiss-ivf', 'faiss-hnsw', or a VectorBackend instance.
+
+        partition_key: metadata key (e.g. 'segment') to keep one sub-collection per value of.
+        Queries filtered on exactly that key then search only their partition. Opt-in: each
+        partitioned record's vector is stored a second time (see SegmentPartitions).
+
+        namespace: isolates one dataset's evidence in its own collection and side indexes
+        (see EvidenceNamespaces). None keeps the shared 'research_data' collection.
+
+        persist_interval: seconds between automatic persist() calls while evidence is being
+        written (None turns them off). Bulk ingests persist when they finish, and unsaved
+        writes are persisted at interpreter exit, so a restart loads the side indexes
+        (and FAISS index) instead of rebuilding them.
         """
-        self.client = chromadb.PersistentClient(path=db_path)
+        self.db_path = db_path
+        self.namespace = namespace
+        self.backend = self._make_backend(backend, db_path)
+        self.collection_name = self._collection_name(namespace)
+        # Side indexes (BM25, compact vectors, partition registry) live next to their collection
+        self.index_dir = self._index_dir(db_path, namespace)
         
         # Using a standard embedding function for B2C verbatims and pain language [cite: 61-62]
-        self.emb_fn = embedding_functions.DefaultEmbeddingFunction()
+        # The model is the process-wide one, shared with the qual engine
+        embedding_service = get_embedding_service()
+        embedding_service.register_consumer("VectorDBManager")
+        self.emb_fn = embedding_service.as_chroma_function()
         
         # 'research_data' is the canonical collection for all 7 goals [cite: 1282-1288]
-        self.collection = self.client.get_or_create_collection(
-            name="research_data", 
+        self.collection = self.backend.get_or_create_collection(
+            name=self.collection_name,
             embedding_function=self.emb_fn
         )
 
+        self.vector_storage = vector_storage
+        self.rerank = rerank
+        self.compact_index = None
+        if vector_storage != "float32":
+            self.compact_index = self._open_compact_index()
+
+        # Sparse BM25 index over the same documents, for exact-term (brand, price point) recall
+        self.keyword_index = self._open_keyword_index()
+
+        self.partitions = None
+        if partition_key:
+            self.partitions = self._open_partitions(partition_key)
+
+        # Guards the side indexes (BM25, compact vectors): writes from the caller and the
+        # background bulk writer, and reads too, since searches consolidate their buffers lazily
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._pending_writes = []
+
+        # Repeated evidence questions are served from cache until the collection changes
+        self.write_version = 0
+        self.retrieval_cache = RetrievalCache(max_entries=cache_size)
+
+        self.persist_interval = persist_interval
+        self._dirty = False
+        self._last_persist = time.monotonic()
+        atexit.register(self._persist_if_dirty)
+
     def add_evidence(self, text_list, metadata_list, ids):
         """
         Stores transcripts and verbatims with mandatory metadata tagging [cite: 60-62].
         Supports segmentation by attaching 'respondent' and 'segment' tags [cite: 98-106].
+        Upserts, so re-adding an existing ID never duplicates evidence.
         """
-        self.collection.add(
-            documents=text_list,
-            metadatas=metadata_list,
-            ids=ids
-        )
+        embeddings = None
+        if self.compact_index is not None or self.partitions is not None:
+            # Embed once (outside the lock, so searches are not held up) and feed the backend,
+            # the compact index and the partitions
+            embeddings = np.asarray(self.emb_fn(text_list), dtype=np.float32)
+
+        with self._write_lock:
+            if self.partitions is not None:
+                # Reads the stored metadata to drop moved ids, so it runs before the global upsert
+                self.partitions.add(ids, embeddings, metadata_list, global_collection=self.collection)
+            if embeddings is None:
+                self.collection.upsert(
+                    documents=text_list,
+                    metadatas=metadata_list,
+                    ids=ids
+                )
+            else:
+                self.collection.upsert(
+                    documents=text_list,
+                    embeddings=embeddings,
+                    metadatas=metadata_list,
+                    ids=ids
+                )
+                if self.compact_index is not None:
+                    self.compact_index.add(ids, embeddings, metadata_list)
+
+            self.keyword_index.add(ids, text_list, metadata_list)
+            self.write_version += 1
+            self._dirty = True
+        self._maybe_persist()
+
+    def add_evidence_bulk(self, text_list, metadata_list, ids=None, batch_size=512, background=False):
+        """
+        Idempotent bulk ingestion (upsert semantics).
+        IDs default to stable content hashes. Stored IDs are compared before embedding:
+        unchanged records are skipped, so re-ingesting a corpus after a restart costs one
+        lookup per batch; a changed document is re-embedded and changed metadata is updated
+        in place. With background=True the work runs on a single writer thread and a
+        Future with the ingest stats is returned.
+        """
+        if ids is None:
+            ids = [content_id(text) for text in text_list]
+
+        if background:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evidence-writer")
+            future = self._writer.submit(self._ingest_batches, list(text_list), list(metadata_list), list(ids), batch_size)
+            self._pending_writes = [f for f in self._pending_writes if not f.done()] + [future]
+            return future
+
+        return self._ingest_batches(text_list, metadata_list, ids, batch_size)
+
+    def flush(self):
+        """Blocks until every queued background ingest has been written. The writer stays available."""
+        pending, self._pending_writes = self._pending_writes, []
+        wait(pending)
+
+    def _ingest_batches(self, text_list, metadata_list, ids, batch_size):
+        batch_size = min(batch_size, self.backend.get_max_batch_size())
+        stats = {"received": len(ids), "written": 0, "updated": 0, "skipped_existing": 0}
+
+        for start in range(0, len(ids), batch_size):
+            # Collapse repeated IDs inside the batch (last write wins, as with upsert)
+            batch = {}
+            for doc_id, text, metadata in zip(ids[start:start + batch_size], text_list[start:start + batch_size], metadata_list[start:start + batch_size]):
+                batch[doc_id] = (text, metadata)
+
+            stored = self.collection.get(ids=list(batch), include=["documents", "metadatas"])
+            stored = {doc_id: (doc, meta or {}) for doc_id, doc, meta in zip(stored["ids"], stored.get("documents") or [], stored.get("metadatas") or [])}
+
+            # New or changed documents are (re-)embedded; records whose text is unchanged only get new metadata
+            write_ids = [doc_id for doc_id in batch if doc_id not in stored or stored[doc_id][0] != batch[doc_id][0]]
+            update_ids = [
+                doc_id for doc_id in batch
+                if doc_id in stored and stored[doc_id][0] == batch[doc_id][0] and {**stored[doc_id][1], **(batch[doc_id][1] or {})} != stored[doc_id][1]
+            ]
+            stats["skipped_existing"] += len(batch) - len(write_ids) - len(update_ids)
+
+            if write_ids:
+                self.add_evidence([batch[i][0] for i in write_ids], [batch[i][1] for i in write_ids], write_ids)
+                stats["written"] += len(write_ids)
+            if update_ids:
+                self.update_evidence_metadata(update_ids, [batch[i][1] for i in update_ids])
+                stats["updated"] += len(update_ids)
+
+        logger.info(f"📥 Bulk ingest: {stats['written']} written, {stats['updated']} updated, {stats['skipped_existing']} unchanged")
+        self._persist_if_dirty()
+        return stats
+
+    def update_evidence_metadata(self, ids, metadata_list):
+        """Updates metadata (e.g. duplicate weights) in place, without re-embedding the documents."""
+        with self._write_lock:
+            if self.partitions is not None:
+                # Reads the current metadata, so it runs before the global update
+                self.partitions.update(ids, metadata_list, self.collection)
+            self.collection.update(ids=ids, metadatas=metadata_list)
+            self.keyword_index.update_metadata(ids, metadata_list)
+            if self.compact_index is not None:
+                self.compact_index.update_metadata(ids, metadata_list)
+            self.write_version += 1
+            self._dirty = True
+        self._maybe_persist()
 
     def query_evidence(self, user_query, n_results=3):
         """
@@ -35,30 +212,365 @@ class VectorDBManager:
         Used to find 'Quotes that explain problems clearly' for the Synthesis Engine[cite: 379, 1192].
         Returns raw results (quotes and metadata) to ensure Person 2 remains an evidence provider.
         """
-        results = self.collection.query(
-            query_texts=[user_query],
-            n_results=n_results
-        )
-        return results
+        return self._cached_query(user_query, None, n_results)
 
     def query_by_segment(self, user_query, segment_name, n_results=3):
         """
         Filters evidence by specific user segments (e.g., 'Gen Z' or 'Power Users') [cite: 107-116, 301-305].
         Ensures research is journey-aware and platform-aware [cite: 402-403].
         """
-        results = self.collection.query(
-            query_texts=[user_query],
-            where={"segment": segment_name},
-            n_results=n_results
-        )
+        return self._cached_query(user_query, {"segment": segment_name}, n_results)
+
+    def _cached_query(self, user_query, where, n_results):
+        """Single dense query behind the versioned retrieval cache."""
+        key = RetrievalCache.make_key("dense", user_query, where, n_results)
+        version = self.write_version
+        cached = self.retrieval_cache.get(key, version)
+        if cached is not None:
+            return cached
+
+        routed, partition = self._partition_for(where)
+        if routed:
+            results = self._query_partition(partition, np.asarray(self.emb_fn([user_query]), dtype=np.float32), n_results)
+        elif self.compact_index is not None:
+            results = self._query_compact(user_query, n_results, where=where)
+        else:
+            results = self.collection.query(
+                query_texts=[user_query],
+                where=where,
+                n_results=n_results
+            )
+        self.retrieval_cache.put(key, version, results)
         return results
 
+    def retrieval_cache_stats(self):
+        """Hit rate, evictions and invalidations of the retrieval cache."""
+        return {**self.retrieval_cache.stats(), "write_version": self.write_version}
+
+    def query_evidence_batch(self, user_queries, segment_names=None, n_results=3):
+        """
+        Batched retrieval for many queries (e.g. supporting quotes for several goals or segments).
+        segment_names is None or a list aligned with user_queries (None = no filter).
+        All queries are embedded in one call and searched with one index call per distinct
+        segment filter. Returns one Chroma-shaped result per query, in input order.
+        """
+        if not user_queries:
+            return []
+        segment_names = segment_names if segment_names is not None else [None] * len(user_queries)
+        if len(segment_names) != len(user_queries):
+            raise ValueError("segment_names must be aligned with user_queries")
+
+        # Identical (query, segment) pairs are searched once; cached pairs are not searched at all
+        version = self.write_version
+        answers, unique_pairs = {}, []
+        for pair in dict.fromkeys(zip(user_queries, segment_names)):
+            cached = self.retrieval_cache.get(self._pair_cache_key(pair, n_results), version)
+            if cached is not None:
+                answers[pair] = cached
+            else:
+                unique_pairs.append(pair)
+
+        if not unique_pairs:
+            return [answers[pair] for pair in zip(user_queries, segment_names)]
+
+        unique_queries = list(dict.fromkeys(query for query, _ in unique_pairs))
+        embeddings = np.asarray(self.emb_fn(unique_queries), dtype=np.float32)
+        query_row = {query: row for row, query in enumerate(unique_queries)}
+
+        groups = {}
+        for pair in unique_pairs:
+            groups.setdefault(pair[1], []).append(pair)
+
+        for segment_name, pairs in groups.items():
+            where = {"segment": segment_name} if segment_name is not None else None
+            group_embeddings = embeddings[[query_row[query] for query, _ in pairs]]
+
+            routed, partition = self._partition_for(where)
+            if routed:
+                results = self._query_partition(partition, group_embeddings, n_results)
+            elif self.compact_index is not None:
+                with self._write_lock:
+                    all_hits = self.compact_index.search(group_embeddings, n_results=n_results, where=where)
+                for pair, hits in zip(pairs, all_hits):
+                    answers[pair] = self._fetch_results(hits, [1.0 - score for _, score in hits])
+                continue
+            else:
+                results = self.collection.query(
+                    query_embeddings=group_embeddings,
+                    where=where,
+                    n_results=n_results
+                )
+
+            for position, pair in enumerate(pairs):
+                answers[pair] = {
+                    key: [value[position]] if key in PER_QUERY_FIELDS and value is not None else value
+                    for key, value in results.items()
+                }
+
+        for pair in unique_pairs:
+            self.retrieval_cache.put(self._pair_cache_key(pair, n_results), version, answers[pair])
+        return [answers[pair] for pair in zip(user_queries, segment_names)]
+
+    @staticmethod
+    def _pair_cache_key(pair, n_results):
+        query, segment_name = pair
+        where = {"segment": segment_name} if segment_name is not None else None
+        return RetrievalCache.make_key("dense", query, where, n_results)
+
+    def query_keywords(self, user_query, n_results=3, segment_name=None):
+        """
+        Lexical BM25 retrieval. Catches exact terms like brand names ('Mamaearth') or
+        price points ('499') and costs no embedding call.
+        """
+        where = {"segment": segment_name} if segment_name else None
+        with self._write_lock:
+            hits = self.keyword_index.search(user_query, n_results=n_results, where=where)
+        return self._fetch_results(hits, [1.0 / (1.0 + score) for _, score in hits])
+
+    def query_hybrid(self, user_query, n_results=3, segment_name=None, rrf_k=60, candidate_factor=3):
+        """
+        Hybrid retrieval: fuses dense (semantic) and BM25 (lexical) rankings with Reciprocal
+        Rank Fusion. 'distances' holds 1 - fused score, so lower still means more relevant.
+        """
+        candidates = n_results * candidate_factor
+        if segment_name:
+            dense = self.query_by_segment(user_query, segment_name, n_results=candidates)
+        else:
+            dense = self.query_evidence(user_query, n_results=candidates)
+        where = {"segment": segment_name} if segment_name else None
+        with self._write_lock:
+            lexical = self.keyword_index.search(user_query, n_results=candidates, where=where)
+
+        fused = {}
+        for rank, doc_id in enumerate(dense["ids"][0]):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+        for rank, (doc_id, _) in enumerate(lexical):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+        hits = sorted(fused.items(), key=lambda item: -item[1])[:n_results]
+        return self._fetch_results(hits, [1.0 - score for _, score in hits])
+
+    def persist(self):
+        """Writes the backend index (FAISS) and side indexes (BM25, compact vectors) next to the DB files."""
+        self._dirty = False
+        self._last_persist = time.monotonic()
+        if hasattr(self.backend, "persist"):
+            self.backend.persist()
+        with self._write_lock:
+            # Replaced documents are not written out as tombstones
+            self.keyword_index.compact()
+            self.keyword_index.save(os.path.join(self.index_dir, "bm25"))
+        self.persist_compact_index()
+
+    def _maybe_persist(self):
+        """Debounced persist after a write: at most once per persist_interval."""
+        if self.persist_interval is not None and time.monotonic() - self._last_persist >= self.persist_interval:
+            self._persist_if_dirty()
+
+    def _persist_if_dirty(self):
+        if self._dirty:
+            try:
+                self.persist()
+            except Exception as e:
+                self._dirty = True
+                logger.warning(f"⚠️ Could not persist {self.collection_name}: {e}")
+
+    @staticmethod
+    def _make_backend(backend, db_path):
+        if isinstance(backend, VectorBackend):
+            return backend
+        if backend == "chroma":
+            return ChromaBackend(db_path)
+        if backend.startswith("faiss"):
+            index_type = backend.split("-", 1)[1] if "-" in backend else "flat"
+            return FaissBackend(os.path.join(db_path, "faiss"), index_type=index_type)
+        raise ValueError(f"Unknown vector backend: {backend}")
+
     def delete_research_collection(self):
         """
         Utility for demo safety and resetting research data between goals[cite: 2428, 2441].
         """
-        self.client.delete_collection(name="research_data")
-        self.collection = self.client.get_or_create_collection(
-            name="research_data", 
-            embedding_function=self.emb_fn
-        )
\ No newline at end of file
+        with self._write_lock:
+            self._drop_storage()
+            self.collection = self.backend.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=self.emb_fn
+            )
+            if self.compact_index is not None:
+                self.compact_index = self._open_compact_index()
+            self.keyword_index = BM25Index()
+            self.write_version += 1
+            self._dirty = True
+
+    def drop(self):
+        """Deletes this manager's collection and side indexes for good (used when a namespace is collected)."""
+        self.flush()
+        with self._write_lock:
+            self._drop_storage()
+            if self.namespace:
+                shutil.rmtree(self.index_dir, ignore_errors=True)
+            self.write_version += 1
+            # Nothing left to write; persisting now would recreate the deleted files
+            self._dirty = False
+            atexit.unregister(self._persist_if_dirty)
+
+    @classmethod
+    def drop_namespace(cls, namespace, db_path="data_intelligence/vector_db", backend="chroma"):
+        """
+        Deletes a namespace's collection, partitions and side indexes without opening it:
+        no embedding model, no index loads (used when an idle namespace is collected).
+        """
+        backend = cls._make_backend(backend, db_path)
+        index_dir = cls._index_dir(db_path, namespace)
+        names = [cls._collection_name(namespace)]
+        registry_path = os.path.join(index_dir, "partitions.json")
+        if os.path.exists(registry_path):
+            with open(registry_path) as f:
+                names += list(json.load(f).values())
+
+        existing = set(backend.list_collections())
+        for name in names:
+            if name in existing:
+                backend.delete_collection(name=name)
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+    @staticmethod
+    def _collection_name(namespace):
+        return f"research_data-ns-{namespace}" if namespace else "research_data"
+
+    @staticmethod
+    def _index_dir(db_path, namespace):
+        return os.path.join(db_path, "namespaces", namespace) if namespace else db_path
+
+    def _drop_storage(self):
+        self.backend.delete_collection(name=self.collection_name)
+        if self.partitions is not None:
+            self.partitions.drop_all()
+        shutil.rmtree(os.path.join(self.index_dir, f"compact_{self.vector_storage}"), ignore_errors=True)
+        shutil.rmtree(os.path.join(self.index_dir, "bm25"), ignore_errors=True)
+
+    # --- Segment partitions ---
+
+    def _open_partitions(self, partition_key):
+        """Opens the partition registry, building the partitions from the global collection on first use."""
+        registry_path = os.path.join(self.index_dir, "partitions.json")
+        is_new = not os.path.exists(registry_path)
+        partitions = SegmentPartitions(self.backend, self.collection_name, partition_key, self.emb_fn, registry_path)
+        if is_new and self.collection.count():
+            partitions.backfill(self.collection)
+        return partitions
+
+    def _partition_for(self, where):
+        """
+        (routed, collection): routed is False when the filter is not served by a partition.
+        collection is None when no evidence has that value yet, so the answer is empty.
+        """
+        if self.partitions is None or not self.partitions.routes(where):
+            return False, None
+        return True, self.partitions.collection_for(where[self.partitions.key])
+
+    # --- Keyword (BM25) index ---
+
+    def _open_keyword_index(self):
+        """Loads the persisted BM25 index, or rebuilds it from the documents stored in the backend."""
+        keyword_dir = os.path.join(self.index_dir, "bm25")
+        if os.path.exists(os.path.join(keyword_dir, "bm25.json")):
+            index = BM25Index.load(keyword_dir)
+            if len(index) == self.collection.count():
+                return index
+            # Evidence was added after the last persist; rebuild below
+
+        index = BM25Index()
+        page_size = 5000
+        for offset in range(0, self.collection.count(), page_size):
+            page = self.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            index.add(page["ids"], page["documents"], page["metadatas"])
+        return index
+
+    def _query_partition(self, partition, query_embeddings, n_results):
+        """Searches one partition (ids + vectors only) and fills documents and metadata from the global collection."""
+        if partition is None:
+            return _empty_results(len(query_embeddings))
+
+        found = partition.query(query_embeddings=query_embeddings, n_results=n_results, include=["distances"])
+        per_query = [
+            self._fetch_results(list(zip(ids, distances)), distances)
+            for ids, distances in zip(found["ids"], found["distances"])
+        ]
+        return {field: [result[field][0] for result in per_query] for field in ("ids", "documents", "metadatas", "distances")}
+
+    def _fetch_results(self, hits, distances):
+        """Builds a Chroma-shaped result for (id, score) hits, fetching documents by id."""
+        hit_ids = [doc_id for doc_id, _ in hits]
+        stored = self.collection.get(ids=hit_ids, include=["documents", "metadatas"]) if hit_ids else {"ids": []}
+        by_id = {doc_id: (doc, meta) for doc_id, doc, meta in zip(stored["ids"], stored.get("documents") or [], stored.get("metadatas") or [])}
+
+        kept = [(doc_id, distance) for (doc_id, _), distance in zip(hits, distances) if doc_id in by_id]
+        return {
+            "ids": [[doc_id for doc_id, _ in kept]],
+            "documents": [[by_id[doc_id][0] for doc_id, _ in kept]],
+            "metadatas": [[by_id[doc_id][1] for doc_id, _ in kept]],
+            "distances": [[distance for _, distance in kept]]
+        }
+
+    # --- Compact (quantized) vector storage ---
+
+    def persist_compact_index(self):
+        """Writes the compact index next to the DB files so workers can memory-map it."""
+        if self.compact_index is not None:
+            with self._write_lock:
+                self.compact_index.save(os.path.join(self.index_dir, f"compact_{self.vector_storage}"))
+
+    def compact_memory_report(self):
+        """Resident bytes of the compact index versus the same vectors held as float32."""
+        if self.compact_index is None:
+            return {}
+        with self._write_lock:
+            count = len(self.compact_index)
+            compact_bytes = self.compact_index.memory_bytes()
+        float32_bytes = count * self.compact_index.dim * 4
+        return {
+            "vectors": count,
+            "storage": self.vector_storage,
+            "compact_bytes": compact_bytes,
+            "float32_bytes": float32_bytes,
+            "compression_ratio": round(float32_bytes / compact_bytes, 2) if compact_bytes else None
+        }
+
+    def _open_compact_index(self):
+        """Loads a persisted compact index, or rebuilds it from the embeddings the backend already holds."""
+        compact_dir = os.path.join(self.index_dir, f"compact_{self.vector_storage}")
+        if os.path.exists(os.path.join(compact_dir, "index.json")):
+            index = QuantizedVectorIndex.load(compact_dir)
+            if len(index) == self.collection.count():
+                return index
+            # Evidence was added after the last persist; the rebuild below resyncs it
+
+        os.makedirs(compact_dir, exist_ok=True)
+        full_precision_path = os.path.join(compact_dir, "full_precision.f32")
+        if os.path.exists(full_precision_path):
+            os.remove(full_precision_path)
+
+        dim = len(self.emb_fn(["dimension probe"])[0])
+        index = QuantizedVectorIndex(
+            dim,
+            dtype=self.vector_storage,
+            rerank=self.rerank,
+            full_precision_path=full_precision_path if self.rerank else None
+        )
+
+        page_size = 5000
+        for offset in range(0, self.collection.count(), page_size):
+            page = self.collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            if len(page["ids"]):
+                index.add(page["ids"], np.asarray(page["embeddings"], dtype=np.float32), page["metadatas"])
+        return index
+
+    def _query_compact(self, user_query, n_results, where=None):
+        """Candidate search on the compact index, then documents fetched from the backend by id."""
+        query_vector = np.asarray(self.emb_fn([user_query]), dtype=np.float32)
+        with self._write_lock:
+            hits = self.compact_index.search(query_vector, n_results=n_results, where=where)[0]
+
+        # Chroma reports distances; cosine distance = 1 - similarity
+        return self._fetch_results(hits, [1.0 - score for _, score in hits])
\ No newline at end of file
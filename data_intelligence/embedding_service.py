@@ -0,0 +1,215 @@
+import hashlib
+import os
+import queue
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import register_embedding_function
+
+logger = logging.getLogger("EmbeddingService")
+
+# Name persisted in each collection's configuration
+EMBEDDING_FUNCTION_NAME = "shared-minilm-l6-v2"
+
+
+def _load_minilm():
+    # Same all-MiniLM-L6-v2 weights SentenceTransformer uses, run through ONNX (no torch needed)
+    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+    return ONNXMiniLM_L6_V2()
+
+
+class EmbeddingService:
+    """
+    One embedding model for the whole process.
+
+    Callers (the Vector DB via Chroma, the qual engine's clustering and evidence
+    indexes) share a single model instance. Texts are looked up in an LRU cache
+    first; the misses go through one queue, where a worker thread coalesces
+    concurrent requests into model batches of up to max_batch_size.
+    """
+    def __init__(self, model_factory=_load_minilm, max_batch_size=256, max_wait_ms=5, cache_size=20000):
+        self.model_factory = model_factory
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._dimension = None
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._inflight = {}
+        self._queue = queue.Queue()
+        self._worker = None
+
+        self.consumers = {}
+        self.texts_requested = 0
+        self.texts_encoded = 0
+        self.cache_hits = 0
+        self.batches = 0
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                self._model = self.model_factory()
+                logger.info("✅ Shared embedding model loaded")
+            return self._model
+
+    @property
+    def dimension(self):
+        if self._dimension is None:
+            self._dimension = self.encode(["dimension probe"]).shape[1]
+        return self._dimension
+
+    def register_consumer(self, name):
+        """Records a component that would otherwise have loaded its own model copy."""
+        self.consumers[name] = self.consumers.get(name, 0) + 1
+
+    def encode(self, texts):
+        """Embeds texts as a float32 (n, dim) matrix. Repeated, cached and in-flight texts are not re-encoded."""
+        texts = [str(t) for t in texts]
+        if not texts:
+            return np.empty((0, self._dimension or 0), dtype=np.float32)
+
+        keys = [hashlib.sha1(t.encode("utf-8")).digest() for t in texts]
+        vectors, waiting, submit = {}, {}, []
+        with self._cache_lock:
+            self.texts_requested += len(texts)
+            for key, text in zip(keys, texts):
+                if key in vectors or key in waiting:
+                    continue
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    vectors[key] = cached
+                elif key in self._inflight:
+                    # Another caller is already encoding this text
+                    waiting[key] = self._inflight[key]
+                else:
+                    future = Future()
+                    self._inflight[key] = waiting[key] = future
+                    submit.append((key, text, future))
+
+        if submit:
+            self._ensure_worker()
+            self._queue.put(submit)
+        for key, future in waiting.items():
+            vectors[key] = future.result()
+
+        matrix = np.stack([vectors[key] for key in keys])
+        self._dimension = matrix.shape[1]
+        return matrix
+
+    def as_chroma_function(self):
+        return ServiceEmbeddingFunction(self)
+
+    def stats(self):
+        """Duplicate encodes avoided and the memory saved by sharing one model."""
+        model_bytes = _model_file_bytes()
+        # One model per distinct component that would load its own; repeat registrations
+        # (e.g. one VectorDBManager per namespace) share that component's copy anyway
+        copies_avoided = max(0, len(self.consumers) - 1)
+        return {
+            "consumers": dict(self.consumers),
+            "texts_requested": self.texts_requested,
+            "texts_encoded": self.texts_encoded,
+            "duplicate_encodes_avoided": self.texts_requested - self.texts_encoded,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._cache),
+            "batches": self.batches,
+            "avg_batch_size": round(self.texts_encoded / self.batches, 1) if self.batches else 0.0,
+            "model_bytes": model_bytes,
+            "memory_saved_bytes": model_bytes * copies_avoided
+        }
+
+    # --- Batching worker ---
+
+    def _ensure_worker(self):
+        with self._model_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            pending = self._queue.get()
+            # Give concurrent callers a moment to join the batch
+            while len(pending) < self.max_batch_size:
+                try:
+                    pending = pending + self._queue.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+
+            try:
+                model = self.model
+                chunks = [
+                    np.asarray(model([text for _, text, _ in pending[start:start + self.max_batch_size]]), dtype=np.float32)
+                    for start in range(0, len(pending), self.max_batch_size)
+                ]
+                encoded = np.concatenate(chunks)
+            except Exception as e:
+                with self._cache_lock:
+                    for key, _, future in pending:
+                        self._inflight.pop(key, None)
+                        future.set_exception(e)
+                continue
+
+            with self._cache_lock:
+                self.batches += len(chunks)
+                self.texts_encoded += len(pending)
+                for (key, _, future), vector in zip(pending, encoded):
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                    self._inflight.pop(key, None)
+                    future.set_result(vector)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+
+@register_embedding_function
+class ServiceEmbeddingFunction(EmbeddingFunction):
+    """
+    Chroma embedding function backed by the shared EmbeddingService.
+    Registered under its own name, so Chroma rebuilds this function (not its default
+    one, with a second model copy) when a persisted collection is reopened.
+    """
+    def __init__(self, service=None):
+        self.service = service or get_embedding_service()
+
+    def __call__(self, input):
+        return list(self.service.encode(input))
+
+    @staticmethod
+    def name():
+        return EMBEDDING_FUNCTION_NAME
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return ServiceEmbeddingFunction()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service():
+    """The process-wide EmbeddingService."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService()
+        return _service
+
+
+def _model_file_bytes():
+    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+    path = os.path.join(ONNXMiniLM_L6_V2.DOWNLOAD_PATH, ONNXMiniLM_L6_V2.EXTRACTED_FOLDER_NAME, "model.onnx")
+    return os.path.getsize(path) if os.path.exists(path) else 0
@@ -0,0 +1,23 @@
+import hashlib
+import pandas as pd
+
+# Content hashes only: kept free of the vector-store imports so the quant path
+# (ResearchTools, CanonicalDataSystem) can key datasets without loading chromadb
+
+
+def content_id(text, namespace=""):
+    """
+    Stable evidence ID derived from the content itself.
+    Unlike hash(), it does not change between interpreter restarts, so re-ingesting is idempotent.
+    """
+    return hashlib.sha256(f"{namespace}\x1f{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def dataset_fingerprint(df):
+    """
+    Content fingerprint of an uploaded dataset (columns + row values, order-sensitive).
+    The same CSV uploaded again, by any session, maps to the same fingerprint.
+    """
+    hasher = hashlib.sha256("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return hasher.hexdigest()[:32]
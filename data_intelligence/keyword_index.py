@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import numpy as np
+from scipy import sparse
+
+_TOKEN = re.compile(r"\w+")
+
+# Rows appended since the last column-matrix build are searched from a small delta matrix,
+# merged into the main one once it exceeds max(DELTA_MERGE_ROWS, DELTA_MERGE_RATIO * rows)
+DELTA_MERGE_ROWS = 1024
+DELTA_MERGE_RATIO = 0.1
+# Merges first compact the index when this share of its rows are tombstones
+COMPACT_DEAD_RATIO = 0.25
+
+
+def tokenize(text):
+    """Lowercased word/number tokens, so brand names and price points ('499') stay searchable."""
+    return _TOKEN.findall(str(text).lower())
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index over a sparse term-document matrix.
+
+    Rows are documents and columns are vocabulary terms. New documents are appended
+    as CSR rows; re-adding an existing id replaces its row. Scoring only touches the
+    matrix columns of the query terms, read from a column (CSC) copy of the matrix plus a
+    delta for the rows added since that copy was built, so an add does not force a full
+    rebuild. Replaced rows stay as tombstones until compact() drops them.
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+        self.ids = []
+        self.metadatas = []
+        self.vocabulary = {}
+        self._id_to_row = {}
+        self._live = []
+        self._doc_lengths = []
+        self._doc_freq = []
+
+        # CSR buffers, consolidated into a matrix lazily
+        self._indptr = [0]
+        self._indices = []
+        self._counts = []
+        self._matrix = None
+        # Column copy of rows [0, _merged_rows), and of the rows added since
+        self._columns = None
+        self._merged_rows = 0
+        self._delta = None
+
+    def __len__(self):
+        return len(self._id_to_row)
+
+    def add(self, ids, documents, metadatas=None):
+        """Adds or replaces documents."""
+        metadatas = metadatas if metadatas is not None else [{} for _ in ids]
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            if doc_id in self._id_to_row:
+                self._remove_row(self._id_to_row[doc_id])
+
+            terms, counts = np.unique(tokenize(document), return_counts=True)
+            columns = [self._column(term) for term in terms]
+            for column in columns:
+                self._doc_freq[column] += 1
+
+            self._id_to_row[doc_id] = len(self.ids)
+            self.ids.append(doc_id)
+            self.metadatas.append(metadata or {})
+            self._live.append(True)
+            self._doc_lengths.append(int(counts.sum()))
+            self._indices.extend(columns)
+            self._counts.extend(int(c) for c in counts)
+            self._indptr.append(len(self._indices))
+        self._matrix = None
+        self._delta = None
+
+    def update_metadata(self, ids, metadatas):
+        """Merges new metadata into existing entries (unknown ids are ignored)."""
+        for doc_id, metadata in zip(ids, metadatas):
+            if doc_id in self._id_to_row:
+                self.metadatas[self._id_to_row[doc_id]].update(metadata or {})
+
+    def search(self, query, n_results=3, where=None):
+        """Returns (id, score) pairs for documents matching any query term, best first."""
+        if not len(self):
+            return []
+        # May compact (and renumber) the index, so it runs before rows and columns are looked up
+        blocks = self._column_blocks()
+        columns = [self.vocabulary[t] for t in set(tokenize(query)) if t in self.vocabulary]
+        if not columns:
+            return []
+
+        lengths = np.asarray(self._doc_lengths, dtype=float)
+        live = np.asarray(self._live)
+        avg_length = lengths[live].mean() if live.any() else 1.0
+        doc_count = len(self)
+        doc_freq = np.asarray(self._doc_freq, dtype=float)
+
+        scores = np.zeros(len(self.ids))
+        for column in columns:
+            idf = np.log(1 + (doc_count - doc_freq[column] + 0.5) / (doc_freq[column] + 0.5))
+            for matrix, first_row in blocks:
+                # Terms first seen after a block was built have no entries in it
+                if column >= matrix.shape[1]:
+                    continue
+                start, end = matrix.indptr[column], matrix.indptr[column + 1]
+                rows = matrix.indices[start:end] + first_row
+                tf = matrix.data[start:end].astype(float)
+                norm = tf + self.k1 * (1 - self.b + self.b * lengths[rows] / avg_length)
+                scores[rows] += idf * tf * (self.k1 + 1) / norm
+
+        scores[~live] = 0.0
+        if where:
+            mask = np.array([all(m.get(k) == v for k, v in where.items()) for m in self.metadatas])
+            scores[~mask] = 0.0
+
+        hits = np.flatnonzero(scores > 0)
+        hits = hits[np.argsort(-scores[hits])][:n_results]
+        return [(self.ids[row], float(scores[row])) for row in hits]
+
+    def compact(self):
+        """
+        Drops tombstoned rows and the terms no live document uses any more.
+        Renumbers rows and columns; returns the number of rows dropped.
+        """
+        dead = len(self.ids) - len(self)
+        if not dead:
+            return 0
+
+        keep = np.flatnonzero(self._live)
+        used = np.flatnonzero(np.asarray(self._doc_freq) > 0)
+        matrix = self._consolidated()[keep][:, used].tocsr()
+
+        remap = np.full(len(self.vocabulary), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        self.vocabulary = {term: int(remap[column]) for term, column in self.vocabulary.items() if remap[column] >= 0}
+        self._doc_freq = [self._doc_freq[column] for column in used]
+
+        self.ids = [self.ids[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self._doc_lengths = [self._doc_lengths[row] for row in keep]
+        self._live = [True] * len(self.ids)
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+
+        self._indptr = matrix.indptr.tolist()
+        self._indices = matrix.indices.tolist()
+        self._counts = matrix.data.tolist()
+        self._matrix = matrix
+        self._columns = None
+        self._merged_rows = 0
+        self._delta = None
+        return dead
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        sparse.save_npz(os.path.join(directory, "term_matrix.npz"), self._consolidated())
+        with open(os.path.join(directory, "bm25.json"), "w") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "ids": self.ids,
+                "metadatas": self.metadatas,
+                "vocabulary": self.vocabulary,
+                "live": self._live
+            }, f)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "bm25.json")) as f:
+            meta = json.load(f)
+        matrix = sparse.load_npz(os.path.join(directory, "term_matrix.npz")).tocsr()
+
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.ids = meta["ids"]
+        index.metadatas = meta["metadatas"]
+        index.vocabulary = meta["vocabulary"]
+        index._live = meta["live"]
+        index._id_to_row = {doc_id: row for row, doc_id in enumerate(index.ids) if index._live[row]}
+        index._doc_lengths = np.asarray(matrix.sum(axis=1)).ravel().astype(int).tolist()
+        index._doc_freq = np.bincount(matrix.indices[matrix.data > 0], minlength=len(index.vocabulary)).tolist()
+        index._indptr = matrix.indptr.tolist()
+        index._indices = matrix.indices.tolist()
+        index._counts = matrix.data.tolist()
+        index._matrix = matrix
+        return index
+
+    # --- Internals ---
+
+    def _column(self, term):
+        if term not in self.vocabulary:
+            self.vocabulary[term] = len(self.vocabulary)
+            self._doc_freq.append(0)
+        return self.vocabulary[term]
+
+    def _remove_row(self, row):
+        """Tombstones a row; its terms stop counting towards document frequency."""
+        start, end = self._indptr[row], self._indptr[row + 1]
+        for column in self._indices[start:end]:
+            self._doc_freq[column] -= 1
+        self._counts[start:end] = [0] * (end - start)
+        self._doc_lengths[row] = 0
+        self._live[row] = False
+        # Column copies may keep the old counts: search zeroes dead rows anyway
+        self._matrix = None
+        del self._id_to_row[self.ids[row]]
+
+    def _column_blocks(self):
+        """[(csc_matrix, first_row)]: the merged column matrix, plus a delta for the rows added since."""
+        pending = len(self.ids) - self._merged_rows
+        if self._columns is None or pending > max(DELTA_MERGE_ROWS, DELTA_MERGE_RATIO * self._merged_rows):
+            if len(self.ids) - len(self) > COMPACT_DEAD_RATIO * len(self.ids):
+                self.compact()
+            self._columns = self._consolidated().tocsc()
+            self._merged_rows = len(self.ids)
+            self._delta = None
+            return [(self._columns, 0)]
+        if not pending:
+            return [(self._columns, 0)]
+
+        if self._delta is None:
+            start = self._indptr[self._merged_rows]
+            self._delta = sparse.csr_matrix(
+                (np.asarray(self._counts[start:], dtype=np.int32), np.asarray(self._indices[start:], dtype=np.int64),
+                 np.asarray(self._indptr[self._merged_rows:], dtype=np.int64) - start),
+                shape=(pending, len(self.vocabulary))
+            ).tocsc()
+        return [(self._columns, 0), (self._delta, self._merged_rows)]
+
+    def _consolidated(self):
+        if self._matrix is None:
+            self._matrix = sparse.csr_matrix(
+                (np.asarray(self._counts, dtype=np.int32), np.asarray(self._indices, dtype=np.int64), np.asarray(self._indptr, dtype=np.int64)),
+                shape=(len(self.ids), len(self.vocabulary))
+            )
+        return self._matrix
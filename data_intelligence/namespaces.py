@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import time
+import threading
+import logging
+
+from .db_manager import VectorDBManager
+
+logger = logging.getLogger("EvidenceNamespaces")
+
+
+class EvidenceNamespaces:
+    """
+    Per-dataset evidence collections with leases and TTL garbage collection.
+
+    Each dataset fingerprint gets its own namespace (collection + side indexes), so
+    reopening a known dataset reuses its index and one tenant's reset never touches
+    another's evidence. Sessions hold leases on a namespace; it is only collected once
+    no lease is live and it has been idle for longer than ttl_seconds. The registry is
+    a JSON file next to the DB, so it survives restarts; leases of sessions that died
+    with the process simply expire. Holders renew their lease with touch() on every
+    access; the registry is rewritten at most once per renew_interval per lease.
+    """
+    def __init__(self, db_path="data_intelligence/vector_db", ttl_seconds=24 * 3600, renew_interval=60, **manager_kwargs):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.renew_interval = renew_interval
+        self.manager_kwargs = manager_kwargs
+        self.registry_path = os.path.join(db_path, "namespaces.json")
+        self._lock = threading.Lock()
+        self._managers = {}
+
+        self.registry = {}
+        if os.path.exists(self.registry_path):
+            with open(self.registry_path) as f:
+                self.registry = json.load(f)
+
+    @staticmethod
+    def namespace_for(fingerprint, session_id=None, shared=True):
+        """Shared namespaces are keyed by the dataset alone; private ones also by the session."""
+        key = fingerprint if shared else f"{fingerprint}:{session_id}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+    def acquire(self, fingerprint, session_id, shared=True):
+        """Leases the dataset's namespace for a session and returns its VectorDBManager."""
+        namespace = self.namespace_for(fingerprint, session_id, shared)
+        now = time.time()
+        with self._lock:
+            reused = namespace in self.registry
+            entry = self.registry.setdefault(namespace, {"fingerprint": fingerprint, "created": now, "holders": {}})
+            entry["holders"][session_id] = now
+            entry["last_used"] = now
+            self._save_registry()
+
+            if namespace not in self._managers:
+                self._managers[namespace] = VectorDBManager(db_path=self.db_path, namespace=namespace, **self.manager_kwargs)
+
+        logger.info(f"📚 Namespace {namespace[:8]} {'reused' if reused else 'created'} for session {session_id}")
+        return self._managers[namespace]
+
+    def touch(self, fingerprint, session_id, shared=True):
+        """Renews a session's lease (call on activity so long sessions are not collected)."""
+        namespace = self.namespace_for(fingerprint, session_id, shared)
+        now = time.time()
+        with self._lock:
+            entry = self.registry.get(namespace)
+            if entry is None or session_id not in entry["holders"]:
+                return
+            if now - entry["holders"][session_id] < self.renew_interval:
+                return
+            entry["holders"][session_id] = entry["last_used"] = now
+            self._save_registry()
+
+    def release(self, fingerprint, session_id, shared=True):
+        """Drops a session's lease. The evidence stays until the TTL collector removes it."""
+        namespace = self.namespace_for(fingerprint, session_id, shared)
+        with self._lock:
+            entry = self.registry.get(namespace)
+            if entry is not None and entry["holders"].pop(session_id, None) is not None:
+                entry["last_used"] = time.time()
+                self._save_registry()
+
+    def refcount(self, namespace, now=None):
+        """Number of sessions holding a live (unexpired) lease on the namespace."""
+        now = now if now is not None else time.time()
+        entry = self.registry.get(namespace, {"holders": {}})
+        return sum(1 for seen in entry["holders"].values() if now - seen <= self.ttl_seconds)
+
+    def collect_garbage(self, now=None):
+        """Deletes namespaces with no live lease that have been idle longer than the TTL."""
+        now = now if now is not None else time.time()
+        collected = []
+        with self._lock:
+            for namespace, entry in list(self.registry.items()):
+                if self.refcount(namespace, now) or now - entry.get("last_used", entry["created"]) <= self.ttl_seconds:
+                    continue
+                manager = self._managers.pop(namespace, None)
+                if manager is not None:
+                    manager.drop()
+                else:
+                    # Not opened by this process: delete the storage without loading it
+                    VectorDBManager.drop_namespace(namespace, self.db_path, self.manager_kwargs.get("backend", "chroma"))
+                del self.registry[namespace]
+                collected.append(namespace)
+            if collected:
+                self._save_registry()
+
+        if collected:
+            logger.info(f"🧹 Collected {len(collected)} idle evidence namespaces")
+        return collected
+
+    def stats(self):
+        now = time.time()
+        return {
+            namespace: {
+                "fingerprint": entry["fingerprint"],
+                "refcount": self.refcount(namespace, now),
+                "idle_seconds": round(now - entry.get("last_used", entry["created"]), 1),
+                "open": namespace in self._managers
+            }
+            for namespace, entry in self.registry.items()
+        }
+
+    # --- Internals ---
+
+    def _save_registry(self):
+        os.makedirs(self.db_path, exist_ok=True)
+        with open(self.registry_path, "w") as f:
+            json.dump(self.registry, f, indent=2)
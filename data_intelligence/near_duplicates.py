@@ -0,0 +1,113 @@
+import re
+import zlib
+import numpy as np
+
+# Mersenne prime used for the universal hash family (a * x + b) mod p
+_PRIME = (1 << 31) - 1
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Lowercases and strips punctuation/extra whitespace so trivial variants shingle identically."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", str(text).lower())).strip()
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash + LSH banding index over short verbatims.
+
+    Each text is reduced to a MinHash signature over character shingles. Signatures are
+    split into bands; texts sharing any band bucket become candidates, and a candidate
+    is accepted as a near-duplicate when the estimated Jaccard similarity reaches
+    'threshold'. Accepted texts are folded into the first-seen representative, whose
+    weight counts how many inputs it stands for.
+    """
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, shingle_size=3, seed=42):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+        self.representatives = []   # [{"key", "text", "weight"}]
+        self._signatures = []
+        self._buckets = [{} for _ in range(bands)]
+        self._exact = {}
+
+    def __len__(self):
+        return len(self.representatives)
+
+    def signature(self, text):
+        """MinHash signature (num_perm,) of the text's character shingles."""
+        normalized = normalize_text(text)
+        k = self.shingle_size
+        shingles = {normalized[i:i + k] for i in range(max(len(normalized) - k + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p stays below 2**63 because a < 2**31 and x < 2**32
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def add(self, text, key=None, weight=1):
+        """
+        Adds a text and returns (representative_index, is_new).
+        Near-duplicates increase the weight of an existing representative instead.
+        """
+        normalized = normalize_text(text)
+        if normalized in self._exact:
+            match = self._exact[normalized]
+            self.representatives[match]["weight"] += weight
+            return match, False
+
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+
+        match = self._best_candidate(signature, band_keys)
+        if match is not None:
+            self.representatives[match]["weight"] += weight
+            self._exact[normalized] = match
+            return match, False
+
+        position = len(self.representatives)
+        self.representatives.append({"key": key, "text": text, "weight": weight})
+        self._signatures.append(signature)
+        self._exact[normalized] = position
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band].setdefault(band_key, []).append(position)
+        return position, True
+
+    def _band_keys(self, signature):
+        rows = self.rows_per_band
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def _best_candidate(self, signature, band_keys):
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+
+
+def collapse_near_duplicates(texts, threshold=0.7, **index_kwargs):
+    """
+    Collapses near-identical texts into weighted representatives.
+
+    Returns (representatives, assignments): representatives is a list of
+    {"text", "weight"} dicts, and assignments maps each input position to the index
+    of the representative that stands for it.
+    """
+    index = NearDuplicateIndex(threshold=threshold, **index_kwargs)
+    assignments = [index.add(text)[0] for text in texts]
+    representatives = [{"text": rep["text"], "weight": rep["weight"]} for rep in index.representatives]
+    return representatives, assignments
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger("SegmentPartitions")
+
+
+class SegmentPartitions:
+    """
+    One sub-collection per value of a metadata key (default 'segment'), kept next to the
+    global collection. Filtered queries on that key search only their partition instead
+    of filtering the whole corpus. The value -> collection map is stored in a small JSON
+    registry so partitions are found again after a restart.
+
+    Cost: every partitioned record's vector is stored twice (global + partition).
+    Partitions hold ids and vectors only; documents and metadata stay in the global
+    collection and are fetched from there by id. Partition queries therefore return
+    ids and distances only.
+    """
+    def __init__(self, backend, base_name, key, embedding_function, registry_path):
+        self.backend = backend
+        self.base_name = base_name
+        self.key = key
+        self.embedding_function = embedding_function
+        self.registry_path = registry_path
+        self._collections = {}
+
+        self.registry = {}
+        if os.path.exists(registry_path):
+            with open(registry_path) as f:
+                self.registry = json.load(f)
+
+    def __len__(self):
+        return len(self.registry)
+
+    def routes(self, where):
+        """True when a filter can be answered by a single partition."""
+        return bool(where) and list(where) == [self.key]
+
+    def collection_for(self, value, create=False):
+        """The partition collection for a value, or None if it does not exist (and create is False)."""
+        value_key = json.dumps(value)
+        if value_key not in self.registry:
+            if not create:
+                return None
+            self.registry[value_key] = self._collection_name(value_key)
+            self._save_registry()
+
+        name = self.registry[value_key]
+        if name not in self._collections:
+            self._collections[name] = self.backend.get_or_create_collection(
+                name=name, embedding_function=self.embedding_function
+            )
+        return self._collections[name]
+
+    def add(self, ids, embeddings, metadatas, global_collection=None):
+        """
+        Routes evidence to the partition of its key value (rows without the key stay global-only).
+        With global_collection, re-added ids whose key value changed are first removed from their
+        previous partition; it must then run before the global collection is upserted.
+        """
+        if global_collection is not None:
+            self._remove_moved(ids, metadatas, global_collection)
+
+        groups = {}
+        for row, metadata in enumerate(metadatas):
+            if metadata and self.key in metadata:
+                groups.setdefault(json.dumps(metadata[self.key]), []).append(row)
+
+        for value_key, rows in groups.items():
+            collection = self.collection_for(json.loads(value_key), create=True)
+            collection.upsert(ids=[ids[r] for r in rows], embeddings=np.asarray(embeddings)[rows])
+
+    def update(self, ids, metadata_list, global_collection):
+        """
+        Applies metadata updates. Must run before the global collection is updated, since
+        it reads the current metadata there to detect rows that move between partitions.
+        """
+        current = global_collection.get(ids=list(ids), include=["metadatas"])
+        old_by_id = dict(zip(current["ids"], current["metadatas"] or []))
+
+        moved = []
+        for doc_id, metadata in zip(ids, metadata_list):
+            if doc_id not in old_by_id:
+                continue
+            old = old_by_id[doc_id] or {}
+            new = {**old, **(metadata or {})}
+            if old.get(self.key) == new.get(self.key):
+                continue
+
+            self._remove_from(doc_id, old)
+            if self.key in new:
+                moved.append((doc_id, new))
+
+        if moved:
+            stored = global_collection.get(ids=[doc_id for doc_id, _ in moved], include=["embeddings"])
+            embedding_by_id = dict(zip(stored["ids"], stored["embeddings"]))
+            self.add([doc_id for doc_id, _ in moved], [embedding_by_id[doc_id] for doc_id, _ in moved], [new for _, new in moved])
+
+    def backfill(self, global_collection, page_size=5000):
+        """Builds every partition from the global collection (used when partitioning is first enabled)."""
+        total = global_collection.count()
+        for offset in range(0, total, page_size):
+            page = global_collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            if len(page["ids"]):
+                self.add(page["ids"], page["embeddings"], page["metadatas"])
+        logger.info(f"🧩 Partitioned {total} records by '{self.key}' into {len(self)} partitions")
+
+    def drop_all(self):
+        for name in self.registry.values():
+            try:
+                self.backend.delete_collection(name=name)
+            except Exception as e:
+                logger.warning(f"Could not delete partition {name}: {e}")
+        self.registry = {}
+        self._collections = {}
+        self._save_registry()
+
+    # --- Internals ---
+
+    def _remove_moved(self, ids, metadatas, global_collection):
+        """Drops stored ids from their old partition when the incoming metadata changes their key value."""
+        current = global_collection.get(ids=list(ids), include=["metadatas"])
+        incoming = dict(zip(ids, metadatas))
+        for doc_id, old in zip(current["ids"], current["metadatas"] or []):
+            old = old or {}
+            new = incoming[doc_id] or {}
+            if self.key in old and old.get(self.key) != new.get(self.key):
+                self._remove_from(doc_id, old)
+
+    def _remove_from(self, doc_id, old_metadata):
+        if self.key in old_metadata:
+            previous = self.collection_for(old_metadata[self.key])
+            if previous is not None:
+                previous.delete(ids=[doc_id])
+
+    def _collection_name(self, value_key):
+        # Collection names must be short and alphanumeric, so values are hashed
+        digest = hashlib.sha256(f"{self.key}={value_key}".encode("utf-8")).hexdigest()[:16]
+        return f"{self.base_name}-part-{digest}"
+
+    def _save_registry(self):
+        os.makedirs(os.path.dirname(self.registry_path) or ".", exist_ok=True)
+        with open(self.registry_path, "w") as f:
+            json.dump(self.registry, f, indent=2)
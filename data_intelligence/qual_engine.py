@@ -1,24 +1,107 @@
+import re
+from functools import lru_cache
 from textblob import TextBlob
-from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import CountVectorizer
 import numpy as np
+import pandas as pd
 import logging
+from scipy import sparse
+
+from .quantized_index import QuantizedVectorIndex
+from .near_duplicates import collapse_near_duplicates
+from .embedding_service import get_embedding_service
 
 # Configure logger
 logger = logging.getLogger("QualEngine")
 
+# Polarity lexicon for the vectorized pain scorer (-1 = critical pain, +1 = delight).
+# Tuned for B2C verbatims: price resistance, product failure and distrust language.
+PAIN_LEXICON = {
+    # Critical pain / failure
+    "nothing works": -0.9, "doesn't work": -0.8, "not working": -0.8, "useless": -0.8,
+    "worst": -1.0, "terrible": -0.9, "awful": -0.9, "horrible": -0.9, "hate": -0.8,
+    "waste": -0.7, "scam": -0.9, "gimmick": -0.6, "gimmicks": -0.6, "fake": -0.7,
+    "disappointed": -0.6, "frustrated": -0.7, "frustrating": -0.7, "annoying": -0.5,
+    "broken": -0.6, "failed": -0.6, "fails": -0.6, "problem": -0.4, "issue": -0.3,
+    "loss": -0.5, "hairfall": -0.4, "thinning": -0.5, "dandruff": -0.4, "itchy": -0.5,
+    "dry": -0.3, "damage": -0.6, "damaged": -0.6, "causes": -0.2, "side effects": -0.7,
+    # Price resistance
+    "expensive": -0.5, "too expensive": -0.7, "overpriced": -0.7, "costly": -0.5,
+    "pricey": -0.4, "not worth": -0.7,
+    # Relief / delight
+    "good": 0.5, "great": 0.7, "love": 0.8, "excellent": 0.9, "amazing": 0.8,
+    "stopped": 0.3, "helps": 0.4, "helped": 0.4,
+    "natural": 0.2, "prefer": 0.2, "happy": 0.6, "recommend": 0.6, "affordable": 0.5,
+}
+
+# Polarity below this threshold is treated as critical pain (matches the TextBlob cut-off).
+PAIN_POLARITY_THRESHOLD = -0.3
+
+# Negators reverse (and soften) the polarity of lexicon terms in the next NEGATION_SCOPE
+# tokens: "not good", "no hairfall", "never happy". Punctuation closes the scope early.
+NEGATORS = {"not", "no", "never", "without", "don't", "doesn't", "didn't", "isn't", "wasn't", "won't", "can't"}
+NEGATION_SCOPE = 3
+NEGATION_FACTOR = -0.75
+
+# Punctuation is kept as tokens so bigrams never span a sentence break
+_LEXICON_TOKEN_PATTERN = r"[\w']+|[.,;:!?]"
+_NEGATED = "not_"
+# A negator and the words after it, up to the next punctuation mark
+_NEGATION_RUN = re.compile(
+    r"(?<![\w'])(?:" + "|".join(re.escape(n) for n in sorted(NEGATORS, key=len, reverse=True)) + r")(?![\w'])(?:[^\S\n]+[\w']+)+"
+)
+
 class QualEvidenceEngine:
-    def __init__(self):
+    def __init__(self, embedding_storage="float32"):
         """
         Initializes NLP model for semantic clustering and evidence extraction.
+        embedding_storage ('float32', 'float16' or 'int8') sets how evidence indexes hold vectors.
         """
+        self.embedding_storage = embedding_storage
         self.model = None
         try:
-            # We use a lightweight model for speed
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("✅ NLP Model Loaded: all-MiniLM-L6-v2")
+            # We use a lightweight model for speed, shared with the Vector DB (one copy per process)
+            self.model = get_embedding_service()
+            self.model.register_consumer("QualEvidenceEngine")
+            logger.info(f"✅ NLP Model Loaded: all-MiniLM-L6-v2 ({self.model.dimension} dims)")
         except Exception as e:
-            logger.error(f"⚠️ Warning: SentenceTransformer model failed to load: {e}")
+            self.model = None
+            logger.error(f"⚠️ Warning: embedding model failed to load: {e}")
+
+    # =========================================================================
+    # 🗂️ EVIDENCE INDEX (Compact Embedding Storage)
+    # =========================================================================
+
+    def build_evidence_index(self, verbatims, ids=None, batch_size=1024, full_precision_path=None, rerank=True):
+        """
+        Embeds verbatims batch by batch into a compact QuantizedVectorIndex, so the full
+        float32 matrix is never held at once. Pass 'full_precision_path' to keep the
+        re-ranking vectors on disk instead of in memory.
+        """
+        if not self.model:
+            return None
+
+        ids = ids if ids is not None else [str(i) for i in range(len(verbatims))]
+        index = QuantizedVectorIndex(
+            self.model.dimension,
+            dtype=self.embedding_storage,
+            rerank=rerank,
+            full_precision_path=full_precision_path
+        )
+        for start in range(0, len(verbatims), batch_size):
+            batch = verbatims[start:start + batch_size]
+            index.add(ids[start:start + batch_size], self.model.encode(batch), [{"text": t} for t in batch])
+
+        logger.info(f"🗂️ Evidence index built: {len(index)} verbatims, {index.memory_bytes() / 1e6:.1f} MB resident")
+        return index
+
+    def find_supporting_verbatims(self, index, query, n_results=3):
+        """Returns the verbatims in 'index' closest to 'query', with similarity scores."""
+        if not self.model or index is None:
+            return []
+        hits = index.search(self.model.encode([query]), n_results=n_results)[0]
+        return [{"quote": index.get_metadata(vid)["text"], "similarity": round(score, 3)} for vid, score in hits]
 
     # =========================================================================
     # 🗣️ GOAL 1: CONSUMER PROBLEM & DEMAND VALIDATION
@@ -33,16 +116,21 @@ class QualEvidenceEngine:
             return [{"problem": "NLP Model Unavailable", "frequency": 0.0}]
             
         try:
-            embeddings = self.model.encode(verbatims)
-            num_clusters = min(len(verbatims), 3)
+            # Near-duplicates are embedded once and carried as cluster weights
+            representatives, _ = collapse_near_duplicates(verbatims)
+            texts = [rep["text"] for rep in representatives]
+            weights = np.array([rep["weight"] for rep in representatives], dtype=float)
+
+            embeddings = self.model.encode(texts)
+            num_clusters = min(len(texts), 3)
             if num_clusters < 1:
                 return []
 
-            kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init=10).fit(embeddings)
+            kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init=10).fit(embeddings, sample_weight=weights)
             
             problems = []
             for i in range(num_clusters):
-                freq = np.mean(kmeans.labels_ == i)
+                freq = weights[kmeans.labels_ == i].sum() / weights.sum()
                 problems.append({"problem": f"Problem Theme {i+1}", "frequency": float(freq)})
             
             return problems
@@ -50,20 +138,79 @@ class QualEvidenceEngine:
             logger.error(f"Clustering error: {e}")
             return [{"problem": "Error during clustering", "frequency": 0.0}]
 
-    def score_pain_intensity(self, text):
-        """Uses sentiment and markers to separate minor annoyances from critical pain."""
-        if not text:
+    def score_pain_intensity(self, text, mode="lexicon"):
+        """
+        Uses sentiment and markers to separate minor annoyances from critical pain.
+        Lists are scored per verbatim and aggregated, instead of scoring the list's repr.
+        """
+        if text is None or len(text) == 0:
             return {"pain_severity_signal": "Unknown", "demand_authenticity": "Weak"}
 
-        analysis = TextBlob(str(text))
-        intensity = "High" if analysis.sentiment.polarity < -0.3 else "Low"
-        
+        verbatims = [text] if isinstance(text, str) else list(text)
+        polarities = self.score_sentiment_batch(verbatims, mode=mode)
+        polarity = float(np.mean(polarities))
+        high_pain_share = float(np.mean(polarities < PAIN_POLARITY_THRESHOLD))
+        intensity = "High" if polarity < PAIN_POLARITY_THRESHOLD else "Low"
+
         return {
             "pain_severity_signal": intensity, 
             "demand_authenticity": "Strong" if intensity == "High" else "Weak",
-            "sentiment_score": round(analysis.sentiment.polarity, 2)
+            "sentiment_score": round(polarity, 2),
+            "high_pain_share": round(high_pain_share, 2)
         }
 
+    def score_sentiment_batch(self, verbatims, mode="lexicon"):
+        """
+        Scores every verbatim and returns a polarity array aligned to the input.
+        Identical verbatims are scored once. 'lexicon' is the fast path;
+        'textblob' is the slower, more accurate mode.
+        """
+        if verbatims is None or len(verbatims) == 0:
+            return np.array([], dtype=float)
+
+        texts = pd.Series(verbatims, dtype="object").fillna("").astype(str).str.lower()
+        codes, unique_texts = pd.factorize(texts)
+
+        if mode == "textblob":
+            unique_scores = np.array([TextBlob(t).sentiment.polarity for t in unique_texts], dtype=float)
+        elif mode == "lexicon":
+            unique_scores = self._score_lexicon(list(unique_texts))
+        else:
+            raise ValueError(f"Unknown sentiment mode: {mode}")
+
+        return unique_scores[codes]
+
+    def _score_lexicon(self, texts):
+        """
+        Mean polarity of the lexicon terms in each text, computed on a sparse term matrix.
+        Words inside a negation scope are rewritten to not_<word> features (reversed
+        polarity), and a matched bigram ("too expensive") counts instead of its unigrams.
+        """
+        vectorizer, weights, cover = _lexicon_model()
+        term_matrix = vectorizer.transform([_NEGATION_RUN.sub(_negate_run, text) for text in texts])
+
+        # Bigram precedence: unigram occurrences inside a matched bigram are taken back out
+        term_matrix = (term_matrix - term_matrix @ cover).tocsr()
+        term_matrix.data = np.maximum(term_matrix.data, 0)
+
+        hits = np.asarray(term_matrix.sum(axis=1)).ravel()
+        totals = term_matrix @ weights
+        scores = np.divide(totals, hits, out=np.zeros_like(totals, dtype=float), where=hits > 0)
+        return np.clip(scores, -1.0, 1.0)
+
+    def attach_pain_scores(self, df, text_column="feedback_text", mode="lexicon"):
+        """
+        Writes per-row 'sentiment_score' and 'pain_score' (0 = no pain, 1 = critical)
+        back onto the DataFrame so the Quant Engine can aggregate pain by segment.
+        """
+        if text_column not in df.columns:
+            return df
+
+        polarities = self.score_sentiment_batch(df[text_column].tolist(), mode=mode)
+        df["sentiment_score"] = np.round(polarities, 3)
+        df["pain_score"] = np.round(np.where(polarities < 0, np.minimum(-polarities, 1.0), 0.0), 3)
+        return df
+
     def classify_problem_market_fit(self, pain_freq, workaround_usage):
         """Assesses 'Must-have' potential based on workaround usage and pain frequency."""
         is_must_have = workaround_usage or (pain_freq > 0.5)
@@ -232,4 +379,54 @@ class QualEvidenceEngine:
     def identify_pre_churn_patterns(self): pass
     def segment_users_behaviorally(self): pass
     def evaluate_relevance_exposure(self): pass
-    def evaluate_lock_in_ethics(self): pass
\ No newline at end of file
+    def evaluate_lock_in_ethics(self): pass
+
+
+def _negate_run(match):
+    """Prefixes the NEGATION_SCOPE words after each negator with not_ (negated lexicon phrases stay as they are)."""
+    words = match.group(0).split()
+    out, scope = [], 0
+    for position, word in enumerate(words):
+        following = words[position + 1] if position + 1 < len(words) else None
+        if word in NEGATORS and f"{word} {following}" not in PAIN_LEXICON:
+            out.append(word)
+            scope = NEGATION_SCOPE
+        elif scope:
+            out.append(_NEGATED + word)
+            scope -= 1
+        else:
+            out.append(word)
+    return " ".join(out)
+
+
+@lru_cache(maxsize=1)
+def _lexicon_model():
+    """
+    (vectorizer, weights, cover) for the lexicon scorer. Features are the lexicon terms
+    plus their negated forms; cover maps each bigram feature to the unigram features
+    it contains, so their counts can be subtracted.
+    """
+    weighted = {}
+    for term, polarity in PAIN_LEXICON.items():
+        weighted[term] = polarity
+        parts = term.split()
+        # Fully negated, or a bigram whose first word closes the negation scope
+        weighted[" ".join(_NEGATED + part for part in parts)] = polarity * NEGATION_FACTOR
+        if len(parts) == 2:
+            weighted[f"{_NEGATED}{parts[0]} {parts[1]}"] = polarity * NEGATION_FACTOR
+
+    features = sorted(weighted)
+    column = {feature: position for position, feature in enumerate(features)}
+    rows, cols = [], []
+    for feature in features:
+        parts = feature.split()
+        if len(parts) == 2:
+            for part in parts:
+                if part in column:
+                    rows.append(column[feature])
+                    cols.append(column[part])
+    cover = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(len(features), len(features)))
+
+    vectorizer = CountVectorizer(vocabulary=features, ngram_range=(1, 2), token_pattern=_LEXICON_TOKEN_PATTERN)
+    weights = np.array([weighted[feature] for feature in features])
+    return vectorizer, weights, cover
@@ -18,6 +18,23 @@ class QuantInsightEngine:
         except Exception:
             return None
 
+    def aggregate_pain_by_segment(self, df, segment_column, pain_column="pain_score"):
+        """
+        Aggregates per-row pain scores (written by the Qual Engine) by segment.
+        Returns segments ranked by mean pain, highest first.
+        """
+        if segment_column not in df.columns or pain_column not in df.columns:
+            return {}
+
+        grouped = df.groupby(segment_column)[pain_column]
+        summary = pd.DataFrame({
+            "respondents": grouped.size(),
+            "mean_pain": grouped.mean().round(3),
+            "high_pain_share": grouped.apply(lambda s: (s > 0.3).mean()).round(3)
+        }).sort_values("mean_pain", ascending=False)
+
+        return summary.to_dict(orient="index")
+
     # =========================================================================
     # 🧪 GOAL 1: LAUNCH RESEARCH
     # =========================================================================
@@ -0,0 +1,338 @@
+import json
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger("QuantizedIndex")
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+# int8 rows stay float32 until this many vectors are available to calibrate the quantizer
+MIN_TRAIN_SIZE = 256
+# Rows sampled (reservoir-style, uniformly) when the quantizer is recalibrated
+RETRAIN_SAMPLE_SIZE = 10000
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension int8 scalar quantizer.
+    Each dimension is mapped linearly from its observed [min, max] range onto [-128, 127].
+    """
+    def __init__(self):
+        self.offset = None
+        self.scale = None
+
+    @property
+    def is_trained(self):
+        return self.scale is not None
+
+    def train(self, vectors):
+        """Learns the per-dimension range from a sample of vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        # Small margin so vectors added after training are not clipped too hard
+        margin = (high - low) * 0.05
+        low, high = low - margin, high + margin
+        self.offset = low
+        self.scale = np.maximum((high - low) / 255.0, 1e-8).astype(np.float32)
+
+    def encode(self, vectors):
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes):
+        return (codes.astype(np.float32) + 128) * self.scale + self.offset
+
+
+class QuantizedVectorIndex:
+    """
+    Compact in-memory vector index for candidate search (cosine similarity).
+
+    Vectors are held as float16 or int8 codes. When 'rerank' is on, the top candidates
+    are re-scored against full-precision vectors; those live in a float32 file on disk
+    (read through np.memmap) when 'full_precision_path' is given, so only the touched
+    rows are paged in.
+
+    int8 calibration: vectors are kept as float32 until `min_train_size` of them
+    have arrived, then the quantizer is trained on all of them and they are encoded.
+    Whenever the index doubles in size after that, the quantizer is retrained on a
+    uniform sample of the full-precision rows and every row is re-encoded (needs
+    rerank, which is what keeps the full-precision rows).
+    """
+    def __init__(self, dim, dtype="int8", rerank=True, full_precision_path=None, min_train_size=MIN_TRAIN_SIZE):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}. Use one of {SUPPORTED_DTYPES}")
+
+        self.dim = dim
+        self.dtype = dtype
+        self.rerank = rerank
+        self.full_precision_path = full_precision_path
+        self.quantizer = ScalarQuantizer() if dtype == "int8" else None
+        self.min_train_size = min_train_size
+        # Rows the quantizer was last trained with, and float32 rows awaiting calibration
+        self._trained_on = 0
+        self._pending = []
+
+        self.ids = []
+        self.metadatas = []
+        self._id_to_row = {}
+        self._blocks = []
+        self._codes = np.empty((0, dim), dtype=self._storage_dtype)
+        self._full_blocks = []
+        self._full = np.empty((0, dim), dtype=np.float32)
+
+    @property
+    def _storage_dtype(self):
+        return {"float32": np.float32, "float16": np.float16, "int8": np.int8}[self.dtype]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_metadata(self, vector_id):
+        return self.metadatas[self._id_to_row[vector_id]]
+
+    def add(self, ids, vectors, metadatas=None):
+        """
+        Normalizes, quantizes and appends vectors. Ids already in the index are replaced
+        in place (vector and metadata). Returns the number of new rows.
+        """
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        metadatas = metadatas if metadatas is not None else [{} for _ in ids]
+
+        # Last occurrence wins for ids repeated inside the batch, as with upsert
+        latest = {vid: i for i, vid in enumerate(ids)}
+        existing = [i for vid, i in latest.items() if vid in self._id_to_row]
+        if existing:
+            self._replace([self._id_to_row[ids[i]] for i in existing], vectors[existing], [metadatas[i] for i in existing])
+
+        keep = [i for vid, i in latest.items() if vid not in self._id_to_row]
+        if not keep:
+            return 0
+        vectors = vectors[keep]
+
+        for i in keep:
+            self._id_to_row[ids[i]] = len(self.ids)
+            self.ids.append(ids[i])
+            self.metadatas.append(metadatas[i] or {})
+
+        if self.rerank:
+            if self.full_precision_path:
+                with open(self.full_precision_path, "ab") as f:
+                    f.write(vectors.tobytes())
+            else:
+                self._full_blocks.append(vectors)
+
+        if self.quantizer is not None and not self.quantizer.is_trained:
+            self._pending.append(vectors)
+            if len(self) >= self.min_train_size:
+                self._calibrate(np.concatenate(self._pending))
+        else:
+            self._blocks.append(self._encode(vectors))
+            if self.quantizer is not None and self.rerank and len(self) >= 2 * self._trained_on:
+                self._recalibrate()
+
+        return len(keep)
+
+    def update_metadata(self, ids, metadatas):
+        """Merges new metadata into existing entries (unknown ids are ignored)."""
+        for doc_id, metadata in zip(ids, metadatas):
+            if doc_id in self._id_to_row:
+                self.metadatas[self._id_to_row[doc_id]].update(metadata or {})
+
+    def search(self, query_vectors, n_results=3, where=None, rerank_factor=4):
+        """
+        Returns one list of (id, score) pairs per query, best first.
+        'where' is an equality filter on metadata, e.g. {"segment": "Gen Z"}.
+        """
+        queries = _normalize(np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dim))
+        if len(self) == 0:
+            return [[] for _ in range(len(queries))]
+
+        codes = self._consolidated_codes()
+        mask = self._filter_mask(where)
+        candidate_count = n_results * rerank_factor if self.rerank else n_results
+
+        results = []
+        for query in queries:
+            scores = self._approximate_scores(codes, query)
+            if mask is not None:
+                scores = np.where(mask, scores, -np.inf)
+
+            top = _top_k(scores, candidate_count)
+            top = top[np.isfinite(scores[top])]
+
+            if self.rerank and len(top):
+                exact = self._full_precision_rows(top) @ query
+                order = np.argsort(-exact)[:n_results]
+                top, top_scores = top[order], exact[order]
+            else:
+                top = top[:n_results]
+                top_scores = scores[top]
+
+            results.append([(self.ids[row], float(score)) for row, score in zip(top, top_scores)])
+        return results
+
+    def memory_bytes(self):
+        """Resident bytes held for search (full-precision rows on disk are not counted)."""
+        resident = self._consolidated_codes().nbytes
+        if self.rerank and not self.full_precision_path:
+            resident += sum(block.nbytes for block in self._full_blocks) + self._full.nbytes
+        if self.quantizer is not None and self.quantizer.is_trained:
+            resident += self.quantizer.offset.nbytes + self.quantizer.scale.nbytes
+        return resident
+
+    def save(self, directory):
+        """Persists codes, quantizer and id/metadata table into 'directory'."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "codes.npy"), self._consolidated_codes())
+        if self.quantizer is not None and self.quantizer.is_trained:
+            np.save(os.path.join(directory, "quantizer.npy"), np.stack([self.quantizer.offset, self.quantizer.scale]))
+        # (an uncalibrated int8 index saves its float32 rows as codes.npy)
+        if self.rerank and not self.full_precision_path:
+            np.save(os.path.join(directory, "full.npy"), self._full_precision_rows(None))
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "dtype": self.dtype,
+                "rerank": self.rerank,
+                "full_precision_path": self.full_precision_path,
+                "ids": self.ids,
+                "metadatas": self.metadatas,
+                "min_train_size": self.min_train_size,
+                "trained_on": self._trained_on
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Loads an index written by save(). Codes are memory-mapped by default."""
+        with open(os.path.join(directory, "index.json")) as f:
+            meta = json.load(f)
+
+        index = cls(meta["dim"], meta["dtype"], meta["rerank"], meta["full_precision_path"], meta.get("min_train_size", MIN_TRAIN_SIZE))
+        index.ids = meta["ids"]
+        index.metadatas = meta["metadatas"]
+        index._id_to_row = {vid: row for row, vid in enumerate(index.ids)}
+        index._trained_on = meta.get("trained_on", len(index.ids))
+        codes = np.load(os.path.join(directory, "codes.npy"), mmap_mode="r" if mmap else None)
+
+        quantizer_path = os.path.join(directory, "quantizer.npy")
+        if index.quantizer is not None and os.path.exists(quantizer_path):
+            index.quantizer.offset, index.quantizer.scale = np.load(quantizer_path)
+            index._codes = codes
+        elif index.quantizer is not None:
+            # Saved before calibration: the rows are still float32
+            index._pending = [np.asarray(codes, dtype=np.float32)] if len(codes) else []
+        else:
+            index._codes = codes
+
+        full_path = os.path.join(directory, "full.npy")
+        if os.path.exists(full_path):
+            index._full = np.load(full_path, mmap_mode="r" if mmap else None)
+        return index
+
+    # --- Internals ---
+
+    def _encode(self, vectors):
+        if self.quantizer is not None:
+            return self.quantizer.encode(vectors)
+        return vectors.astype(self._storage_dtype)
+
+    def _replace(self, rows, vectors, metadatas):
+        """Overwrites stored rows (codes, full-precision vectors, metadata) with new values."""
+        rows = np.asarray(rows)
+        for row, metadata in zip(rows, metadatas):
+            self.metadatas[row] = metadata or {}
+
+        if self.rerank:
+            if self.full_precision_path:
+                full = np.memmap(self.full_precision_path, dtype=np.float32, mode="r+").reshape(-1, self.dim)
+                full[rows] = vectors
+                full.flush()
+            else:
+                self._full_precision_rows(None)
+                self._full = _writable(self._full)
+                self._full[rows] = vectors
+
+        codes = self._consolidated_codes()
+        if self._pending:
+            self._pending = [_writable(codes)]
+            self._pending[0][rows] = vectors
+        else:
+            self._codes = _writable(codes)
+            self._codes[rows] = self._encode(vectors)
+
+    def _calibrate(self, sample):
+        """Trains the quantizer on `sample` and encodes every pending float32 row."""
+        self.quantizer.train(sample)
+        self._trained_on = len(self)
+        self._blocks = [self._encode(block) for block in self._pending]
+        self._pending = []
+        self._codes = np.empty((0, self.dim), dtype=np.int8)
+        logger.info(f"📐 int8 quantizer calibrated on {len(sample)} vectors")
+
+    def _recalibrate(self, chunk_size=65536):
+        """Retrains on a uniform sample of the full-precision rows and re-encodes them all."""
+        full = self._full_precision_rows(None)
+        sample_rows = np.sort(np.random.default_rng().choice(len(full), size=min(len(full), RETRAIN_SAMPLE_SIZE), replace=False))
+        self.quantizer.train(full[sample_rows])
+        self._trained_on = len(self)
+        self._blocks = []
+        self._codes = np.concatenate([self._encode(full[start:start + chunk_size]) for start in range(0, len(full), chunk_size)])
+        logger.info(f"📐 int8 quantizer recalibrated at {len(full)} vectors")
+
+    def _consolidated_codes(self):
+        if self._pending:
+            # Not calibrated yet: search the float32 rows directly
+            if len(self._pending) > 1:
+                self._pending = [np.concatenate(self._pending)]
+            return self._pending[0]
+        if self._blocks:
+            self._codes = np.concatenate([np.asarray(self._codes)] + self._blocks)
+            self._blocks = []
+        return self._codes
+
+    def _approximate_scores(self, codes, query, chunk_size=65536):
+        """Dot products against stored codes, chunked to avoid a full float32 copy."""
+        if self.quantizer is not None and self.quantizer.is_trained:
+            # q . (code * scale + offset) == code . (q * scale) + q . offset
+            scaled_query = query * self.quantizer.scale
+            bias = float(query @ (self.quantizer.offset + 128 * self.quantizer.scale))
+        else:
+            scaled_query, bias = query, 0.0
+
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), chunk_size):
+            chunk = codes[start:start + chunk_size].astype(np.float32)
+            scores[start:start + chunk_size] = chunk @ scaled_query + bias
+        return scores
+
+    def _full_precision_rows(self, rows):
+        if self.full_precision_path:
+            full = np.memmap(self.full_precision_path, dtype=np.float32, mode="r").reshape(-1, self.dim)
+        else:
+            if self._full_blocks:
+                self._full = np.concatenate([np.asarray(self._full)] + self._full_blocks)
+                self._full_blocks = []
+            full = self._full
+        return np.asarray(full if rows is None else full[rows])
+
+    def _filter_mask(self, where):
+        if not where:
+            return None
+        return np.array([all(m.get(k) == v for k, v in where.items()) for m in self.metadatas])
+
+
+def _writable(array):
+    """The array itself, or an in-memory copy when it is a read-only memory map."""
+    return array if array.flags.writeable else np.array(array)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores, k):
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
@@ -0,0 +1,76 @@
+import copy
+import re
+import threading
+from collections import OrderedDict
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a query, used as the cache key."""
+    return _SPACES.sub(" ", str(query)).strip().lower()
+
+
+class RetrievalCache:
+    """
+    LRU cache for evidence query results, versioned against the collection.
+
+    Each entry remembers the collection write-version it was computed at. A lookup
+    at a newer version drops the stale entry and counts as a miss, so any write to
+    the collection invalidates earlier results without a full scan.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(kind, query, where=None, n_results=3):
+        filter_key = tuple(sorted(where.items())) if where else ()
+        return (kind, normalize_query(query), filter_key, n_results)
+
+    def get(self, key, version):
+        """Returns a copy of the cached result, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry_version, result = entry
+            if entry_version != version:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(result)
+
+    def put(self, key, version, result):
+        with self._lock:
+            self._entries[key] = (version, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -1,13 +1,21 @@
+import os
+import pandas as pd
 from langchain_core.tools import StructuredTool
 from .quant_engine import QuantInsightEngine
 from .qual_engine import QualEvidenceEngine
 from .synthesis_engine import SynthesisEngine
 from .canonical_system import CanonicalDataSystem
 from .db_manager import VectorDBManager
+from .namespaces import EvidenceNamespaces
 
 # --- 1. INITIALIZATION ---
-db_manager = VectorDBManager()
-canonical = CanonicalDataSystem(db_manager)
+# Segment partitions are opt-in (e.g. EVIDENCE_PARTITION_KEY=segment): they store every vector
+# a second time and only pay off when the evidence actually carries that metadata key
+EVIDENCE_PARTITION_KEY = os.getenv("EVIDENCE_PARTITION_KEY") or None
+db_manager = VectorDBManager(partition_key=EVIDENCE_PARTITION_KEY)
+# Each uploaded dataset's evidence lives in its own namespace; idle ones are collected after the TTL
+namespaces = EvidenceNamespaces(partition_key=EVIDENCE_PARTITION_KEY)
+canonical = CanonicalDataSystem(db_manager, namespaces=namespaces)
 quant_engine = QuantInsightEngine(context=canonical.internal_object.get("context"))
 qual_engine = QualEvidenceEngine()
 synthesis_engine = SynthesisEngine(context=canonical.internal_object.get("context"))
@@ -28,7 +36,7 @@ def analyze_trends_and_timing(trend_index: float, penetration: float):
 def score_problem_market_fit(pain_freq: float, workaround_usage: bool, verbatims: list):
     """Validates demand using problem frequency, pain intensity, and core problems."""
     problems = qual_engine.extract_core_problems(verbatims)
-    pain = qual_engine.score_pain_intensity(str(verbatims))
+    pain = qual_engine.score_pain_intensity(verbatims)
     pmf = qual_engine.classify_problem_market_fit(pain_freq, workaround_usage)
     return {"pmf": pmf, "pain_scores": pain, "core_problems": problems}
 
@@ -40,7 +48,15 @@ def identify_early_adopters(pain_level: float, openness: float, user_data: list)
     """Identifies segments and early adopters."""
     segments = qual_engine.segment_users_multilayer(user_data)
     icp = qual_engine.identify_early_adopters(pain_level, openness)
-    return {"segments": segments, "early_adopter_profile": icp}
+
+    # Respondent rows with 'feedback_text' and 'segment': rank segments by measured pain
+    rows = [row for row in user_data if isinstance(row, dict)]
+    pain_by_segment = {}
+    if rows:
+        respondents = qual_engine.attach_pain_scores(pd.DataFrame(rows))
+        pain_by_segment = quant_engine.aggregate_pain_by_segment(respondents, "segment")
+
+    return {"segments": segments, "early_adopter_profile": icp, "pain_by_segment": pain_by_segment}
 
 def map_competitive_landscape(competitor_count: int, feature_overlap: float, gaps: float):
     """Maps density and threats."""
@@ -0,0 +1,487 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+
+logger = logging.getLogger("VectorBackends")
+
+
+class VectorBackend(ABC):
+    """
+    Storage interface behind VectorDBManager.
+
+    A backend hands out named collections. Collections follow the subset of the Chroma
+    Collection API that VectorDBManager uses: upsert, update, get, query and count, with
+    Chroma-shaped results and equality 'where' filters.
+    """
+    @abstractmethod
+    def get_or_create_collection(self, name, embedding_function):
+        ...
+
+    @abstractmethod
+    def delete_collection(self, name):
+        ...
+
+    @abstractmethod
+    def list_collections(self):
+        ...
+
+    def get_max_batch_size(self):
+        return 5000
+
+
+class ChromaBackend(VectorBackend):
+    """Chroma persistent client (HNSW index + SQLite metadata managed by Chroma)."""
+    def __init__(self, path):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=path)
+
+    def get_or_create_collection(self, name, embedding_function):
+        try:
+            return self.client.get_or_create_collection(name=name, embedding_function=embedding_function)
+        except ValueError as e:
+            if "Embedding function conflict" not in str(e):
+                raise
+            return self._migrate_embedding_function(name, embedding_function)
+
+    def delete_collection(self, name):
+        self.client.delete_collection(name=name)
+
+    def list_collections(self):
+        return [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+
+    def get_max_batch_size(self):
+        return self.client.get_max_batch_size()
+
+    def _migrate_embedding_function(self, name, embedding_function, page_size=1000):
+        """
+        Moves a collection persisted under another embedding function name (e.g. Chroma's
+        'default', same model) to the given function. Chroma cannot change it in place, so
+        records are copied with their stored vectors (nothing is re-embedded) into a new
+        collection, which then takes over the name.
+        """
+        old = self.client.get_collection(name=name)
+        staging_name = f"{name}-migrating"
+        if staging_name in self.list_collections():
+            self.client.delete_collection(name=staging_name)
+        staging = self.client.create_collection(name=staging_name, embedding_function=embedding_function, metadata=old.metadata)
+
+        for offset in range(0, old.count(), page_size):
+            page = old.get(include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset)
+            if len(page["ids"]):
+                staging.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"], metadatas=page["metadatas"])
+
+        self.client.delete_collection(name=name)
+        staging.modify(name=name)
+        logger.info(f"🔁 Migrated collection {name} ({staging.count()} records) to embedding function '{embedding_function.name()}'")
+        return self.client.get_collection(name=name, embedding_function=embedding_function)
+
+
+class FaissBackend(VectorBackend):
+    """
+    FAISS indexes ('flat', 'ivf' or 'hnsw') with a SQLite side-table per collection
+    for documents, metadata and segment filters. Indexes are written with
+    faiss.write_index; read-only workers can open them memory-mapped (mmap=True).
+    IVF indexes are retrained once the collection grows ivf_retrain_growth times
+    past the size they were trained on.
+    """
+    def __init__(self, path, index_type="flat", mmap=False, nlist=1024, hnsw_m=32, ivf_retrain_growth=2.0):
+        if index_type not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+        self.path = path
+        self.index_type = index_type
+        self.mmap = mmap
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.ivf_retrain_growth = ivf_retrain_growth
+        self._collections = {}
+        os.makedirs(path, exist_ok=True)
+
+    def get_or_create_collection(self, name, embedding_function):
+        if name not in self._collections:
+            self._collections[name] = FaissCollection(
+                os.path.join(self.path, name), name, embedding_function,
+                index_type=self.index_type, mmap=self.mmap, nlist=self.nlist, hnsw_m=self.hnsw_m,
+                ivf_retrain_growth=self.ivf_retrain_growth
+            )
+        return self._collections[name]
+
+    def delete_collection(self, name):
+        collection = self._collections.pop(name, None)
+        if collection is not None:
+            collection.close()
+        shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def list_collections(self):
+        return sorted(
+            entry for entry in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, entry))
+        )
+
+    def persist(self):
+        for collection in self._collections.values():
+            collection.persist()
+
+
+class FaissCollection:
+    """A single FAISS index plus its SQLite side-table, shaped like a Chroma Collection."""
+
+    def __init__(self, directory, name, embedding_function, index_type="flat", mmap=False, nlist=1024, hnsw_m=32, ivf_retrain_growth=2.0):
+        import faiss
+        self._faiss = faiss
+        self.name = name
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.index_type = index_type
+        self.read_only = mmap
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.ivf_retrain_growth = ivf_retrain_growth
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "metadata.sqlite"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                label INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT UNIQUE NOT NULL,
+                document TEXT,
+                metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS metadata_fields (
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                label INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_metadata_fields ON metadata_fields (key, value);
+            CREATE INDEX IF NOT EXISTS idx_metadata_labels ON metadata_fields (label);
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER);
+        """)
+
+        self.index = None
+        index_path = os.path.join(directory, "index.faiss")
+        if os.path.exists(index_path):
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            self.index = faiss.read_index(index_path, flags)
+        self._ivf_trained_size = self._state("ivf_trained_size")
+        if self._ivf_trained_size is None and self.index is not None and isinstance(self.index, faiss.IndexIVF):
+            self._ivf_trained_size = self.index.ntotal
+
+        if mmap and self._unpersisted_count():
+            # A memory-mapped index cannot take the newer records, and serving it as-is would
+            # silently miss them: load it into memory instead (still read-only for callers)
+            logger.warning(
+                f"⚠️ {name}: {self._unpersisted_count()} records are newer than index.faiss; loading it into "
+                f"memory to index them (persist() the writer to keep workers memory-mapped)"
+            )
+            self.index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+            self._recover_unpersisted()
+        elif not mmap:
+            self._recover_unpersisted()
+
+    # --- Writes ---
+
+    def add(self, ids, documents=None, embeddings=None, metadatas=None):
+        self.upsert(ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+
+    def upsert(self, ids, documents=None, embeddings=None, metadatas=None):
+        if self.read_only:
+            raise RuntimeError("Collection was opened memory-mapped (read-only)")
+        if embeddings is None:
+            embeddings = self.embedding_function(documents)
+        vectors = _normalized(embeddings)
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+
+        with self._lock:
+            self._remove(ids)
+            # Labels continue the AUTOINCREMENT sequence, so labels of deleted (possibly
+            # tombstoned) rows are never handed out again
+            row = self._db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'records'").fetchone()
+            first = (row[0] if row else 0) + 1
+            labels = list(range(first, first + len(ids)))
+            self._db.executemany(
+                "INSERT INTO records (label, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(label, doc_id, document, json.dumps(metadata or {}))
+                 for label, doc_id, document, metadata in zip(labels, ids, documents, metadatas)]
+            )
+            self._index_fields(zip(labels, metadatas))
+            self._db.commit()
+
+            self._ensure_index(vectors)
+            self.index.add_with_ids(vectors, np.asarray(labels, dtype=np.int64))
+            self._maybe_train_ivf()
+
+    def update(self, ids, metadatas=None, documents=None, embeddings=None):
+        if embeddings is not None or documents is not None:
+            return self.upsert(ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, label, metadata FROM records WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+            stored = {doc_id: (label, json.loads(metadata)) for doc_id, label, metadata in rows}
+            merged = {}
+            for doc_id, metadata in zip(ids, metadatas or []):
+                if doc_id in stored:
+                    label, current = stored[doc_id]
+                    merged[label] = {**merged.get(label, current), **(metadata or {})}
+
+            self._db.executemany("UPDATE records SET metadata = ? WHERE label = ?", [(json.dumps(m), label) for label, m in merged.items()])
+            self._db.executemany("DELETE FROM metadata_fields WHERE label = ?", [(label,) for label in merged])
+            self._index_fields(merged.items())
+            self._db.commit()
+
+    def delete(self, ids):
+        if self.read_only:
+            raise RuntimeError("Collection was opened memory-mapped (read-only)")
+        with self._lock:
+            self._remove(list(ids))
+            self._db.commit()
+
+    # --- Reads ---
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        sql, params = "SELECT label, id, document, metadata FROM records", []
+        clauses = []
+        if ids is not None:
+            if not ids:
+                return _get_result([], include)
+            clauses.append(f"id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if where:
+            with self._lock:
+                labels = self._labels_matching(where)
+            clauses.append(f"label IN ({','.join('?' * len(labels))})" if labels else "0")
+            params.extend(labels)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY label"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset or 0)}"
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            result = _get_result(rows, include)
+            if "embeddings" in include:
+                result["embeddings"] = [self.index.reconstruct(int(row[0])) for row in rows]
+        return result
+
+    def query(self, query_texts=None, query_embeddings=None, where=None, n_results=10, include=("documents", "metadatas", "distances")):
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        queries = _normalized(query_embeddings)
+
+        empty = {"ids": [[] for _ in queries], "documents": [[] for _ in queries],
+                 "metadatas": [[] for _ in queries], "distances": [[] for _ in queries]}
+        if self.index is None or self.index.ntotal == 0:
+            return empty
+
+        with self._lock:
+            allowed = self._labels_matching(where) if where else None
+            if allowed is not None and not allowed:
+                return empty
+
+            # Over-fetch so tombstoned labels (HNSW cannot delete) can be dropped, and widen
+            # the search until every query has n_results live hits or the index is exhausted
+            k = min(n_results * 2 + 8, self.index.ntotal)
+            while True:
+                scores, labels = self._search(queries, k, allowed)
+                records = self._records_by_label(sorted({int(label) for label in labels.ravel() if label >= 0}))
+                live = min(sum(1 for label in row if label in records) for row in labels)
+                if live >= n_results or k >= self.index.ntotal or (allowed is not None and k >= len(allowed)):
+                    break
+                k = min(k * 4, self.index.ntotal)
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for row_scores, row_labels in zip(scores, labels):
+            hits = [(int(label), float(score)) for label, score in zip(row_labels, row_scores) if label >= 0]
+            hits = [(label, score) for label, score in hits if label in records][:n_results]
+            results["ids"].append([records[label][0] for label, _ in hits])
+            results["documents"].append([records[label][1] for label, _ in hits])
+            results["metadatas"].append([records[label][2] for label, _ in hits])
+            # Cosine distance on normalized vectors
+            results["distances"].append([1.0 - score for _, score in hits])
+        return results
+
+    def persist(self):
+        if self.index is not None and not self.read_only:
+            with self._lock:
+                self._faiss.write_index(self.index, os.path.join(self.directory, "index.faiss"))
+                last_label = self._db.execute("SELECT COALESCE(MAX(label), 0) FROM records").fetchone()[0]
+                self._set_state("persisted_label", last_label)
+                self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    # --- Internals ---
+
+    def _unpersisted_count(self):
+        """Records committed to SQLite after the last index write."""
+        persisted_label = (self._state("persisted_label") or 0) if self.index is not None else 0
+        return self._db.execute("SELECT COUNT(*) FROM records WHERE label > ?", (persisted_label,)).fetchone()[0]
+
+    def _recover_unpersisted(self, batch_size=1024):
+        """Re-embeds records committed to SQLite after the last index write (e.g. after a crash)."""
+        persisted_label = (self._state("persisted_label") or 0) if self.index is not None else 0
+        pending = self._db.execute(
+            "SELECT label, document FROM records WHERE label > ? ORDER BY label", (persisted_label,)
+        ).fetchall()
+        if not pending:
+            return
+
+        logger.info(f"♻️ {self.name}: re-indexing {len(pending)} records missing from the FAISS index")
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            vectors = _normalized(self.embedding_function([document or "" for _, document in batch]))
+            self._ensure_index(vectors)
+            self.index.add_with_ids(vectors, np.asarray([label for label, _ in batch], dtype=np.int64))
+        self._maybe_train_ivf()
+
+    def _ensure_index(self, sample):
+        if self.index is not None:
+            return
+        faiss = self._faiss
+        dim = sample.shape[1]
+        if self.index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        else:
+            # IVF starts out flat until there are enough vectors to train its coarse quantizer
+            base = faiss.IndexFlatIP(dim)
+        self.index = faiss.IndexIDMap2(base)
+
+    def _maybe_train_ivf(self):
+        """
+        Migrates the interim flat index to IVF once it holds enough training points, and
+        retrains it (with more lists, up to nlist) once the collection has grown
+        ivf_retrain_growth times past the size the centroids were trained on.
+        """
+        faiss = self._faiss
+        if self.index_type != "ivf":
+            return
+        total = self.index.ntotal
+        if isinstance(self.index, faiss.IndexIVF):
+            if total < self._ivf_trained_size * self.ivf_retrain_growth:
+                return
+            labels = np.asarray([row[0] for row in self._db.execute("SELECT label FROM records ORDER BY label")], dtype=np.int64)
+            vectors = np.vstack([self.index.reconstruct(int(label)) for label in labels])
+        else:
+            if total < min(self.nlist, 256) * 39:
+                return
+            vectors = faiss.downcast_index(self.index.index).reconstruct_n(0, total)
+            labels = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+
+        nlist = min(self.nlist, total // 39)
+
+        ivf = faiss.IndexIVFFlat(faiss.IndexFlatIP(vectors.shape[1]), vectors.shape[1], nlist, faiss.METRIC_INNER_PRODUCT)
+        sample = vectors[np.random.default_rng(42).permutation(total)[:nlist * 256]]
+        ivf.train(sample)
+        # The hashtable direct map enables reconstruct and remove with external ids
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        ivf.add_with_ids(vectors, labels)
+        self.index = ivf
+        self._ivf_trained_size = total
+        self._set_state("ivf_trained_size", total)
+        self._db.commit()
+        logger.info(f"🗂️ {self.name}: trained IVF index with {nlist} lists on {total} vectors")
+
+    def _search(self, queries, k, allowed):
+        faiss = self._faiss
+        is_ivf = isinstance(self.index, faiss.IndexIVF)
+        base = faiss.extract_index_ivf(self.index) if is_ivf else None
+
+        if allowed is None:
+            params = None
+            if is_ivf:
+                params = faiss.SearchParametersIVF(nprobe=min(16, base.nlist))
+            elif self.index_type == "hnsw":
+                params = faiss.SearchParametersHNSW(efSearch=max(64, k * 2))
+            return self.index.search(queries, k, params=params)
+
+        if len(allowed) <= max(k, 2048):
+            # Small filtered sets: exact scoring on the reconstructed vectors beats graph/list probing
+            vectors = np.vstack([self.index.reconstruct(label) for label in allowed])
+            scores = queries @ vectors.T
+            order = np.argsort(-scores, axis=1)[:, :k]
+            return np.take_along_axis(scores, order, axis=1), np.asarray(allowed, dtype=np.int64)[order]
+
+        selector = faiss.IDSelectorBatch(np.asarray(allowed, dtype=np.int64))
+        if is_ivf:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=min(64, base.nlist))
+        elif self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(256, k * 4))
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        return self.index.search(queries, k, params=params)
+
+    def _remove(self, ids):
+        rows = self._db.execute(
+            f"SELECT label FROM records WHERE id IN ({','.join('?' * len(ids))})", list(ids)
+        ).fetchall() if ids else []
+        labels = [row[0] for row in rows]
+        if not labels or self.index is None:
+            return
+        self._db.executemany("DELETE FROM records WHERE label = ?", [(label,) for label in labels])
+        self._db.executemany("DELETE FROM metadata_fields WHERE label = ?", [(label,) for label in labels])
+        try:
+            self.index.remove_ids(np.asarray(labels, dtype=np.int64))
+        except RuntimeError:
+            # HNSW cannot delete; the label is tombstoned and filtered out at query time
+            pass
+
+    def _index_fields(self, labelled_metadatas):
+        self._db.executemany(
+            "INSERT INTO metadata_fields (key, value, label) VALUES (?, ?, ?)",
+            [(key, json.dumps(value), label) for label, metadata in labelled_metadatas for key, value in (metadata or {}).items()]
+        )
+
+    def _state(self, key):
+        row = self._db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    def _labels_matching(self, where):
+        labels = None
+        for key, value in where.items():
+            rows = self._db.execute(
+                "SELECT label FROM metadata_fields WHERE key = ? AND value = ?", (key, json.dumps(value))
+            ).fetchall()
+            matched = {row[0] for row in rows}
+            labels = matched if labels is None else labels & matched
+        return sorted(labels or [])
+
+    def _records_by_label(self, labels):
+        if not labels:
+            return {}
+        rows = self._db.execute(
+            f"SELECT label, id, document, metadata FROM records WHERE label IN ({','.join('?' * len(labels))})", labels
+        ).fetchall()
+        return {row[0]: (row[1], row[2], json.loads(row[3])) for row in rows}
+
+
+def _normalized(vectors):
+    vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _get_result(rows, include):
+    result = {"ids": [row[1] for row in rows]}
+    result["documents"] = [row[2] for row in rows] if "documents" in include else None
+    result["metadatas"] = [json.loads(row[3]) for row in rows] if "metadatas" in include else None
+    result["embeddings"] = None
+    return result
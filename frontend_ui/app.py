@@ -1,5 +1,5 @@
 import streamlit as st
-from state_manager import initialize_session_state
+from state_manager import initialize_session_state, append_message
 import pandas as pd
 
 # --- 1. SETUP & STATE ---
@@ -28,9 +28,17 @@ with st.sidebar:
     
     st.markdown("---")
     st.info(f"**Current Mission:**\n{selected_goal}")
-    
+
+    # Multi-part questions ("launch + churn + roadmap"): analyze every goal at once, answer in order
+    parallel_goals = st.checkbox("⚡ Run queued goals in parallel", value=False)
+    if st.session_state.brain:
+        st.session_state.brain.parallel_goals = parallel_goals
+
     if st.button("🧹 Reset Research"):
         st.session_state.messages = []
+        st.session_state.hidden_messages = 0
+        if st.session_state.brain:
+            st.session_state.brain.memory.clear()
         st.rerun()
 
 # --- 3. MAIN INTERFACE ---
@@ -59,9 +67,20 @@ with col1:
     uploaded_file = st.file_uploader("📂 Upload Research Data (CSV, Excel)", type=["csv", "xlsx"])
     if uploaded_file:
         st.success(f"✅ Loaded: {uploaded_file.name}")
-        # In a real scenario, we would process this file here
-        # df = pd.read_csv(uploaded_file) 
-        # st.dataframe(df.head())
+        # Use the time before the first question: reports, profile and drafts are computed
+        # in the background (uploading a different file cancels the previous run)
+        if st.session_state.brain:
+            brain = st.session_state.brain
+            brain.start_precompute(uploaded_file.name, selected_goal)
+            profile = brain.precomputer.profile(uploaded_file.name)
+            if profile:
+                with st.expander(f"📋 Dataset profile: {profile['rows']} rows × {profile['columns']} columns"):
+                    st.json(profile)
+            handover = brain.precomputer.draft(uploaded_file.name, selected_goal, "handover")
+            if handover:
+                st.info(handover)
+            elif brain.precomputer.pending():
+                st.caption("🔮 Preparing reports in the background...")
 
 with col2:
     st.markdown("#### 🎙️ / 📝 Context Input")
@@ -69,7 +88,14 @@ with col2:
     st.caption("You can paste emails, slack messages, or rough notes.")
 
 # --- STEP 3: EXECUTION & REPORTING ---
-# History Display
+# History Display (bounded: older turns are shown as the brain's rolling summary)
+if st.session_state.get("hidden_messages") and st.session_state.brain:
+    earlier = st.session_state.brain.memory.summary
+    with st.expander(f"🗂️ {st.session_state.hidden_messages} earlier messages (summarized)"):
+        for field in ("goals", "files", "questions", "facts"):
+            if earlier[field]:
+                st.markdown(f"**{field.title()}:** " + " · ".join(earlier[field]))
+
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
@@ -90,7 +116,7 @@ if prompt := st.chat_input("Ask a specific question or type 'Run Analysis' to pr
     """
 
     # 2. Show User Message (Visual only)
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    append_message("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
@@ -100,12 +126,25 @@ if prompt := st.chat_input("Ask a specific question or type 'Run Analysis' to pr
             message_placeholder = st.empty()
             full_response = ""
             
+            # The spinner only covers the wait for the first token; the answer then renders as it streams
             with st.spinner(f"🧠 Running '{selected_goal}' Engine..."):
                 try:
                     # Pass the FULL context to the brain, not just the chat
-                    full_response = st.session_state.brain.process_turn(full_context_prompt)
+                    stream = st.session_state.brain.stream_turn(full_context_prompt)
+                    first_chunk = next(stream, "")
                 except Exception as e:
-                    full_response = f"❌ Error: {e}"
+                    stream, first_chunk = iter(()), f"❌ Error: {e}"
+
+            full_response = first_chunk
+            try:
+                for chunk in stream:
+                    full_response += chunk
+                    message_placeholder.markdown(full_response + "▌")
+            except Exception as e:
+                full_response += f"\n\n❌ Error: {e}"
 
             message_placeholder.markdown(full_response)
-            st.session_state.messages.append({"role": "assistant", "content": full_response})
\ No newline at end of file
+            timing = st.session_state.brain.last_turn_timing
+            if timing.get("total_ms") is not None:
+                st.caption(f"⏱️ First token {timing['ttft_ms']} ms · total {timing['total_ms']} ms")
+            append_message("assistant", full_response)
\ No newline at end of file
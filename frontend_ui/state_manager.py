@@ -12,6 +12,10 @@ load_dotenv(os.path.join(root_path, ".env"))
 
 from agent_reasoning.brain import AgentBrain
 
+# Chat messages kept in session state (and re-rendered on every rerun); older ones
+# live on only in the brain's rolling conversation summary
+MAX_VISIBLE_MESSAGES = 20
+
 def initialize_session_state():
     """
     Sets up the session state variables if they don't exist yet.
@@ -33,4 +37,15 @@ def initialize_session_state():
 
     # 3. Initialize UI Controls
     if "processing" not in st.session_state:
-        st.session_state.processing = False
\ No newline at end of file
+        st.session_state.processing = False
+
+def append_message(role, content):
+    """
+    Adds a chat message and drops the oldest ones beyond MAX_VISIBLE_MESSAGES,
+    so reruns stay constant-time as the conversation grows.
+    """
+    st.session_state.messages.append({"role": role, "content": content})
+    overflow = len(st.session_state.messages) - MAX_VISIBLE_MESSAGES
+    if overflow > 0:
+        del st.session_state.messages[:overflow]
+        st.session_state.hidden_messages = st.session_state.get("hidden_messages", 0) + overflow
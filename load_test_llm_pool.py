@@ -0,0 +1,116 @@
+# load_test_llm_pool.py
+# Concurrent load through the shared LLM client pool against a local OpenAI-compatible stand-in
+# that adds latency and answers a share of requests with 429, to check limiter and backoff behaviour.
+# Usage: python load_test_llm_pool.py [--requests 60] [--workers 16] [--latency-ms 200] [--error-rate 0.2]
+#        python load_test_llm_pool.py --base-url https://api.openai.com/v1   (real endpoint; needs OPENAI_API_KEY)
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import HumanMessage
+from agent_reasoning.llm_pool import LLMClientPool
+
+
+class StandInEndpoint(BaseHTTPRequestHandler):
+    """Minimal /v1/chat/completions: sleeps `latency`, then answers 429 with probability `error_rate`."""
+    latency = 0.2
+    error_rate = 0.2
+    served = {"ok": 0, "rate_limited": 0}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            with self.lock:
+                self.served["rate_limited"] += 1
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}})
+            return
+        with self.lock:
+            self.served["ok"] += 1
+        self._send(200, {
+            "id": f"chatcmpl-{random.getrandbits(32):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stand-in"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(args):
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        StandInEndpoint.latency = args.latency_ms / 1000
+        StandInEndpoint.error_rate = args.error_rate
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StandInEndpoint)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "sk-load-test")
+
+    pool = LLMClientPool(base_url=base_url, rate=args.rate, capacity=args.burst, max_concurrency=args.max_concurrency)
+    model = pool.get("gpt-4-turbo", temperature=0)
+    model.base_backoff = args.base_backoff
+
+    def call(i):
+        start = time.perf_counter()
+        try:
+            model.invoke([HumanMessage(content=f"ping {i}")])
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds * 1000 for seconds, error in results if error is None]
+    failures = [error for _, error in results if error is not None]
+    print(f"endpoint            {base_url}")
+    print(f"requests            {args.requests} ({args.workers} workers)")
+    print(f"limiter             {args.rate}/s, burst {args.burst}, max {args.max_concurrency} in flight")
+    print(f"succeeded           {len(latencies)}")
+    print(f"failed              {len(failures)} {sorted(set(failures)) if failures else ''}")
+    print(f"throughput          {len(latencies) / elapsed:.2f} req/s over {elapsed:.2f} s")
+    if latencies:
+        print(f"latency p50 / p95   {np.median(latencies):.0f} / {np.percentile(latencies, 95):.0f} ms")
+    print(f"pool stats          {pool.stats()}")
+    if server is not None:
+        print(f"endpoint served     {StandInEndpoint.served}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the shared LLM client pool")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--base-backoff", type=float, default=0.1)
+    parser.add_argument("--base-url", default=None)
+    run(parser.parse_args())
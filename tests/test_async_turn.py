@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agent_reasoning import llm_cache
+from agent_reasoning.llm_cache import LLMResponseCache
+
+FILE_QUESTION = """
+    [SYSTEM_METADATA]
+    ACTIVE_GOAL: 1. Launch New Product
+    UPLOADED_FILE: hairfall_market_survey_demo.csv
+    USER_NOTES:
+    [/SYSTEM_METADATA]
+
+    USER_QUERY: What price should we launch at?
+    """
+
+
+class FakeLLM:
+    """Deterministic stand-in for the chat model: answers from the prompt, records every call."""
+    temperature = 0
+    model_name = "fake"
+
+    def __init__(self):
+        self.prompts = []
+
+    def _answer(self, messages):
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        if "Map input" in prompt:
+            return AIMessage(content="GOAL_1_LAUNCH")
+        return AIMessage(content=f"answer from {len(prompt)} chars")
+
+    def invoke(self, messages, **kwargs):
+        return self._answer(messages)
+
+    async def ainvoke(self, messages, **kwargs):
+        return self._answer(messages)
+
+
+@pytest.fixture
+def make_brain(tmp_path, monkeypatch):
+    # The chat clients are built (never called) with the brain; FakeLLM answers instead
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(llm_cache, "_cache", LLMResponseCache(str(tmp_path / "responses.sqlite")))
+    from agent_reasoning.brain import AgentBrain
+
+    def _make():
+        brain = AgentBrain()
+        brain.llm.llm = FakeLLM()
+        brain.validator.llm.llm = FakeLLM()
+        brain.output_manager.llm.llm = FakeLLM()
+        return brain
+    return _make
+
+
+@pytest.mark.parametrize("question", [FILE_QUESTION, "hello there"])
+def test_async_turn_matches_sync_turn(make_brain, question):
+    sync_brain, async_brain = make_brain(), make_brain()
+
+    expected = sync_brain.process_turn(question)
+    answer = asyncio.run(async_brain.aprocess_turn(question))
+
+    assert answer == expected
+    assert async_brain.active_goal == sync_brain.active_goal
+    assert async_brain.goal_queue == sync_brain.goal_queue
+    assert async_brain.memory.stats() == sync_brain.memory.stats()
+    assert async_brain.context_memory == sync_brain.context_memory
+
+
+def test_async_turn_overlaps_independent_stages(make_brain):
+    brain = make_brain()
+    brain.parallel_goals = True
+    spans = {}
+
+    def timed(name, seconds, result):
+        spans[name] = [time.perf_counter()]
+        time.sleep(seconds)
+        spans[name].append(time.perf_counter())
+        return result
+
+    async def atimed(name, seconds, result):
+        spans[name] = [time.perf_counter()]
+        await asyncio.sleep(seconds)
+        spans[name].append(time.perf_counter())
+        return result
+
+    brain._run_tools = lambda *args: timed("tools", 0.2, "Price 499 preferred by 62%")
+    brain._adetect_goals = lambda query: atimed("goals", 0.2, ["GOAL_1_LAUNCH"])
+    brain.llm.ainvoke = lambda messages: atimed("synthesis", 0.2, AIMessage(content="launch at 499"))
+    brain.validator.acheck_clarity = lambda *args, **kwargs: atimed("clarity", 0.2, {"status": "CLEAR"})
+
+    assert asyncio.run(brain.aprocess_turn(FILE_QUESTION)) == "launch at 499"
+    assert brain.context_memory["last_clarity"] == {"status": "CLEAR"}
+    for first, second in (("tools", "goals"), ("synthesis", "clarity")):
+        assert spans[first][0] < spans[second][1] and spans[second][0] < spans[first][1]
+
+
+def test_async_turn_reuses_cached_synthesis(make_brain):
+    brain = make_brain()
+    asyncio.run(brain.aprocess_turn(FILE_QUESTION))
+    hits, sent = llm_cache.get_llm_cache().hits, len(brain.llm.llm.prompts)
+    brain.memory.clear()
+    asyncio.run(brain.aprocess_turn(FILE_QUESTION))
+    assert llm_cache.get_llm_cache().hits > hits
+    assert len(brain.llm.llm.prompts) == sent
@@ -0,0 +1,80 @@
+from agent_reasoning.validator import ClarityPreScorer, ClarityValidator
+
+LAUNCH_FINDINGS = {
+    "market": {"sample size": 1000},
+    "competition": {"competitor brands": 6, "risk": "High density requires differentiation"},
+    "pricing": {"average wtp": 412.5},
+}
+
+
+def test_full_numeric_coverage_with_risk_is_clear():
+    scorer = ClarityPreScorer()
+    signals = scorer.score("1. Launch New Product", LAUNCH_FINDINGS)
+    assert signals["question_coverage"] == 1.0
+    assert signals["risk_visibility"] == 1.0
+    assert signals["structural_understanding"] == 1.0
+    assert scorer.verdict(signals) == "clear"
+
+
+def test_placeholders_do_not_count_as_answers():
+    scorer = ClarityPreScorer()
+    signals = scorer.score("GOAL_2_PERFORMANCE", {
+        "kpis": {"time to value": "N/A"},
+        "funnel": {"bottleneck": "Unknown"},
+    })
+    assert signals["question_coverage"] == 0.0
+    assert set(signals["unanswered"]) == {"kpi_health", "funnel_bottleneck", "churn_drivers"}
+    assert scorer.verdict(signals) == "not_clear"
+
+
+def test_zero_is_an_answer():
+    assert ClarityPreScorer._numeric_answer("Churn rate: 0%", ["churn"])
+    assert ClarityPreScorer._numeric_answer("Churn rate: 5%", ["churn"])
+    assert not ClarityPreScorer._numeric_answer("Churn rate: N/A", ["churn"])
+
+
+def test_version_and_date_strings_do_not_raise():
+    scorer = ClarityPreScorer()
+    signals = scorer.score("1. Launch", {"Market size": "Sample size: 1.2.3 rows", "released": "19.10.2026", "host": "10.0.0.1"})
+    assert signals["question_coverage"] == 0.0
+
+
+def test_thousands_separators_parse():
+    scorer = ClarityPreScorer()
+    signals = scorer.score("1. Launch", {"market": "Sample size: 1,250 respondents"})
+    assert "market_size" not in signals["unanswered"]
+
+
+def test_partial_coverage_with_risk_is_borderline():
+    signals = {"question_coverage": 0.667, "risk_visibility": 1.0, "structural_understanding": 1.0, "diminishing_returns": 0.0, "unanswered": ["pricing"]}
+    assert ClarityPreScorer.verdict(signals) == "borderline"
+
+
+def test_diminishing_returns_is_tracked_per_session():
+    scorer = ClarityPreScorer()
+    changed = {**LAUNCH_FINDINGS, "pricing": {"average wtp": 399.0, "viable band": "299 - 499"}}
+    scorer.score("1. Launch", LAUNCH_FINDINGS, session_id="a")
+    # Another session's findings must not count as the previous iteration of session "a"
+    scorer.score("1. Launch", changed, session_id="b")
+    assert scorer.score("1. Launch", LAUNCH_FINDINGS, session_id="a")["diminishing_returns"] == 1.0
+    assert scorer.score("1. Launch", changed, session_id="a")["diminishing_returns"] < 1.0
+
+
+def test_resolve_goal_accepts_ui_labels_and_keys():
+    scorer = ClarityPreScorer()
+    assert scorer.resolve_goal("4. Increase Retention") == "GOAL_4_RETENTION"
+    assert scorer.resolve_goal("GOAL_7_SYNTHESIS") == "GOAL_7_SYNTHESIS"
+    assert scorer.resolve_goal("hello there") is None
+
+
+def test_decisive_prescore_skips_the_llm(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    validator = ClarityValidator()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM judge called for a decisive pre-score")
+
+    monkeypatch.setattr(validator.llm, "invoke", fail)
+    result = validator.check_clarity("1. Launch", LAUNCH_FINDINGS, "is it viable?", session_id="s")
+    assert result["is_clear"] is True
+    assert validator.judge_stats == {"local": 1, "llm": 0}
@@ -0,0 +1,57 @@
+import pytest
+
+FILE_QUESTION = """
+    [SYSTEM_METADATA]
+    ACTIVE_GOAL: 1. Launch New Product
+    UPLOADED_FILE: hairfall_market_survey_demo.csv
+    [/SYSTEM_METADATA]
+
+    USER_QUERY: Should we launch, and where does onboarding lose people?
+    """
+
+
+@pytest.fixture
+def brain(monkeypatch):
+    # The chat clients are built (never called): detection and goal answers are stubbed
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    from agent_reasoning.brain import AgentBrain
+
+    brain = AgentBrain(parallel_goals=True)
+    brain.detections = 0
+
+    def detect(user_input):
+        brain.detections += 1
+        return ["GOAL_1_LAUNCH", "GOAL_3_UX_JOURNEY"]
+
+    def answer(file_name, goal, clean_user_query, conversation):
+        if goal == "GOAL_3_UX_JOURNEY":
+            raise RuntimeError("engine crashed")
+        return f"{goal} answered"
+
+    brain._detect_goals = detect
+    brain._answer_goal = answer
+    return brain
+
+
+def test_only_the_questions_goals_are_answered(brain):
+    brain.goal_queue = ["GOAL_4_RETENTION"]
+
+    answer = brain.process_turn(FILE_QUESTION)
+
+    assert brain.detections == 1
+    assert "GOAL_1_LAUNCH answered" in answer
+    assert "GOAL_4_RETENTION" not in answer
+    # The stale goal stays queued for a later turn
+    assert brain.active_goal == "GOAL_4_RETENTION"
+    assert brain.goal_queue == []
+
+
+def test_a_failing_goal_does_not_stop_the_others(brain):
+    goals = ["GOAL_3_UX_JOURNEY", "GOAL_1_LAUNCH"]
+    brain._update_queue(goals)
+
+    answers = dict(brain.run_goal_queue("demo.csv", "question", parallel=True, goals=goals))
+
+    assert answers["GOAL_3_UX_JOURNEY"].startswith("❌")
+    assert answers["GOAL_1_LAUNCH"] == "GOAL_1_LAUNCH answered"
+    assert brain.active_goal is None and brain.goal_queue == []
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from data_intelligence import keyword_index
+from data_intelligence.keyword_index import BM25Index
+
+QUERIES = ["w1 w2", "w5", "w7 w30 w59", "unknown"]
+
+
+def _scores(index, query, where=None):
+    return {doc_id: round(score, 9) for doc_id, score in index.search(query, n_results=1000, where=where)}
+
+
+def _assert_matches_fresh_index(index, docs):
+    fresh = BM25Index()
+    fresh.add(list(docs), list(docs.values()), [{"odd": int(doc_id) % 2} for doc_id in docs])
+    for query in QUERIES:
+        for where in (None, {"odd": 1}):
+            assert _scores(index, query, where) == _scores(fresh, query, where)
+
+
+def test_incremental_adds_and_replacements_score_like_a_fresh_index(monkeypatch):
+    # Small merge threshold, so searches run on merged + delta matrices and merges happen often
+    monkeypatch.setattr(keyword_index, "DELTA_MERGE_ROWS", 16)
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(60)]
+    index, docs = BM25Index(), {}
+
+    for step in range(300):
+        doc_id = str(rng.randrange(150))
+        docs[doc_id] = " ".join(rng.choices(words[:20 + step // 5], k=rng.randint(1, 12)))
+        index.add([doc_id], [docs[doc_id]], [{"odd": int(doc_id) % 2}])
+        if step % 7 == 0:
+            _assert_matches_fresh_index(index, docs)
+    _assert_matches_fresh_index(index, docs)
+
+
+def test_compact_drops_tombstones(tmp_path):
+    index = BM25Index()
+    index.add(["1", "2", "3"], ["w1 w2", "w5", "w7 w30"], [{"odd": 1}, {"odd": 0}, {"odd": 1}])
+    index.add(["1"], ["w2 w59"], [{"odd": 1}])
+    docs = {"1": "w2 w59", "2": "w5", "3": "w7 w30"}
+
+    assert index.compact() == 1
+    assert len(index.ids) == len(index) == 3
+    assert "w1" not in index.vocabulary
+    _assert_matches_fresh_index(index, docs)
+
+    index.save(tmp_path)
+    loaded = BM25Index.load(tmp_path)
+    loaded.add(["4"], ["w1 w1 w5"], [{"odd": 0}])
+    _assert_matches_fresh_index(loaded, {**docs, "4": "w1 w1 w5"})
+
+
+@pytest.mark.parametrize("adds", [1, 50])
+def test_add_does_not_rebuild_the_column_matrix(adds):
+    index = BM25Index()
+    index.add([str(i) for i in range(2000)], [f"w{i % 50} w{i % 7}" for i in range(2000)])
+    index.search("w1")
+    merged = index._columns
+
+    index.add([f"new{i}" for i in range(adds)], ["w1 fresh"] * adds)
+    assert index.search("fresh", n_results=1)[0][0].startswith("new")
+    assert index._columns is merged
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_intelligence.qual_engine import QualEvidenceEngine, PAIN_LEXICON, NEGATION_FACTOR
+from data_intelligence.quant_engine import QuantInsightEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return QualEvidenceEngine()
+
+
+def _score(engine, text):
+    return float(engine.score_sentiment_batch([text])[0])
+
+
+def test_bigram_counts_instead_of_its_unigrams(engine):
+    # "too expensive" alone, not averaged with "expensive"
+    assert _score(engine, "this is too expensive") == pytest.approx(PAIN_LEXICON["too expensive"])
+    assert _score(engine, "nothing works for me") == pytest.approx(PAIN_LEXICON["nothing works"])
+
+
+@pytest.mark.parametrize("text, term", [
+    ("not good", "good"),
+    ("no hairfall since I switched", "hairfall"),
+    ("never really happy with it", "happy"),
+])
+def test_negation_reverses_terms_in_scope(engine, text, term):
+    assert _score(engine, text) == pytest.approx(PAIN_LEXICON[term] * NEGATION_FACTOR)
+
+
+def test_negation_scope_ends_at_punctuation_and_distance(engine):
+    assert _score(engine, "not sure. good") == pytest.approx(PAIN_LEXICON["good"])
+    assert _score(engine, "no, it was a great buy") == pytest.approx(PAIN_LEXICON["great"])
+    assert _score(engine, "not that i would say it is good") == pytest.approx(PAIN_LEXICON["good"])
+
+
+def test_negated_phrases_in_the_lexicon_are_not_flipped(engine):
+    assert _score(engine, "not working at all") == pytest.approx(PAIN_LEXICON["not working"])
+    assert _score(engine, "not worth the price") == pytest.approx(PAIN_LEXICON["not worth"])
+
+
+def test_pain_scores_aggregate_by_segment(engine):
+    df = pd.DataFrame({
+        "feedback_text": ["love it", "terrible, hairfall got worse", "no complaints", None],
+        "segment": ["students", "professionals", "students", "professionals"],
+    })
+    df = engine.attach_pain_scores(df)
+    assert not np.signbit(df["pain_score"]).any()
+    assert df["pain_score"].between(0.0, 1.0).all()
+
+    ranked = QuantInsightEngine().aggregate_pain_by_segment(df, "segment")
+    assert list(ranked) == ["professionals", "students"]
+    assert ranked["students"]["mean_pain"] == 0.0
@@ -0,0 +1,79 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from data_intelligence import db_manager
+from data_intelligence.keyword_index import BM25Index
+from data_intelligence.vector_backends import FaissCollection
+
+DOCS = ["too expensive for students", "stopped my hairfall in a month", "the 499 pack is overpriced"]
+METADATAS = [{"segment": "students"}, {"segment": "professionals"}, {"segment": "students"}]
+
+
+class HashEmbeddingService:
+    """Deterministic offline stand-in for the shared embedding model; counts encoded texts."""
+    dimension = 32
+
+    def __init__(self):
+        self.encoded = 0
+
+    def register_consumer(self, name):
+        pass
+
+    def encode(self, texts):
+        self.encoded += len(texts)
+        seeds = [int(hashlib.sha1(str(t).encode()).hexdigest()[:8], 16) for t in texts]
+        return np.stack([np.random.default_rng(seed).normal(size=self.dimension) for seed in seeds]).astype(np.float32)
+
+    def as_chroma_function(self):
+        service = self
+
+        def embed(input):
+            return list(service.encode(input))
+        return embed
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = HashEmbeddingService()
+    monkeypatch.setattr(db_manager, "get_embedding_service", lambda: service)
+    return service
+
+
+def _ingest(path, backend):
+    manager = db_manager.VectorDBManager(db_path=str(path), backend=backend)
+    manager.add_evidence_bulk(DOCS, METADATAS, ids=["a", "b", "c"])
+    return manager
+
+
+def test_reopened_manager_loads_the_persisted_bm25_index(tmp_path, service, monkeypatch):
+    _ingest(tmp_path, "faiss-flat")
+    assert (tmp_path / "bm25" / "bm25.json").exists()
+
+    # A rebuild would start from an empty index and add every document again
+    monkeypatch.setattr(BM25Index, "add", lambda *args, **kwargs: pytest.fail("BM25 index was rebuilt"))
+    reopened = db_manager.VectorDBManager(db_path=str(tmp_path), backend="faiss-flat")
+    assert reopened.keyword_index.search("499 overpriced")[0][0] == "c"
+
+
+
+def test_reopened_faiss_collection_does_not_re_embed(tmp_path, service):
+    _ingest(tmp_path, "faiss-flat")
+    encoded = service.encoded
+
+    reopened = db_manager.VectorDBManager(db_path=str(tmp_path), backend="faiss-flat")
+    assert service.encoded == encoded
+    assert reopened.query_by_segment("hairfall", "professionals", n_results=1)["ids"] == [["b"]]
+
+
+def test_memory_mapped_worker_indexes_records_newer_than_the_index(tmp_path, service):
+    manager = _ingest(tmp_path, "faiss-flat")
+    # Written after the last persist: the index file on disk does not hold it yet
+    manager.persist_interval = None
+    manager.add_evidence(["brand new complaint about price"], [{"segment": "students"}], ["d"])
+
+    directory = tmp_path / "faiss" / manager.collection_name
+    worker = FaissCollection(str(directory), manager.collection_name, manager.emb_fn, mmap=True)
+    assert worker.index.ntotal == 4
+    assert worker.query(query_texts=["brand new complaint about price"], n_results=1)["ids"] == [["d"]]
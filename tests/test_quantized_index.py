@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from data_intelligence.quantized_index import QuantizedVectorIndex
+
+
+def _clustered(n=500, dim=384, clusters=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def _recall_at_k(index, vectors, queries, k=10):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    hits = 0
+    for query, result in zip(queries, index.search(queries, n_results=k)):
+        exact = set(np.argsort(-(unit @ (query / np.linalg.norm(query))))[:k])
+        hits += len(exact & {int(vid) for vid, _ in result})
+    return hits / (k * len(queries))
+
+
+@pytest.mark.parametrize("first_batch", [1, 8, 500])
+@pytest.mark.parametrize("rerank", [False, True])
+def test_int8_recall_does_not_depend_on_first_batch_size(first_batch, rerank):
+    vectors = _clustered()
+    index = QuantizedVectorIndex(vectors.shape[1], dtype="int8", rerank=rerank)
+    ids = [str(i) for i in range(len(vectors))]
+    index.add(ids[:first_batch], vectors[:first_batch])
+    for start in range(first_batch, len(vectors), 64):
+        index.add(ids[start:start + 64], vectors[start:start + 64])
+
+    assert index.quantizer.is_trained
+    assert _recall_at_k(index, vectors, vectors[:50] + 0.05) >= 0.9
+
+
+def test_uncalibrated_index_searches_float32_rows_and_survives_save(tmp_path):
+    vectors = _clustered(n=20)
+    index = QuantizedVectorIndex(vectors.shape[1], dtype="int8", rerank=False)
+    index.add([str(i) for i in range(20)], vectors)
+    assert not index.quantizer.is_trained
+    assert _recall_at_k(index, vectors, vectors[:5], k=5) == 1.0
+
+    index.save(str(tmp_path))
+    loaded = QuantizedVectorIndex.load(str(tmp_path))
+    assert not loaded.quantizer.is_trained
+    assert _recall_at_k(loaded, vectors, vectors[:5], k=5) == 1.0
+
+
+def test_quantizer_is_recalibrated_as_the_index_grows():
+    vectors = _clustered(n=1200)
+    index = QuantizedVectorIndex(vectors.shape[1], dtype="int8", rerank=True, min_train_size=256)
+    index.add([str(i) for i in range(300)], vectors[:300])
+    first_offset = index.quantizer.offset.copy()
+    index.add([str(i) for i in range(300, 1200)], vectors[300:] * 3)
+    assert index._trained_on == 1200
+    assert not np.allclose(first_offset, index.quantizer.offset)
+
+
+@pytest.mark.parametrize("rerank", [False, True])
+def test_readding_an_id_replaces_its_vector_and_metadata(rerank):
+    vectors = _clustered(n=400)
+    index = QuantizedVectorIndex(vectors.shape[1], dtype="int8", rerank=rerank)
+    index.add([str(i) for i in range(400)], vectors, [{"v": 1} for _ in range(400)])
+
+    assert index.add(["0"], vectors[399:], [{"v": 2}]) == 0
+    assert len(index) == 400
+    assert index.get_metadata("0") == {"v": 2}
+    top_ids = {vid for vid, _ in index.search(vectors[399:], n_results=2)[0]}
+    assert top_ids == {"0", "399"}
@@ -0,0 +1,15 @@
+from agent_reasoning.safety_filter import SafetyPreFilter
+
+
+def _numbers(draft, source):
+    return [text for check, text in SafetyPreFilter().scan(draft, source) if check == "unsupported_number"]
+
+
+def test_compacted_and_percentage_renderings_are_supported():
+    source = {"avg_price": 499.0, "churn": 0.4567, "avg_wtp": 412.125}
+    draft = "The average price is 499, churn is 45.67% and willingness to pay averages 412.13."
+    assert _numbers(draft, source) == []
+
+
+def test_invented_numbers_are_flagged():
+    assert _numbers("We surveyed 1,250 users and logged 777 complaints.", {"sample_size": 1250}) == ["777"]